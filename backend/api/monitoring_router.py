@@ -0,0 +1,91 @@
+import logging
+from typing import Any, Dict
+
+from fastapi import APIRouter
+
+import backend.glpi_client as glpi_client
+from backend.logic.day_buckets import day_buckets
+from backend.logic.ticket_mirror import mirror
+from backend.logic.user_directory import user_directory
+from backend.utils.cache import cache
+from backend.utils.prewarm import scheduler
+
+# Endpoints de observabilidade interna (não consumidos pelo dashboard)
+router = APIRouter(
+    prefix="/api/v1/monitoramento",
+    tags=["Monitoring"],
+)
+
+logger = logging.getLogger(__name__)
+
+
+@router.get(
+    "/glpi-pool",
+    summary="Estatísticas do pool de conexões com o GLPI",
+)
+async def get_glpi_pool_stats_endpoint() -> Dict[str, Any]:
+    """
+    Retorna o estado do pool HTTP compartilhado com o GLPI: conexões em uso/ociosas,
+    requisições aguardando vaga, totais de conexões criadas vs. reutilizadas, o limite
+    adaptativo de requisições em voo por host e o estado do circuit breaker.
+    """
+    return glpi_client.pool_stats()
+
+
+@router.get(
+    "/cache",
+    summary="Estatísticas do cache de respostas",
+)
+async def get_cache_stats_endpoint() -> Dict[str, Any]:
+    """
+    Retorna hits/misses do cache de respostas e a coalescência de misses concorrentes
+    (quantos chamadores foram deduplicados por chave e por namespace).
+    """
+    return cache.stats()
+
+
+@router.get(
+    "/prewarm",
+    summary="Estado do pré-aquecimento do cache",
+)
+async def get_prewarm_stats_endpoint() -> Dict[str, Any]:
+    """
+    Retorna ciclos executados, visões recalculadas e falhas do agendador de pré-aquecimento.
+    """
+    return scheduler.stats()
+
+
+@router.get(
+    "/espelho",
+    summary="Estado do espelho local de tickets",
+)
+async def get_mirror_stats_endpoint() -> Dict[str, Any]:
+    """
+    Retorna se o espelho local está habilitado, quantos tickets contém, a defasagem
+    desde a última sincronização e os totais de sincronizações e falhas.
+    """
+    return await mirror.stats()
+
+
+@router.get(
+    "/usuarios",
+    summary="Estado do diretório de nomes de usuários",
+)
+async def get_user_directory_stats_endpoint() -> Dict[str, Any]:
+    """
+    Retorna quantos nomes (e inexistentes, em cache negativo) o diretório mantém, hits,
+    buscas em lote, consultas individuais e renovações em segundo plano.
+    """
+    return user_directory.stats()
+
+
+@router.get(
+    "/buckets-diarios",
+    summary="Estado dos buckets diários de contagens",
+)
+async def get_day_buckets_stats_endpoint() -> Dict[str, Any]:
+    """
+    Retorna quantas varreduras de dias ausentes foram feitas, quantos dias foram
+    reaproveitados do cache e quantos intervalos seguiram o caminho direto.
+    """
+    return day_buckets.stats()
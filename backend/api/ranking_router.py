@@ -1,12 +1,16 @@
 import logging
 import os
-from typing import List
+from typing import Any, Dict, List
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 
 import backend.glpi_client as glpi_client
 from backend.logic.errors import GLPIAuthError, GLPINetworkError, GLPISearchError
-from backend.logic.ranking_logic import generate_technician_ranking
+from backend.logic.ranking_logic import (
+    TECHNICIAN_GROUP_ID,
+    generate_technician_ranking,
+    invalidate_group_members,
+)
 from backend.schemas import TechnicianRankingItem
 from backend.utils.cache import cache
 from backend.utils.logging_setup import format_range
@@ -21,6 +25,34 @@ logger = logging.getLogger(__name__)
 
 RANKING_LIMIT = 20   # quantidade máxima de itens retornados pelo endpoint
 CACHE_TTL_SEC = int(os.getenv("CACHE_TTL_SEC", "300"))
+CACHE_STALE_TTL_SEC = int(os.getenv("CACHE_STALE_TTL_SEC", "3600"))
+
+
+def ranking_cache_key(inicio: str | None, fim: str | None) -> str:
+    """Chave de cache inclui endpoint, intervalo e limite."""
+    return f"ranking-tecnicos|inicio={inicio or ''}|fim={fim or ''}|limit={RANKING_LIMIT}"
+
+
+async def load_ranking(
+    api_url: str,
+    app_token: str,
+    user_token: str,
+    inicio: str | None,
+    fim: str | None,
+) -> List[Dict[str, Any]]:
+    """Calcula o Top N do ranking no GLPI (usado pelo endpoint e pelo pré-aquecimento)."""
+    # Autenticação é feita aqui, na camada da API
+    headers = await glpi_client.authenticate(api_url, app_token, user_token)
+
+    # Chama a lógica de negócio, injetando as dependências
+    ranking_data = await generate_technician_ranking(
+        api_url=api_url,
+        session_headers=headers,
+        inicio=inicio,
+        fim=fim,
+    )
+    # Retorna Top N
+    return ranking_data[:RANKING_LIMIT]
 
 
 @router.get(
@@ -30,6 +62,7 @@ CACHE_TTL_SEC = int(os.getenv("CACHE_TTL_SEC", "300"))
     description="Retorna uma lista ordenada de técnicos pelo número de tickets atribuídos."
 )
 async def get_ranking_tecnicos_endpoint(
+    response: Response,
     inicio: str | None = Query(default=None, description="Data inicial no formato YYYY-MM-DD"),
     fim: str | None = Query(default=None, description="Data final no formato YYYY-MM-DD"),
 ):
@@ -37,25 +70,7 @@ async def get_ranking_tecnicos_endpoint(
     Endpoint para obter o ranking de técnicos.
     Este endpoint lida com a autenticação e chama a lógica de negócio para gerar os dados.
     """
-    # Chave de cache inclui endpoint, intervalo e limite
-    key = (
-        f"ranking-tecnicos|inicio={inicio or ''}|fim={fim or ''}|limit={RANKING_LIMIT}"
-    )
-    cached = cache.get(key)
-    if cached is not None:
-        logger.info(
-            "cache_hit=true endpoint=/ranking-tecnicos itemtype=Ticket range=%s key=%s limit=%s",
-            format_range(inicio, fim),
-            key,
-            RANKING_LIMIT,
-        )
-        return cached
-    logger.info(
-        "cache_hit=false endpoint=/ranking-tecnicos itemtype=Ticket range=%s key=%s limit=%s",
-        format_range(inicio, fim),
-        key,
-        RANKING_LIMIT,
-    )
+    key = ranking_cache_key(inicio, fim)
     # As variáveis são lidas de dentro da função para garantir que o .env já foi carregado
     API_URL = os.getenv("API_URL")
     APP_TOKEN = os.getenv("APP_TOKEN")
@@ -68,28 +83,25 @@ async def get_ranking_tecnicos_endpoint(
         )
 
     try:
-        # Autenticação é feita aqui, na camada da API
-        headers = glpi_client.authenticate(API_URL, APP_TOKEN, USER_TOKEN)
-
-        # Chama a lógica de negócio, injetando as dependências
-        ranking_data = generate_technician_ranking(
-            api_url=API_URL,
-            session_headers=headers,
-            inicio=inicio,
-            fim=fim,
+        # Stale-while-revalidate: valores vencidos são servidos na hora e recalculados em
+        # segundo plano; misses concorrentes da mesma chave compartilham um único cálculo
+        result = await cache.fetch(
+            key,
+            lambda: load_ranking(API_URL, APP_TOKEN, USER_TOKEN, inicio, fim),
+            ttl=CACHE_TTL_SEC,
+            stale_ttl=CACHE_STALE_TTL_SEC,
         )
-
-        # Retorna Top N e grava em cache (TTL curto)
-        top_data = ranking_data[:RANKING_LIMIT]
-        cache.set(key, top_data, ttl=CACHE_TTL_SEC)
+        response.headers.update(result.headers())
         logger.info(
-            "cache_set endpoint=/ranking-tecnicos itemtype=Ticket range=%s key=%s limit=%s ttl=%s",
+            "cache_hit=%s cache_status=%s endpoint=/ranking-tecnicos itemtype=Ticket range=%s key=%s limit=%s ttl=%s",
+            str(result.hit).lower(),
+            result.status,
             format_range(inicio, fim),
             key,
             RANKING_LIMIT,
             CACHE_TTL_SEC,
         )
-        return top_data
+        return result.value
     except GLPIAuthError as e:
         status = e.status_code or 401
         logger.warning("endpoint=/ranking-tecnicos itemtype=Ticket error=GLPIAuthError glpi_status=%s", status)
@@ -103,3 +115,18 @@ async def get_ranking_tecnicos_endpoint(
         status = e.status_code or 502
         logger.error("endpoint=/ranking-tecnicos itemtype=Ticket error=GLPISearchError glpi_status=%s", status)
         raise HTTPException(status_code=status, detail="Erro ao consultar dados do GLPI.")
+
+
+@router.post(
+    "/ranking-tecnicos/membros/invalidar",
+    summary="Invalida a composição em cache do grupo técnico",
+)
+async def invalidate_group_members_endpoint() -> Dict[str, Any]:
+    """
+    Descarta a composição em cache do grupo técnico (RANKING_TECHNICIAN_PARENT_GROUP_ID)
+    e a estratégia de busca memorizada; o próximo cálculo do ranking a busca de novo no GLPI.
+    Rankings já em cache seguem valendo até o fim do próprio TTL.
+    """
+    invalidated = await invalidate_group_members(TECHNICIAN_GROUP_ID)
+    logger.info("endpoint=/ranking-tecnicos/membros/invalidar grupo=%s invalidated=%s", TECHNICIAN_GROUP_ID, invalidated)
+    return {"grupo": TECHNICIAN_GROUP_ID, "invalidado": invalidated}
@@ -1,14 +1,19 @@
 import logging
 import os
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, HTTPException, Query, Response
 
 import backend.glpi_client as glpi_client
 from backend.logic.errors import GLPIAuthError, GLPINetworkError, GLPISearchError
 from backend.logic.glpi_constants import STATUS
 
-# Apenas a função de stats por nível é necessária agora
-from backend.logic.metrics_logic import generate_general_stats, generate_level_stats
+# As duas visões são derivadas da mesma matriz de contagens (um único fan-out)
+from backend.logic.metrics_logic import (
+    StatusCounts,
+    fetch_status_counts,
+    general_stats_from_counts,
+    level_stats_from_counts,
+)
 from backend.schemas import GeneralStats, LevelStats
 from backend.utils.cache import cache
 from backend.utils.logging_setup import format_range
@@ -23,6 +28,43 @@ logger = logging.getLogger(__name__)
 
 # TTL explícito para set de cache
 CACHE_TTL_SEC = int(os.getenv("CACHE_TTL_SEC", "300"))
+# Janela em que o último valor bom ainda é servido (revalidação em segundo plano / GLPI fora)
+CACHE_STALE_TTL_SEC = int(os.getenv("CACHE_STALE_TTL_SEC", "3600"))
+
+# Conjunto de status da chave de métricas gerais, em ordem conhecida
+STATUS_PART = ",".join(
+    [
+        str(STATUS["NEW"]),
+        str(STATUS["ASSIGNED"]),
+        str(STATUS["PLANNED"]),
+        str(STATUS["IN_PROGRESS"]),
+        str(STATUS["SOLVED"]),
+        str(STATUS["CLOSED"]),
+    ]
+)
+
+
+def status_counts_cache_key(inicio: str | None, fim: str | None) -> str:
+    """Matriz de contagens status × nível compartilhada por /status-niveis e /metrics-gerais."""
+    return f"status-contagens|inicio={inicio or ''}|fim={fim or ''}|status={STATUS_PART}"
+
+
+async def load_status_counts(
+    api_url: str,
+    app_token: str,
+    user_token: str,
+    inicio: str | None,
+    fim: str | None,
+) -> StatusCounts:
+    """Obtém a matriz de contagens no GLPI (usado pelos endpoints e pelo pré-aquecimento)."""
+    headers = await glpi_client.authenticate(api_url, app_token, user_token)
+    return await fetch_status_counts(
+        api_url=api_url,
+        session_headers=headers,
+        inicio=inicio,
+        fim=fim,
+    )
+
 
 @router.get(
     "/status-niveis",
@@ -30,6 +72,7 @@ CACHE_TTL_SEC = int(os.getenv("CACHE_TTL_SEC", "300"))
     summary="Obtém contagem de tickets por nível de atendimento",
 )
 async def get_level_stats_endpoint(
+    response: Response,
     inicio: str | None = Query(default=None, description="Data inicial no formato YYYY-MM-DD"),
     fim: str | None = Query(default=None, description="Data final no formato YYYY-MM-DD"),
 ):
@@ -37,21 +80,7 @@ async def get_level_stats_endpoint(
     Endpoint para obter uma contagem de tickets para cada nível de suporte (N1, N2, N3, N4).
     """
     # Definir chave de cache ANTES de qualquer uso
-    key = f"status-niveis|inicio={inicio or ''}|fim={fim or ''}"
-    cached = cache.get(key)
-    if cached is not None:
-        logger.info(
-            "cache_hit=true endpoint=/status-niveis itemtype=Ticket range=%s key=%s",
-            format_range(inicio, fim),
-            key,
-        )
-        return cached
-    logger.info(
-        "cache_hit=false endpoint=/status-niveis itemtype=Ticket range=%s key=%s",
-        format_range(inicio, fim),
-        key,
-    )
-
+    key = status_counts_cache_key(inicio, fim)
     API_URL = os.getenv("API_URL")
     APP_TOKEN = os.getenv("APP_TOKEN")
     USER_TOKEN = os.getenv("USER_TOKEN")
@@ -60,21 +89,23 @@ async def get_level_stats_endpoint(
         raise HTTPException(status_code=500, detail="Variáveis de ambiente da API não configuradas.")
 
     try:
-        headers = glpi_client.authenticate(API_URL, APP_TOKEN, USER_TOKEN)
-        level_data = generate_level_stats(
-            api_url=API_URL,
-            session_headers=headers,
-            inicio=inicio,
-            fim=fim,
+        # Stale-while-revalidate + coalescência de misses concorrentes da mesma chave
+        result = await cache.fetch(
+            key,
+            lambda: load_status_counts(API_URL, APP_TOKEN, USER_TOKEN, inicio, fim),
+            ttl=CACHE_TTL_SEC,
+            stale_ttl=CACHE_STALE_TTL_SEC,
         )
-        cache.set(key, level_data, ttl=CACHE_TTL_SEC)
+        response.headers.update(result.headers())
         logger.info(
-            "cache_set endpoint=/status-niveis itemtype=Ticket range=%s key=%s ttl=%s",
+            "cache_hit=%s cache_status=%s endpoint=/status-niveis itemtype=Ticket range=%s key=%s ttl=%s",
+            str(result.hit).lower(),
+            result.status,
             format_range(inicio, fim),
             key,
             CACHE_TTL_SEC,
         )
-        return level_data
+        return level_stats_from_counts(result.value)
     except GLPIAuthError as e:
         status = e.status_code or 401
         logger.warning("endpoint=/status-niveis itemtype=Ticket error=GLPIAuthError glpi_status=%s", status)
@@ -96,42 +127,17 @@ async def get_level_stats_endpoint(
     summary="Obtém estatísticas gerais de tickets",
 )
 async def get_general_stats_endpoint(
+    response: Response,
     inicio: str | None = Query(default=None, description="Data inicial no formato YYYY-MM-DD"),
     fim: str | None = Query(default=None, description="Data final no formato YYYY-MM-DD"),
 ):
     """
     Endpoint para obter uma contagem geral de tickets por status.
-    Os dados são derivados a partir dos dados detalhados por nível para garantir consistência.
+    Os dados são derivados da mesma matriz de contagens usada por /status-niveis
+    (linha sem filtro de nível), de modo que um refresh do dashboard faz um só fan-out.
     """
     # Definir chave de cache ANTES de qualquer uso
-    # Construir parte de status com base nos valores do dicionário STATUS em ordem conhecida
-    status_part = ",".join(
-        [
-            str(STATUS["NEW"]),
-            str(STATUS["ASSIGNED"]),
-            str(STATUS["PLANNED"]),
-            str(STATUS["IN_PROGRESS"]),
-            str(STATUS["SOLVED"]),
-            str(STATUS["CLOSED"]),
-        ]
-    )
-    key = f"metrics-gerais|inicio={inicio or ''}|fim={fim or ''}|status={status_part}"
-    cached = cache.get(key)
-    if cached is not None:
-        logger.info(
-            "cache_hit=true endpoint=/metrics-gerais itemtype=Ticket range=%s status_set=%s key=%s",
-            format_range(inicio, fim),
-            status_part,
-            key,
-        )
-        return cached
-    logger.info(
-        "cache_hit=false endpoint=/metrics-gerais itemtype=Ticket range=%s status_set=%s key=%s",
-        format_range(inicio, fim),
-        status_part,
-        key,
-    )
-
+    key = status_counts_cache_key(inicio, fim)
     API_URL = os.getenv("API_URL")
     APP_TOKEN = os.getenv("APP_TOKEN")
     USER_TOKEN = os.getenv("USER_TOKEN")
@@ -140,23 +146,24 @@ async def get_general_stats_endpoint(
         raise HTTPException(status_code=500, detail="Variáveis de ambiente da API não configuradas.")
 
     try:
-        headers = glpi_client.authenticate(API_URL, APP_TOKEN, USER_TOKEN)
-        # Contagem direta no GLPI por Status (FIELD_STATUS), com filtro opcional por intervalo de datas
-        general_stats = generate_general_stats(
-            api_url=API_URL,
-            session_headers=headers,
-            inicio=inicio,
-            fim=fim,
+        # Stale-while-revalidate + coalescência de misses concorrentes da mesma chave
+        result = await cache.fetch(
+            key,
+            lambda: load_status_counts(API_URL, APP_TOKEN, USER_TOKEN, inicio, fim),
+            ttl=CACHE_TTL_SEC,
+            stale_ttl=CACHE_STALE_TTL_SEC,
         )
-        cache.set(key, general_stats, ttl=CACHE_TTL_SEC)
+        response.headers.update(result.headers())
         logger.info(
-            "cache_set endpoint=/metrics-gerais itemtype=Ticket range=%s status_set=%s key=%s ttl=%s",
+            "cache_hit=%s cache_status=%s endpoint=/metrics-gerais itemtype=Ticket range=%s status_set=%s key=%s ttl=%s",
+            str(result.hit).lower(),
+            result.status,
             format_range(inicio, fim),
-            status_part,
+            STATUS_PART,
             key,
             CACHE_TTL_SEC,
         )
-        return general_stats
+        return general_stats_from_counts(result.value)
 
     except GLPIAuthError as e:
         status = e.status_code or 401
@@ -1,13 +1,18 @@
 import logging
 import os
-from typing import List
+from typing import Any, Dict, List
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Query, Response
 
 import backend.glpi_client as glpi_client
 from backend.logic.errors import GLPIAuthError, GLPINetworkError, GLPISearchError
-from backend.logic.tickets_logic import get_new_tickets
+from backend.logic.tickets_logic import (
+    NEW_TICKETS_DEFAULT_LIMIT,
+    NEW_TICKETS_MAX_LIMIT,
+    get_new_tickets,
+)
 from backend.schemas import NewTicketItem
+from backend.utils.cache import cache
 
 # Cria um novo roteador
 router = APIRouter(
@@ -17,15 +22,39 @@ router = APIRouter(
 
 logger = logging.getLogger(__name__)
 
+# Tickets novos mudam com frequência: TTL próprio, mais curto que o das métricas
+TICKETS_CACHE_TTL_SEC = int(os.getenv("TICKETS_CACHE_TTL_SEC", "30"))
+CACHE_STALE_TTL_SEC = int(os.getenv("CACHE_STALE_TTL_SEC", "3600"))
+
+
+def new_tickets_cache_key(limit: int = NEW_TICKETS_DEFAULT_LIMIT) -> str:
+    return f"tickets-novos|limit={limit}"
+
+
+async def load_new_tickets(
+    api_url: str, app_token: str, user_token: str, limit: int = NEW_TICKETS_DEFAULT_LIMIT
+) -> List[Dict[str, Any]]:
+    """Busca os tickets novos no GLPI (usado pelo endpoint e pelo pré-aquecimento)."""
+    headers = await glpi_client.authenticate(api_url, app_token, user_token)
+    return await get_new_tickets(api_url=api_url, session_headers=headers, limit=limit)
+
 
 @router.get(
     "/tickets-novos",
     response_model=List[NewTicketItem],
-    summary="Lista os 10 tickets mais recentes com status 'Novo'",
+    summary="Lista os tickets mais recentes com status 'Novo' (10 por padrão)",
 )
-async def get_new_tickets_endpoint():
+async def get_new_tickets_endpoint(
+    response: Response,
+    limite: int = Query(
+        default=NEW_TICKETS_DEFAULT_LIMIT,
+        ge=1,
+        le=NEW_TICKETS_MAX_LIMIT,
+        description="Quantidade de tickets retornados",
+    ),
+):
     """
-    Endpoint para obter uma lista dos 10 tickets mais recentes com status 'Novo'.
+    Endpoint para obter uma lista dos tickets mais recentes com status 'Novo'.
     """
     API_URL = os.getenv("API_URL")
     APP_TOKEN = os.getenv("APP_TOKEN")
@@ -35,9 +64,21 @@ async def get_new_tickets_endpoint():
         raise HTTPException(status_code=500, detail="Variáveis de ambiente da API não configuradas.")
 
     try:
-        headers = glpi_client.authenticate(API_URL, APP_TOKEN, USER_TOKEN)
-        tickets_data = get_new_tickets(api_url=API_URL, session_headers=headers)
-        logger.info("endpoint=/tickets-novos itemtype=Ticket count=%s", len(tickets_data))
+        result = await cache.fetch(
+            new_tickets_cache_key(limite),
+            lambda: load_new_tickets(API_URL, APP_TOKEN, USER_TOKEN, limite),
+            ttl=TICKETS_CACHE_TTL_SEC,
+            stale_ttl=CACHE_STALE_TTL_SEC,
+        )
+        response.headers.update(result.headers())
+        tickets_data = result.value
+        logger.info(
+            "cache_hit=%s cache_status=%s endpoint=/tickets-novos itemtype=Ticket limit=%s count=%s",
+            str(result.hit).lower(),
+            result.status,
+            limite,
+            len(tickets_data),
+        )
         return tickets_data
     except GLPIAuthError as e:
         status = e.status_code or 401
@@ -0,0 +1,5 @@
+"""
+Benchmarks locais do backend contra um GLPI simulado (ver README do backend).
+- fake_glpi: servidor GLPI falso com dados sintéticos, latência e erros injetáveis;
+- harness: mede os endpoints a frio e sob pollers concorrentes e salva os resultados.
+"""
@@ -0,0 +1,368 @@
+"""
+Servidor GLPI simulado para benchmarks locais.
+Implementa o subconjunto da API REST usado pelo backend — initSession, killSession,
+changeActiveEntities, search/Ticket e search/User (criteria, range, totalcount,
+sort/order, forcedisplay) e User/{id} — sobre um conjunto sintético de tickets e
+usuários de tamanho configurável. Latência (fixa + jitter + custo por linha devolvida)
+e taxa de erros 503 são injetáveis, inclusive em execução via POST /_bench/config;
+os contadores de chamadas por operação ficam em GET /_bench/stats.
+
+Uso avulso:
+    python -m backend.bench.fake_glpi --tickets 20000 --latency-ms 80 --port 8765
+"""
+import argparse
+import asyncio
+from collections import Counter, OrderedDict
+from datetime import datetime, timedelta
+import multiprocessing
+import random
+import socket
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+# Grupo pai dos técnicos (mesmo padrão de RANKING_TECHNICIAN_PARENT_GROUP_ID) e subgrupos
+TECH_PARENT_GROUP_ID = 17
+TECH_SUBGROUPS = [18, 19, 20, 21]
+OTHER_GROUP_ID = 30
+LEVELS = ["N1 - Suporte", "N2 - Infraestrutura", "N3 - Sistemas", "N4 - Gestão"]
+# Distribuição de status (1 Novo .. 6 Fechado)
+STATUS_WEIGHTS = {1: 8, 2: 12, 3: 6, 4: 10, 5: 24, 6: 40}
+DEFAULT_RANGE = "0-49"
+FILTER_CACHE_SIZE = 256
+
+
+class FakeConfig(NamedTuple):
+    tickets: int = 5000
+    users: int = 120
+    technicians: int = 40
+    days: int = 365
+    seed: int = 42
+    latency_ms: float = 20.0
+    jitter_ms: float = 10.0
+    # Custo adicional por linha devolvida (páginas grandes custam mais ao GLPI)
+    row_cost_ms: float = 0.02
+    error_rate: float = 0.0
+
+
+def _fmt(value: datetime) -> str:
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def build_dataset(config: FakeConfig) -> Tuple[List[Dict[str, Any]], Dict[int, Dict[str, Any]]]:
+    """Tickets (chaves = IDs de campo do GLPI) e usuários, determinísticos pela `seed`."""
+    rng = random.Random(config.seed)
+    users: Dict[int, Dict[str, Any]] = {}
+    for uid in range(2, config.users + 2):
+        is_tech = uid < config.technicians + 2
+        users[uid] = {
+            "id": uid,
+            "firstname": f"Nome{uid}",
+            "realname": f"Sobrenome{uid}",
+            "is_active": 0 if uid % 13 == 0 else 1,
+            "groups": [TECH_SUBGROUPS[uid % len(TECH_SUBGROUPS)]] if is_tech else [OTHER_GROUP_ID],
+        }
+    techs = [uid for uid, user in users.items() if user["groups"][0] in TECH_SUBGROUPS]
+    now = datetime.now().replace(microsecond=0)
+    start = now - timedelta(days=config.days)
+    statuses, weights = list(STATUS_WEIGHTS), list(STATUS_WEIGHTS.values())
+    tickets = []
+    for _ in range(config.tickets):
+        created = start + timedelta(seconds=rng.randint(0, config.days * 86400))
+        tickets.append({
+            "1": "",
+            "12": rng.choices(statuses, weights)[0],
+            "8": rng.choice(LEVELS + [None]),
+            "5": rng.sample(techs, rng.choice([0, 1, 1, 1, 2])) if techs else [],
+            "4": rng.choice(list(users)),
+            "15": _fmt(created),
+            "19": _fmt(min(now, created + timedelta(hours=rng.randint(0, 72)))),
+        })
+    # IDs crescentes com a data de criação, como no GLPI
+    tickets.sort(key=lambda t: t["15"])
+    for tid, ticket in enumerate(tickets, start=1):
+        ticket["2"] = tid
+        ticket["1"] = f"Chamado {tid}"
+    return tickets, users
+
+
+def parse_criteria(request: Request) -> List[Dict[str, str]]:
+    """criteria[i][campo]=valor da query string em lista ordenada por i."""
+    criteria: Dict[int, Dict[str, str]] = {}
+    for key, value in request.query_params.multi_items():
+        if key.startswith("criteria["):
+            parts = key.replace("]", "").split("[")
+            criteria.setdefault(int(parts[1]), {})[parts[2]] = value
+    return [criteria[i] for i in sorted(criteria)]
+
+
+def _match_user(user: Dict[str, Any], field: str, searchtype: str, value: str) -> bool:
+    if field == "13":
+        groups = [str(g) for g in user["groups"]]
+        if searchtype == "under" and value == str(TECH_PARENT_GROUP_ID):
+            return any(g in map(str, [TECH_PARENT_GROUP_ID] + TECH_SUBGROUPS) for g in groups)
+        return value in groups
+    if field == "8":
+        return str(user["is_active"]) == value
+    if field == "2":
+        return str(user["id"]) == value
+    return True
+
+
+def _match_ticket(ticket: Dict[str, Any], field: str, searchtype: str, value: str) -> bool:
+    current = ticket.get("5" if field == "users_id_assign" else field)
+    if searchtype == "contains":
+        return current is not None and value.lower() in str(current).lower()
+    if searchtype == "equals":
+        if isinstance(current, list):
+            return value in map(str, current)
+        return str(current) == value
+    if searchtype == "morethan":
+        return current is not None and str(current) >= value
+    if searchtype == "lessthan":
+        return current is not None and str(current) <= value
+    return True
+
+
+def matches(item: Dict[str, Any], criteria: List[Dict[str, str]], itemtype: str) -> bool:
+    """Avalia os critérios em sequência, com o `link` (AND/OR) de cada um, como o GLPI."""
+    match_one = _match_user if itemtype == "User" else _match_ticket
+    result: Optional[bool] = None
+    for criterion in criteria:
+        matched = match_one(
+            item, str(criterion.get("field")), criterion.get("searchtype", ""), str(criterion.get("value", ""))
+        )
+        if result is None:
+            result = matched
+        elif criterion.get("link", "AND").upper() == "OR":
+            result = result or matched
+        else:
+            result = result and matched
+    return True if result is None else result
+
+
+class FakeGLPI:
+    """Estado do servidor: dados, sessões, configuração corrente e contadores."""
+
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.tickets, self.users = build_dataset(config)
+        self.sessions: set = set()
+        self.calls: Counter = Counter()
+        self.errors: Counter = Counter()
+        self.rows_returned = 0
+        self._rng = random.Random(config.seed + 1)
+        # (itemtype, critérios, sort, order) -> itens filtrados; páginas da mesma busca reaproveitam
+        self._filtered: "OrderedDict[Tuple, List[Dict[str, Any]]]" = OrderedDict()
+
+    async def delay(self, rows: int = 0) -> None:
+        cfg = self.config
+        await asyncio.sleep((cfg.latency_ms + self._rng.uniform(0, cfg.jitter_ms) + cfg.row_cost_ms * rows) / 1000)
+
+    def fail(self, operation: str) -> bool:
+        if self.config.error_rate > 0 and self._rng.random() < self.config.error_rate:
+            self.errors[operation] += 1
+            return True
+        return False
+
+    def search(self, itemtype: str, criteria: List[Dict[str, str]], sort: Optional[str], order: str) -> List[Any]:
+        key = (itemtype, tuple(tuple(sorted(c.items())) for c in criteria), sort, order)
+        found = self._filtered.get(key)
+        if found is not None:
+            self._filtered.move_to_end(key)
+            return found
+        items = self.tickets if itemtype == "Ticket" else list(self.users.values())
+        found = [item for item in items if matches(item, criteria, itemtype)]
+        if sort:
+            field = sort if itemtype == "Ticket" else "id"
+            found.sort(key=lambda item: (item.get(field) is None, item.get(field)), reverse=order == "DESC")
+        self._filtered[key] = found
+        if len(self._filtered) > FILTER_CACHE_SIZE:
+            self._filtered.popitem(last=False)
+        return found
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": dict(self.calls),
+            "errors": dict(self.errors),
+            "total_calls": sum(self.calls.values()),
+            "rows_returned": self.rows_returned,
+            "config": self.config._asdict(),
+        }
+
+    def reset(self) -> None:
+        self.calls.clear()
+        self.errors.clear()
+        self.rows_returned = 0
+
+
+def _row(itemtype: str, item: Dict[str, Any], columns: List[str]) -> Dict[str, Any]:
+    if itemtype == "User":
+        return {"2": item["id"], "1": f"user{item['id']}", "9": item["firstname"], "34": item["realname"]}
+    row = {col: item.get(col) for col in columns}
+    techs = row.get("5")
+    if isinstance(techs, list):
+        # GLPI devolve valor simples para um único técnico e null para nenhum
+        row["5"] = techs[0] if len(techs) == 1 else (techs or None)
+    return row
+
+
+def create_app(fake: FakeGLPI) -> FastAPI:
+    app = FastAPI(title="GLPI simulado (benchmark)")
+    unauthorized = ["ERROR_SESSION_TOKEN_INVALID", "session_token seems invalid"]
+
+    def authorized(request: Request) -> bool:
+        return request.headers.get("Session-Token") in fake.sessions
+
+    def unavailable() -> JSONResponse:
+        return JSONResponse(["ERROR", "Serviço indisponível (injetado)"], status_code=503)
+
+    @app.get("/apirest.php/initSession")
+    async def init_session():
+        fake.calls["initSession"] += 1
+        await fake.delay()
+        if fake.fail("initSession"):
+            return unavailable()
+        token = uuid.uuid4().hex
+        fake.sessions.add(token)
+        return {"session_token": token}
+
+    @app.get("/apirest.php/killSession")
+    async def kill_session(request: Request):
+        fake.calls["killSession"] += 1
+        fake.sessions.discard(request.headers.get("Session-Token"))
+        return {}
+
+    @app.post("/apirest.php/changeActiveEntities")
+    async def change_active_entities(request: Request):
+        fake.calls["changeActiveEntities"] += 1
+        if not authorized(request):
+            return JSONResponse(unauthorized, status_code=401)
+        await fake.delay()
+        return {}
+
+    @app.get("/apirest.php/User/{user_id}")
+    async def get_user(user_id: int, request: Request):
+        fake.calls["User/{id}"] += 1
+        if not authorized(request):
+            return JSONResponse(unauthorized, status_code=401)
+        await fake.delay(1)
+        if fake.fail("User/{id}"):
+            return unavailable()
+        user = fake.users.get(user_id)
+        if user is None:
+            return JSONResponse(["ERROR_ITEM_NOT_FOUND", "Item não encontrado"], status_code=404)
+        return {"id": user_id, "firstname": user["firstname"], "realname": user["realname"]}
+
+    @app.get("/apirest.php/search/{itemtype}")
+    async def search(itemtype: str, request: Request):
+        params = request.query_params
+        operation = f"search/{itemtype}" + (":count" if params.get("range") == "0-0" else "")
+        fake.calls[operation] += 1
+        if not authorized(request):
+            return JSONResponse(unauthorized, status_code=401)
+        if itemtype not in ("Ticket", "User"):
+            return JSONResponse(["ERROR_ITEMTYPE_NOT_FOUND"], status_code=400)
+        found = fake.search(itemtype, parse_criteria(request), params.get("sort"), params.get("order", "ASC").upper())
+        start, end = (int(x) for x in params.get("range", DEFAULT_RANGE).split("-"))
+        total = len(found)
+        if total and start >= total:
+            await fake.delay()
+            return JSONResponse(["ERROR_RANGE_EXCEED_TOTAL", "Range além do total"], status_code=400)
+        page = found[start:end + 1]
+        await fake.delay(len(page))
+        if fake.fail(operation):
+            return unavailable()
+        columns = sorted({"1", "2", "12", "15"} | {v for k, v in params.multi_items() if k.startswith("forcedisplay")})
+        rows = [_row(itemtype, item, columns) for item in page]
+        fake.rows_returned += len(rows)
+        return JSONResponse(
+            {"totalcount": total, "count": len(rows), "data": rows},
+            status_code=206 if len(page) < total else 200,
+        )
+
+    @app.get("/_bench/stats")
+    async def bench_stats():
+        return fake.stats()
+
+    @app.post("/_bench/reset")
+    async def bench_reset():
+        fake.reset()
+        return fake.stats()
+
+    @app.post("/_bench/config")
+    async def bench_config(request: Request):
+        """Altera latência/erros em execução (os dados sintéticos não mudam)."""
+        changes = await request.json()
+        allowed = {"latency_ms", "jitter_ms", "row_cost_ms", "error_rate"}
+        fake.config = fake.config._replace(**{k: float(v) for k, v in changes.items() if k in allowed})
+        return fake.stats()
+
+    return app
+
+
+def run(config: FakeConfig, host: str = "127.0.0.1", port: int = 8765) -> None:
+    """Executa o servidor em primeiro plano (bloqueante)."""
+    import uvicorn
+
+    uvicorn.run(create_app(FakeGLPI(config)), host=host, port=port, log_level="warning")
+
+
+def free_port(host: str = "127.0.0.1") -> int:
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        return sock.getsockname()[1]
+
+
+def start_process(config: FakeConfig, host: str = "127.0.0.1", port: int = 0, timeout: float = 60.0):
+    """
+    Sobe o servidor em um processo separado (para não disputar o event loop nem o GIL
+    com o backend medido). Retorna (processo, URL base da API, com /apirest.php).
+    """
+    import httpx
+
+    port = port or free_port(host)
+    process = multiprocessing.get_context("spawn").Process(target=run, args=(config, host, port), daemon=True)
+    process.start()
+    base = f"http://{host}:{port}"
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            httpx.get(f"{base}/_bench/stats", timeout=1.0).raise_for_status()
+            return process, f"{base}/apirest.php"
+        except httpx.HTTPError:
+            if not process.is_alive():
+                break
+            time.sleep(0.1)
+    process.terminate()
+    raise RuntimeError("GLPI simulado não respondeu a tempo")
+
+
+def config_arguments(parser: argparse.ArgumentParser) -> None:
+    """Argumentos de linha de comando do dataset e da latência/erros injetados."""
+    defaults = FakeConfig()
+    parser.add_argument("--tickets", type=int, default=defaults.tickets)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--technicians", type=int, default=defaults.technicians)
+    parser.add_argument("--days", type=int, default=defaults.days, help="Dias cobertos pelos tickets (até hoje)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--latency-ms", type=float, default=defaults.latency_ms)
+    parser.add_argument("--jitter-ms", type=float, default=defaults.jitter_ms)
+    parser.add_argument("--row-cost-ms", type=float, default=defaults.row_cost_ms)
+    parser.add_argument("--error-rate", type=float, default=defaults.error_rate, help="Fração de respostas 503")
+
+
+def config_from_args(args: argparse.Namespace) -> FakeConfig:
+    return FakeConfig(**{field: getattr(args, field) for field in FakeConfig._fields})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    config_arguments(parser)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    run(config_from_args(args), args.host, args.port)
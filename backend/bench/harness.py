@@ -0,0 +1,353 @@
+"""
+Benchmark dos endpoints do dashboard contra o GLPI simulado (backend/bench/fake_glpi.py).
+
+Duas fases, ambas com a aplicação FastAPI em processo (httpx.ASGITransport) e o GLPI
+simulado em um processo separado:
+- frio: cada endpoint é chamado N vezes com cache e diretório de usuários vazios; mede
+  latência e quantas chamadas ao GLPI (por operação) uma visão custa do zero;
+- carga: P pollers concorrentes percorrem os endpoints por D segundos; mede latência
+  por endpoint (p50/p95/p99), erros, vazão e chamadas ao GLPI no período.
+
+Os resultados vão para backend/bench/results/<data>-<commit>.json (com commit, config
+e ambiente) para comparação entre commits com --compare.
+
+Uso (da raiz do repositório):
+    python -m backend.bench.harness --tickets 20000 --latency-ms 50 --pollers 8 --duration 30
+    python -m backend.bench.harness --compare backend/bench/results/<anterior>.json
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence
+
+import httpx
+
+from backend.bench.fake_glpi import config_arguments, config_from_args, start_process
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Ambiente do backend durante o benchmark (sobreposto por --env)
+BASE_ENV = {
+    "APP_TOKEN": "bench-app-token",
+    "USER_TOKEN": "bench-user-token",
+    # O pré-aquecimento faria chamadas ao GLPI fora das medições
+    "PREWARM_ENABLED": "0",
+    "USER_DIRECTORY_PATH": "",
+    "LOG_LEVEL": "WARNING",
+}
+
+
+class Endpoint(NamedTuple):
+    name: str
+    path: str
+
+
+def dashboard_endpoints(today: Optional[date] = None) -> List[Endpoint]:
+    """As visões do dashboard: período padrão e últimos 30 dias (como um filtro do usuário)."""
+    today = today or date.today()
+    period = f"inicio={(today - timedelta(days=29)).isoformat()}&fim={today.isoformat()}"
+    return [
+        Endpoint("tickets-novos", "/api/v1/tickets-novos"),
+        Endpoint("metrics-gerais", "/api/v1/metrics-gerais"),
+        Endpoint("status-niveis", "/api/v1/status-niveis"),
+        Endpoint("ranking-tecnicos", "/api/v1/ranking-tecnicos"),
+        Endpoint("metrics-gerais:30d", f"/api/v1/metrics-gerais?{period}"),
+        Endpoint("status-niveis:30d", f"/api/v1/status-niveis?{period}"),
+        Endpoint("ranking-tecnicos:30d", f"/api/v1/ranking-tecnicos?{period}"),
+    ]
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Percentil por posição mais próxima (0 sem amostras)."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies: Sequence[float], errors: int = 0) -> Dict[str, Any]:
+    """Latências em segundos -> resumo em ms."""
+    ms = [value * 1000 for value in latencies]
+    return {
+        "count": len(ms),
+        "errors": errors,
+        "mean_ms": round(sum(ms) / len(ms), 2) if ms else 0.0,
+        "p50_ms": round(percentile(ms, 50), 2),
+        "p95_ms": round(percentile(ms, 95), 2),
+        "p99_ms": round(percentile(ms, 99), 2),
+        "max_ms": round(max(ms), 2) if ms else 0.0,
+    }
+
+
+def git_meta() -> Dict[str, Any]:
+    def git(*args: str) -> str:
+        try:
+            return subprocess.run(
+                ["git", *args], cwd=REPO_DIR, capture_output=True, text=True, timeout=30, check=True
+            ).stdout.strip()
+        except (OSError, subprocess.SubprocessError):
+            return ""
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD") or "unknown",
+        "subject": git("log", "-1", "--format=%s"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+class GLPIStats:
+    """Leitura/zeramento dos contadores do GLPI simulado."""
+
+    def __init__(self, api_url: str):
+        self.base = api_url.rsplit("/apirest.php", 1)[0]
+        self.client = httpx.AsyncClient(base_url=self.base, timeout=10.0)
+
+    async def reset(self) -> None:
+        (await self.client.post("/_bench/reset")).raise_for_status()
+
+    async def calls(self) -> Dict[str, int]:
+        response = await self.client.get("/_bench/stats")
+        response.raise_for_status()
+        return response.json()["calls"]
+
+    async def aclose(self) -> None:
+        await self.client.aclose()
+
+
+def reset_backend_state() -> None:
+    """Esvazia caches em memória do backend para uma medição a frio."""
+    from backend.logic.user_directory import user_directory
+    from backend.utils.cache import cache
+
+    cache.clear()
+    user_directory.clear()
+
+
+async def run_cold(
+    client: httpx.AsyncClient, glpi: GLPIStats, endpoints: List[Endpoint], iterations: int
+) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    for endpoint in endpoints:
+        latencies: List[float] = []
+        errors = 0
+        calls: Dict[str, int] = {}
+        for _ in range(iterations):
+            reset_backend_state()
+            await glpi.reset()
+            started = time.perf_counter()
+            response = await client.get(endpoint.path)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+            for operation, count in (await glpi.calls()).items():
+                calls[operation] = calls.get(operation, 0) + count
+        per_request = {op: round(count / iterations, 1) for op, count in sorted(calls.items())}
+        results[endpoint.name] = {
+            **summarize(latencies, errors),
+            "glpi_calls": round(sum(calls.values()) / iterations, 1),
+            "glpi_calls_by_operation": per_request,
+        }
+    return results
+
+
+async def run_load(
+    client: httpx.AsyncClient,
+    glpi: GLPIStats,
+    endpoints: List[Endpoint],
+    pollers: int,
+    duration: float,
+    think_ms: float,
+) -> Dict[str, Any]:
+    """Pollers percorrem os endpoints em sequência (como o frontend) até o fim do período."""
+    latencies: Dict[str, List[float]] = {endpoint.name: [] for endpoint in endpoints}
+    errors: Dict[str, int] = {endpoint.name: 0 for endpoint in endpoints}
+    reset_backend_state()
+    await glpi.reset()
+    started = time.perf_counter()
+    stop_at = started + duration
+
+    async def poller(offset: int) -> None:
+        i = offset
+        while time.perf_counter() < stop_at:
+            endpoint = endpoints[i % len(endpoints)]
+            i += 1
+            t0 = time.perf_counter()
+            try:
+                response = await client.get(endpoint.path)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies[endpoint.name].append(time.perf_counter() - t0)
+            if failed:
+                errors[endpoint.name] += 1
+            # Sempre cede o event loop: com a resposta vinda do cache, a ida e volta pelo
+            # ASGITransport não suspende, e um poller monopolizaria o loop (os demais
+            # ficariam parados e as latências medidas seriam de espera, não do backend)
+            await asyncio.sleep(think_ms / 1000)
+
+    await asyncio.gather(*(poller(n) for n in range(pollers)))
+    elapsed = time.perf_counter() - started
+    calls = await glpi.calls()
+    total = sum(len(values) for values in latencies.values())
+    return {
+        "pollers": pollers,
+        "duration_s": round(elapsed, 2),
+        "requests": total,
+        "errors": sum(errors.values()),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "glpi_calls": sum(calls.values()),
+        "glpi_calls_per_request": round(sum(calls.values()) / total, 3) if total else 0.0,
+        "glpi_calls_by_operation": dict(sorted(calls.items())),
+        "all": summarize([value for values in latencies.values() for value in values], sum(errors.values())),
+        "endpoints": {name: summarize(values, errors[name]) for name, values in latencies.items()},
+    }
+
+
+def print_table(title: str, rows: Dict[str, Dict[str, Any]], extra: str = "") -> None:
+    print(f"\n{title}")
+    print(f"{'endpoint':<24}{'n':>6}{'err':>5}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}" + extra)
+    for name, row in rows.items():
+        line = (
+            f"{name:<24}{row['count']:>6}{row['errors']:>5}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+        if extra:
+            line += f"{row.get('glpi_calls', 0):>12}"
+        print(line)
+
+
+def print_report(result: Dict[str, Any]) -> None:
+    if result.get("cold"):
+        print_table("Frio (cache vazio)", result["cold"], extra=f"{'GLPI/req':>12}")
+    load = result.get("load")
+    if load:
+        print_table(f"Carga ({load['pollers']} pollers, {load['duration_s']}s)", load["endpoints"])
+        print(
+            f"vazão={load['throughput_rps']} req/s requisições={load['requests']} erros={load['errors']} "
+            f"chamadas_glpi={load['glpi_calls']} ({load['glpi_calls_per_request']}/req)"
+        )
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return f"{new:.1f}"
+    return f"{new:.1f} ({(new - old) / old * 100:+.0f}%)"
+
+
+def print_comparison(previous: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """p50/p95 e chamadas ao GLPI de cada endpoint em relação a um resultado anterior."""
+    print(f"\nComparação com {previous['meta']['commit']} ({previous['meta']['timestamp']})")
+    sections = [("frio", previous.get("cold") or {}, current.get("cold") or {})]
+    sections.append(("carga", (previous.get("load") or {}).get("endpoints", {}),
+                     (current.get("load") or {}).get("endpoints", {})))
+    for label, old_rows, new_rows in sections:
+        for name, new in new_rows.items():
+            old = old_rows.get(name)
+            if old is None:
+                continue
+            line = (
+                f"{label:<6}{name:<24}p50={_delta(old['p50_ms'], new['p50_ms']):<18}"
+                f"p95={_delta(old['p95_ms'], new['p95_ms']):<18}"
+            )
+            if "glpi_calls" in new:
+                line += f"glpi={_delta(old.get('glpi_calls', 0), new['glpi_calls'])}"
+            print(line)
+    old_load, new_load = previous.get("load"), current.get("load")
+    if old_load and new_load:
+        print(f"vazão={_delta(old_load['throughput_rps'], new_load['throughput_rps'])} req/s")
+
+
+async def run_benchmark(args: argparse.Namespace, api_url: str) -> Dict[str, Any]:
+    # Importado só depois de ajustar o ambiente: a configuração do backend é lida no import
+    from backend.main import app
+
+    endpoints = dashboard_endpoints()
+    if args.only:
+        endpoints = [endpoint for endpoint in endpoints if endpoint.name in args.only]
+    glpi = GLPIStats(api_url)
+    result: Dict[str, Any] = {}
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120.0) as client:
+                if args.cold_iterations > 0:
+                    result["cold"] = await run_cold(client, glpi, endpoints, args.cold_iterations)
+                if args.pollers > 0 and args.duration > 0:
+                    result["load"] = await run_load(
+                        client, glpi, endpoints, args.pollers, args.duration, args.think_ms
+                    )
+    finally:
+        await glpi.aclose()
+    return result
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    config_arguments(parser)
+    parser.add_argument("--cold-iterations", type=int, default=3, help="Repetições a frio por endpoint (0 pula)")
+    parser.add_argument("--pollers", type=int, default=4, help="Pollers concorrentes na fase de carga (0 pula)")
+    parser.add_argument("--duration", type=float, default=20.0, help="Duração da fase de carga (s)")
+    parser.add_argument("--think-ms", type=float, default=0.0, help="Pausa de cada poller entre requisições")
+    parser.add_argument("--only", action="append", help="Mede só este endpoint (repetível)")
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="CHAVE=VALOR",
+        help="Variável de ambiente do backend (ex.: RANKING_STRATEGY=bulk; repetível)",
+    )
+    parser.add_argument("--label", default="", help="Rótulo livre gravado no resultado")
+    parser.add_argument("--out", help="Arquivo de saída (padrão: backend/bench/results/<data>-<commit>.json)")
+    parser.add_argument("--no-save", action="store_true", help="Não grava o resultado")
+    parser.add_argument("--compare", help="Resultado anterior (JSON) para comparar")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    overrides = dict(item.split("=", 1) for item in args.env)
+    config = config_from_args(args)
+    print(f"Subindo GLPI simulado ({config.tickets} tickets, latência {config.latency_ms}ms)...", file=sys.stderr)
+    process, api_url = start_process(config)
+    try:
+        os.environ.update({**BASE_ENV, **overrides, "API_URL": api_url})
+        result = asyncio.run(run_benchmark(args, api_url))
+    finally:
+        process.terminate()
+        process.join(timeout=10)
+
+    meta = git_meta()
+    result = {
+        "meta": {
+            **meta,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "label": args.label,
+            "python": platform.python_version(),
+            "fake_glpi": config._asdict(),
+            "env": overrides,
+            "cold_iterations": args.cold_iterations,
+            "think_ms": args.think_ms,
+        },
+        **result,
+    }
+    print_report(result)
+    if not args.no_save:
+        path = args.out or os.path.join(
+            RESULTS_DIR, f"{datetime.now():%Y%m%d-%H%M%S}-{meta['commit']}{'-dirty' if meta['dirty'] else ''}.json"
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(result, handle, indent=2, ensure_ascii=False)
+        print(f"\nResultado salvo em {path}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            print_comparison(json.load(handle), result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
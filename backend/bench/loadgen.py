@@ -0,0 +1,387 @@
+"""
+Gerador de carga que reproduz N telas de dashboard (App.tsx) consultando o backend.
+
+Cada dashboard simulado faz o que o frontend faz: a cada intervalo de polling, um
+refresh com as 4 requisições em sequência (tickets-novos, metrics-gerais,
+status-niveis, ranking-tecnicos), pulando o tick se o refresh anterior ainda não
+terminou. Por padrão as telas usam o período padrão do frontend (últimos 30 dias);
+uma fração delas usa intervalos personalizados sorteados de um conjunto limitado.
+As telas começam defasadas ao longo do primeiro intervalo, como telas ligadas em
+momentos diferentes; "rajadas a frio" esvaziam os caches do backend e disparam um
+refresh simultâneo de todas as telas (reinício do container, deploy).
+
+Cenários são sequências de estágios, via linha de comando (um estágio) ou arquivo
+JSON (ver backend/bench/scenarios/). Por estágio são reportados p50/p95/p99 do
+refresh completo e de cada endpoint, taxa de erro, vazão e chamadas ao GLPI por
+refresh de dashboard. O resultado é gravado em backend/bench/results/ como no harness.
+
+Por padrão a aplicação roda em processo contra o GLPI simulado; com --target-url a
+carga vai para um backend já em execução (ex.: o container, apontado para
+`python -m backend.bench.fake_glpi`), e --glpi-url permite contar as chamadas ao GLPI.
+
+Uso (da raiz do repositório):
+    python -m backend.bench.loadgen --dashboards 40 --poll-interval 15 --duration 120 --custom-share 0.25
+    python -m backend.bench.loadgen --scenario backend/bench/scenarios/sala-monitoramento.json
+"""
+import argparse
+import asyncio
+from datetime import date, datetime, timedelta
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import httpx
+
+from backend.bench.fake_glpi import config_arguments, config_from_args, start_process
+from backend.bench.harness import (
+    BASE_ENV,
+    RESULTS_DIR,
+    GLPIStats,
+    git_meta,
+    reset_backend_state,
+    summarize,
+)
+
+# Ordem das requisições de um refresh no App.tsx
+REFRESH_ENDPOINTS = ["tickets-novos", "metrics-gerais", "status-niveis", "ranking-tecnicos"]
+# Período padrão do frontend: hoje e os 30 dias anteriores
+DEFAULT_RANGE_DAYS = 30
+
+
+class Stage(NamedTuple):
+    name: str = "carga"
+    dashboards: int = 10
+    poll_interval_sec: float = 15.0
+    duration_sec: float = 60.0
+    # Fração das telas com intervalo personalizado e quantos intervalos distintos existem
+    custom_range_share: float = 0.0
+    range_pool: int = 5
+    # Intervalo entre rajadas a frio (0 desabilita)
+    cold_burst_sec: float = 0.0
+    # Todas as telas começam juntas (em vez de defasadas ao longo do primeiro intervalo)
+    sync_start: bool = False
+
+
+class Dashboard(NamedTuple):
+    index: int
+    inicio: str
+    fim: str
+    custom: bool
+
+
+def default_range(today: date) -> Tuple[str, str]:
+    return (today - timedelta(days=DEFAULT_RANGE_DAYS)).isoformat(), today.isoformat()
+
+
+def custom_ranges(count: int, today: date, rng: random.Random) -> List[Tuple[str, str]]:
+    """Intervalos personalizados plausíveis: semana, mês corrente, mês anterior ou sorteados no último ano."""
+    first_of_month = today.replace(day=1)
+    previous_month_end = first_of_month - timedelta(days=1)
+    ranges = [
+        ((today - timedelta(days=6)).isoformat(), today.isoformat()),
+        (first_of_month.isoformat(), today.isoformat()),
+        (previous_month_end.replace(day=1).isoformat(), previous_month_end.isoformat()),
+    ]
+    while len(ranges) < count:
+        start = today - timedelta(days=rng.randint(1, 365))
+        end = min(today, start + timedelta(days=rng.choice([1, 7, 14, 30, 90])))
+        if (start.isoformat(), end.isoformat()) not in ranges:
+            ranges.append((start.isoformat(), end.isoformat()))
+    return ranges[:count]
+
+
+def build_dashboards(stage: Stage, rng: random.Random, today: Optional[date] = None) -> List[Dashboard]:
+    today = today or date.today()
+    pool = custom_ranges(max(stage.range_pool, 1), today, rng)
+    customs = round(stage.dashboards * stage.custom_range_share)
+    dashboards = []
+    for index in range(stage.dashboards):
+        custom = index < customs
+        inicio, fim = rng.choice(pool) if custom else default_range(today)
+        dashboards.append(Dashboard(index, inicio, fim, custom))
+    return dashboards
+
+
+def load_scenario(path: str) -> List[Stage]:
+    """Arquivo JSON com {"stages": [...]} (ou a lista diretamente); campos ausentes usam o padrão de Stage."""
+    with open(path, encoding="utf-8") as handle:
+        data = json.load(handle)
+    stages = data.get("stages", []) if isinstance(data, dict) else data
+    unknown = {key for stage in stages for key in stage} - set(Stage._fields)
+    if unknown:
+        raise ValueError(f"Campos desconhecidos no cenário: {', '.join(sorted(unknown))}")
+    return [Stage(**stage) for stage in stages]
+
+
+class StageRecorder:
+    """Amostras de um estágio: refreshes, requisições por endpoint e ticks pulados."""
+
+    def __init__(self) -> None:
+        self.refreshes: List[float] = []
+        self.failed_refreshes = 0
+        self.skipped_ticks = 0
+        self.requests: Dict[str, List[float]] = {name: [] for name in REFRESH_ENDPOINTS}
+        self.errors: Dict[str, int] = {name: 0 for name in REFRESH_ENDPOINTS}
+        self.bursts = 0
+
+
+async def refresh(client: httpx.AsyncClient, dashboard: Dashboard, recorder: StageRecorder) -> None:
+    """Um refresh do App.tsx: as 4 requisições em sequência; falhas não interrompem as seguintes."""
+    period = {"inicio": dashboard.inicio, "fim": dashboard.fim}
+    started = time.perf_counter()
+    failed = False
+    for name in REFRESH_ENDPOINTS:
+        t0 = time.perf_counter()
+        try:
+            response = await client.get(f"/api/v1/{name}", params=None if name == "tickets-novos" else period)
+            error = response.status_code >= 400
+        except httpx.HTTPError:
+            error = True
+        recorder.requests[name].append(time.perf_counter() - t0)
+        if error:
+            recorder.errors[name] += 1
+            failed = True
+    recorder.refreshes.append(time.perf_counter() - started)
+    if failed:
+        recorder.failed_refreshes += 1
+
+
+async def run_dashboard(
+    client: httpx.AsyncClient,
+    dashboard: Dashboard,
+    stage: Stage,
+    recorder: StageRecorder,
+    stop_at: float,
+    wake: asyncio.Event,
+    offset: float,
+) -> None:
+    """Agenda os ticks como o setInterval do frontend; um tick com refresh em andamento é pulado."""
+    loop = asyncio.get_running_loop()
+    in_flight: Optional[asyncio.Task] = None
+    next_tick = loop.time() + offset
+    while True:
+        try:
+            timeout = min(next_tick - loop.time(), stop_at - time.perf_counter())
+            await asyncio.wait_for(wake.wait(), timeout=max(0.0, timeout))
+            # Rajada a frio: refresh imediato; o próximo tick segue o intervalo normal
+            wake.clear()
+            woken = True
+        except asyncio.TimeoutError:
+            woken = False
+        if time.perf_counter() >= stop_at:
+            break
+        if not woken:
+            next_tick += stage.poll_interval_sec
+        if in_flight is not None and not in_flight.done():
+            recorder.skipped_ticks += 1
+        else:
+            in_flight = asyncio.create_task(refresh(client, dashboard, recorder))
+    if in_flight is not None:
+        await in_flight
+
+
+async def run_stage(
+    client: httpx.AsyncClient, glpi: Optional[GLPIStats], stage: Stage, rng: random.Random, in_process: bool
+) -> Dict[str, Any]:
+    dashboards = build_dashboards(stage, rng)
+    recorder = StageRecorder()
+    wakes = [asyncio.Event() for _ in dashboards]
+    if glpi is not None:
+        await glpi.reset()
+    started = time.perf_counter()
+    stop_at = started + stage.duration_sec
+
+    async def bursts() -> None:
+        while stage.cold_burst_sec > 0:
+            await asyncio.sleep(stage.cold_burst_sec)
+            if time.perf_counter() >= stop_at:
+                return
+            if in_process:
+                reset_backend_state()
+            recorder.bursts += 1
+            for wake in wakes:
+                wake.set()
+
+    offsets = [0.0 if stage.sync_start else rng.uniform(0, stage.poll_interval_sec) for _ in dashboards]
+    burst_task = asyncio.create_task(bursts())
+    try:
+        await asyncio.gather(*(
+            run_dashboard(client, dashboard, stage, recorder, stop_at, wake, offset)
+            for dashboard, wake, offset in zip(dashboards, wakes, offsets)
+        ))
+    finally:
+        burst_task.cancel()
+    elapsed = time.perf_counter() - started
+
+    calls: Dict[str, int] = await glpi.calls() if glpi is not None else {}
+    total_requests = sum(len(values) for values in recorder.requests.values())
+    total_errors = sum(recorder.errors.values())
+    refreshes = len(recorder.refreshes)
+    glpi_total = sum(calls.values())
+    return {
+        "stage": stage._asdict(),
+        "duration_s": round(elapsed, 2),
+        "custom_dashboards": sum(1 for dashboard in dashboards if dashboard.custom),
+        "distinct_ranges": len({(dashboard.inicio, dashboard.fim) for dashboard in dashboards}),
+        "refreshes": refreshes,
+        "failed_refreshes": recorder.failed_refreshes,
+        "skipped_ticks": recorder.skipped_ticks,
+        "cold_bursts": recorder.bursts,
+        "requests": total_requests,
+        "error_rate": round(total_errors / total_requests, 4) if total_requests else 0.0,
+        "throughput_rps": round(total_requests / elapsed, 2) if elapsed else 0.0,
+        "glpi_calls": glpi_total if glpi is not None else None,
+        "glpi_calls_per_refresh": round(glpi_total / refreshes, 2) if glpi is not None and refreshes else None,
+        "glpi_calls_by_operation": dict(sorted(calls.items())),
+        "refresh": summarize(recorder.refreshes, recorder.failed_refreshes),
+        "endpoints": {name: summarize(values, recorder.errors[name]) for name, values in recorder.requests.items()},
+    }
+
+
+def print_stage(result: Dict[str, Any]) -> None:
+    stage = result["stage"]
+    print(
+        f"\nEstágio {stage['name']}: {stage['dashboards']} telas, polling {stage['poll_interval_sec']}s, "
+        f"{result['custom_dashboards']} com intervalo personalizado ({result['distinct_ranges']} intervalos), "
+        f"{result['cold_bursts']} rajada(s) a frio, {result['duration_s']}s"
+    )
+    print(f"{'':<20}{'n':>7}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for name, row in [("refresh", result["refresh"]), *result["endpoints"].items()]:
+        print(
+            f"{name:<20}{row['count']:>7}{row['errors']:>6}{row['p50_ms']:>10.1f}"
+            f"{row['p95_ms']:>10.1f}{row['p99_ms']:>10.1f}{row['max_ms']:>10.1f}"
+        )
+    glpi = (
+        f"chamadas_glpi={result['glpi_calls']} ({result['glpi_calls_per_refresh']}/refresh)"
+        if result["glpi_calls"] is not None
+        else "chamadas_glpi=n/d"
+    )
+    print(
+        f"vazão={result['throughput_rps']} req/s taxa_erro={result['error_rate'] * 100:.2f}% "
+        f"ticks_pulados={result['skipped_ticks']} {glpi}"
+    )
+
+
+async def run_scenario(
+    stages: List[Stage], seed: int, target_url: Optional[str], glpi_url: Optional[str]
+) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    glpi = GLPIStats(glpi_url) if glpi_url else None
+    results = []
+    limits = httpx.Limits(max_connections=None, max_keepalive_connections=None)
+    try:
+        if target_url:
+            async with httpx.AsyncClient(base_url=target_url, timeout=120.0, limits=limits) as client:
+                for stage in stages:
+                    results.append(await run_stage(client, glpi, stage, rng, in_process=False))
+                    print_stage(results[-1])
+            return results
+
+        # Importado só depois de ajustar o ambiente: a configuração do backend é lida no import
+        from backend.main import app
+
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadgen", timeout=120.0) as client:
+                for stage in stages:
+                    results.append(await run_stage(client, glpi, stage, rng, in_process=True))
+                    print_stage(results[-1])
+    finally:
+        if glpi is not None:
+            await glpi.aclose()
+    return results
+
+
+def parse_args(argv: Optional[Sequence[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    config_arguments(parser)
+    defaults = Stage()
+    parser.add_argument("--scenario", help="Arquivo JSON com os estágios (ignora as opções de estágio abaixo)")
+    parser.add_argument("--dashboards", type=int, default=defaults.dashboards, help="Telas simuladas")
+    parser.add_argument("--poll-interval", type=float, default=defaults.poll_interval_sec, help="Intervalo (s)")
+    parser.add_argument("--duration", type=float, default=defaults.duration_sec, help="Duração do estágio (s)")
+    parser.add_argument("--custom-share", type=float, default=defaults.custom_range_share,
+                        help="Fração das telas com intervalo personalizado (0-1)")
+    parser.add_argument("--range-pool", type=int, default=defaults.range_pool,
+                        help="Quantidade de intervalos personalizados distintos")
+    parser.add_argument("--cold-burst", type=float, default=defaults.cold_burst_sec,
+                        help="Intervalo entre rajadas a frio (s; 0 desabilita)")
+    parser.add_argument("--sync-start", action="store_true", help="Todas as telas começam juntas")
+    parser.add_argument("--load-seed", type=int, default=7, help="Semente do sorteio de intervalos e defasagens")
+    parser.add_argument("--target-url", help="Backend já em execução (ex.: http://127.0.0.1:8000)")
+    parser.add_argument("--glpi-url", help="GLPI simulado do backend externo (ex.: http://127.0.0.1:8765/apirest.php)")
+    parser.add_argument(
+        "--env", action="append", default=[], metavar="CHAVE=VALOR",
+        help="Variável de ambiente do backend em processo (repetível)",
+    )
+    parser.add_argument("--label", default="", help="Rótulo livre gravado no resultado")
+    parser.add_argument("--out", help="Arquivo de saída (padrão: backend/bench/results/carga-<data>-<commit>.json)")
+    parser.add_argument("--no-save", action="store_true", help="Não grava o resultado")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = parse_args(argv)
+    if args.scenario:
+        stages = load_scenario(args.scenario)
+    else:
+        stages = [Stage(
+            dashboards=args.dashboards,
+            poll_interval_sec=args.poll_interval,
+            duration_sec=args.duration,
+            custom_range_share=args.custom_share,
+            range_pool=args.range_pool,
+            cold_burst_sec=args.cold_burst,
+            sync_start=args.sync_start,
+        )]
+    overrides = dict(item.split("=", 1) for item in args.env)
+    config = config_from_args(args)
+    process = None
+    glpi_url = args.glpi_url
+    if args.target_url:
+        if any(stage.cold_burst_sec for stage in stages):
+            print("Aviso: com --target-url as rajadas só sincronizam as telas (o cache remoto não é limpo)",
+                  file=sys.stderr)
+    else:
+        print(f"Subindo GLPI simulado ({config.tickets} tickets, latência {config.latency_ms}ms)...", file=sys.stderr)
+        process, glpi_url = start_process(config)
+        os.environ.update({**BASE_ENV, **overrides, "API_URL": glpi_url})
+    try:
+        stage_results = asyncio.run(run_scenario(stages, args.load_seed, args.target_url, glpi_url))
+    finally:
+        if process is not None:
+            process.terminate()
+            process.join(timeout=10)
+
+    meta = git_meta()
+    result = {
+        "meta": {
+            **meta,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "label": args.label,
+            "python": platform.python_version(),
+            "target": args.target_url or "in-process",
+            "fake_glpi": None if args.target_url else config._asdict(),
+            "env": overrides,
+            "scenario": args.scenario,
+        },
+        "stages": stage_results,
+    }
+    if not args.no_save:
+        path = args.out or os.path.join(
+            RESULTS_DIR,
+            f"carga-{datetime.now():%Y%m%d-%H%M%S}-{meta['commit']}{'-dirty' if meta['dirty'] else ''}.json",
+        )
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(result, handle, indent=2, ensure_ascii=False)
+        print(f"\nResultado salvo em {path}")
+    return 1 if any(stage["requests"] == 0 for stage in stage_results) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,122 +1,752 @@
 """
 Cliente GLPI
-Funções para autenticação, configuração de entidade e busca paginada,
-com cache simples de sessão para evitar reautenticação por requisição.
+Funções assíncronas para autenticação, configuração de entidade e busca paginada
+(em lista ou em streaming, página a página),
+com sessão gerenciada (login single-flight, renovação antecipada e killSession do
+token substituído) para evitar reautenticação por requisição.
+Todas as chamadas usam um único httpx.AsyncClient compartilhado pelo processo, com
+pool de conexões keep-alive configurável e estatísticas expostas em `pool_stats()`,
+de modo que os endpoints `async def` não bloqueiam o event loop. As requisições em voo
+por host seguem um limite adaptativo à latência e passam por um circuit breaker.
 Lança exceções específicas para que a camada de API mapeie respostas HTTP neutras.
 """
+import asyncio
+from collections import deque
+from contextlib import aclosing
+import logging
 import os
+import random
 import time
-from typing import Any, Dict, List, Optional
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
 
-import requests
+import httpx
 
 from backend.logic.errors import GLPIAuthError, GLPINetworkError, GLPISearchError
+from backend.utils.metrics import MetricFamily, current_route, detach_route, registry
+from backend.utils.resilience import (
+    AdaptiveLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    detach_budget,
+    remaining_budget,
+)
+from backend.utils.tracing import detach_trace, record_call, trace_phase
 
-# Cache leve de sessão (reuso de Session-Token por TTL curto)
-_SESSION_HEADERS: Optional[Dict[str, str]] = None
-_SESSION_TS: float = 0.0
+logger = logging.getLogger(__name__)
+
+# Sessão GLPI: TTL do token, antecedência da renovação em segundo plano e carência
+# antes de encerrar (killSession) o token substituído
 SESSION_TTL_SEC = int(os.environ.get("SESSION_TTL_SEC", "300"))
+SESSION_RENEW_MARGIN_SEC = int(os.environ.get("SESSION_RENEW_MARGIN_SEC", "30"))
+SESSION_KILL_GRACE_SEC = float(os.environ.get("SESSION_KILL_GRACE_SEC", "15"))
+
+# Timeouts (conexão, leitura) equivalentes aos usados anteriormente com requests
+DEFAULT_TIMEOUT = httpx.Timeout(6.0, connect=3.0)
+COUNT_TIMEOUT = httpx.Timeout(4.0, connect=2.0)
+
+# Concorrência máxima usada na resolução de nomes de usuários
+USER_LOOKUP_CONCURRENCY = 5
+
+# Busca paginada: páginas simultâneas após a primeira e novas tentativas por página
+SEARCH_PAGE_CONCURRENCY = int(os.environ.get("GLPI_SEARCH_PAGE_CONCURRENCY", "4"))
+SEARCH_PAGE_RETRIES = int(os.environ.get("GLPI_SEARCH_PAGE_RETRIES", "2"))
+
+# Novas tentativas de chamadas idempotentes (GET) em timeout, falha de rede ou 5xx,
+# com backoff exponencial e jitter completo; limitadas pelo prazo da requisição
+RETRY_MAX_ATTEMPTS = int(os.environ.get("GLPI_RETRY_MAX_ATTEMPTS", "3"))
+RETRY_BASE_DELAY_SEC = float(os.environ.get("GLPI_RETRY_BASE_DELAY_MS", "200")) / 1000
+RETRY_MAX_DELAY_SEC = float(os.environ.get("GLPI_RETRY_MAX_DELAY_MS", "2000")) / 1000
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# Pool de conexões HTTP do processo (configurável via ambiente)
+POOL_MAX_CONNECTIONS = int(os.environ.get("GLPI_POOL_MAX_CONNECTIONS", "20"))
+POOL_MAX_KEEPALIVE = int(os.environ.get("GLPI_POOL_MAX_KEEPALIVE", str(POOL_MAX_CONNECTIONS)))
+POOL_KEEPALIVE_EXPIRY_SEC = float(os.environ.get("GLPI_POOL_KEEPALIVE_EXPIRY_SEC", "30"))
+POOL_MAX_PER_HOST = int(os.environ.get("GLPI_POOL_MAX_PER_HOST", str(POOL_MAX_CONNECTIONS)))
+
+# Limite adaptativo (AIMD) de requisições em voo por host, entre o mínimo e GLPI_POOL_MAX_PER_HOST
+ADAPTIVE_CONCURRENCY = os.environ.get("GLPI_ADAPTIVE_CONCURRENCY", "1").lower() in ("1", "true", "yes")
+CONCURRENCY_MIN = int(os.environ.get("GLPI_CONCURRENCY_MIN", "2"))
+LATENCY_TARGET_SEC = float(os.environ.get("GLPI_LATENCY_TARGET_MS", "1500")) / 1000
+CONCURRENCY_BACKOFF = float(os.environ.get("GLPI_CONCURRENCY_BACKOFF", "0.7"))
 
+# Circuit breaker: falha rápida quando a taxa de erros recente passa do limiar
+BREAKER_ENABLED = os.environ.get("GLPI_BREAKER_ENABLED", "1").lower() in ("1", "true", "yes")
+BREAKER_WINDOW = int(os.environ.get("GLPI_BREAKER_WINDOW", "20"))
+BREAKER_MIN_CALLS = int(os.environ.get("GLPI_BREAKER_MIN_CALLS", "10"))
+BREAKER_FAILURE_RATIO = float(os.environ.get("GLPI_BREAKER_FAILURE_RATIO", "0.5"))
+BREAKER_OPEN_SEC = float(os.environ.get("GLPI_BREAKER_OPEN_SEC", "15"))
+
+T = TypeVar("T")
+
+
+class _ReleasingStream(httpx.AsyncByteStream):
+    """Corpo de resposta que libera a vaga do host quando é fechado."""
+
+    def __init__(self, stream: httpx.AsyncByteStream, release: Callable[[], None]):
+        self._stream = stream
+        self._release = release
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self) -> None:
+        try:
+            await self._stream.aclose()
+        finally:
+            self._release()
 
-def authenticate(api_url: str, app_token: str, user_token: str) -> Dict[str, str]:
+
+class PooledTransport(httpx.AsyncHTTPTransport):
     """
-    Autentica no GLPI e configura entidade ativa.
-    
-    Args:
-        api_url: URL da API GLPI (já incluindo /apirest.php)
-        app_token: Token da aplicação
-        user_token: Token do usuário
-        
+    Transporte httpx com limite adaptativo (AIMD) de requisições simultâneas por host e
+    contadores do pool. A latência até os headers e o resultado (timeout/5xx = falha)
+    de cada requisição ajustam o limite do host (ver AdaptiveLimiter).
+    - created/reused: detectados pelo evento de trace `connect_tcp` do httpcore
+      (se a requisição não abriu TCP, ela reutilizou uma conexão keep-alive).
+    - in_use/idle: lidos do pool do httpcore no momento da consulta.
+    """
+
+    def __init__(self, max_per_host: int, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.max_per_host = max_per_host
+        self._host_slots: Dict[str, AdaptiveLimiter] = {}
+        self.created = 0
+        self.reused = 0
+        self.requests = 0
+        self.waiting = 0
+
+    def _slot(self, host: str) -> AdaptiveLimiter:
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = AdaptiveLimiter(
+                self.max_per_host,
+                minimum=CONCURRENCY_MIN,
+                target_latency=LATENCY_TARGET_SEC,
+                backoff=CONCURRENCY_BACKOFF,
+                adaptive=ADAPTIVE_CONCURRENCY,
+            )
+        return slot
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        slot = self._slot(request.url.host)
+        self.waiting += 1
+        try:
+            await slot.acquire()
+        finally:
+            self.waiting -= 1
+
+        opened = False
+        previous_trace = request.extensions.get("trace")
+
+        async def trace(event_name: str, info: Dict[str, Any]) -> None:
+            nonlocal opened
+            if event_name.endswith("connect_tcp.started"):
+                opened = True
+            if previous_trace is not None:
+                await previous_trace(event_name, info)
+
+        request.extensions["trace"] = trace
+        released = False
+
+        def release() -> None:
+            nonlocal released
+            if not released:
+                released = True
+                slot.release()
+
+        started = time.perf_counter()
+        try:
+            response = await super().handle_async_request(request)
+        except (httpx.TimeoutException, httpx.TransportError):
+            slot.observe(time.perf_counter() - started, ok=False)
+            release()
+            raise
+        except BaseException:
+            release()
+            raise
+        finally:
+            self.requests += 1
+            if opened:
+                self.created += 1
+            else:
+                self.reused += 1
+        slot.observe(time.perf_counter() - started, ok=response.status_code < 500)
+        response.stream = _ReleasingStream(response.stream, release)
+        return response
+
+    def stats(self) -> Dict[str, Any]:
+        connections = list(getattr(self._pool, "connections", []))
+        idle = sum(1 for conn in connections if conn.is_idle())
+        return {
+            "max_connections": POOL_MAX_CONNECTIONS,
+            "max_keepalive": POOL_MAX_KEEPALIVE,
+            "keepalive_expiry_sec": POOL_KEEPALIVE_EXPIRY_SEC,
+            "max_per_host": self.max_per_host,
+            "open": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "waiting": self.waiting,
+            "concurrency": {host: slot.stats() for host, slot in self._host_slots.items()},
+            "created": self.created,
+            "reused": self.reused,
+            "requests": self.requests,
+        }
+
+
+# Cliente HTTP assíncrono compartilhado pelo processo (criado sob demanda)
+_CLIENT: Optional[httpx.AsyncClient] = None
+_TRANSPORT: Optional[PooledTransport] = None
+
+
+def get_client() -> httpx.AsyncClient:
+    """Retorna o httpx.AsyncClient compartilhado, criando-o na primeira chamada."""
+    global _CLIENT, _TRANSPORT
+    if _CLIENT is None or _CLIENT.is_closed:
+        _TRANSPORT = PooledTransport(
+            max_per_host=POOL_MAX_PER_HOST,
+            limits=httpx.Limits(
+                max_connections=POOL_MAX_CONNECTIONS,
+                max_keepalive_connections=POOL_MAX_KEEPALIVE,
+                keepalive_expiry=POOL_KEEPALIVE_EXPIRY_SEC,
+            ),
+        )
+        _CLIENT = httpx.AsyncClient(transport=_TRANSPORT, timeout=DEFAULT_TIMEOUT)
+    return _CLIENT
+
+
+async def close_client() -> None:
+    """Fecha o cliente compartilhado (usado no shutdown da aplicação)."""
+    global _CLIENT, _TRANSPORT
+    if _CLIENT is not None and not _CLIENT.is_closed:
+        await _CLIENT.aclose()
+    _CLIENT = None
+    _TRANSPORT = None
+
+
+# Circuit breaker do processo para as chamadas ao GLPI
+breaker = CircuitBreaker(
+    window=BREAKER_WINDOW,
+    min_calls=BREAKER_MIN_CALLS,
+    failure_ratio=BREAKER_FAILURE_RATIO,
+    open_sec=BREAKER_OPEN_SEC,
+    enabled=BREAKER_ENABLED,
+)
+
+
+GLPI_CALL_SECONDS = registry.histogram(
+    "glpi_request_duration_seconds",
+    "Latência das chamadas ao GLPI por operação e resultado (ok, http_4xx, http_5xx, timeout, network, "
+    "rejected, deadline, cancelled).",
+    ["operation", "outcome"],
+)
+GLPI_SECONDS_BY_ROUTE = registry.counter(
+    "dashboard_glpi_seconds_total",
+    "Tempo gasto em chamadas ao GLPI por caminho da API que as originou (background: "
+    "pré-aquecimento, espelho, revalidações e demais tarefas de fundo; shared: cálculos "
+    "compartilhados do single-flight).",
+    ["route"],
+)
+GLPI_RETRIES = registry.counter(
+    "glpi_retries_total", "Novas tentativas de chamadas ao GLPI por operação.", ["operation"]
+)
+
+
+def _operation(url: str, params: Optional[Dict[str, Any]]) -> str:
+    """
+    Rótulo de baixa cardinalidade da chamada: caminho após apirest.php com IDs
+    trocados por {id} (ex.: User/{id}); contagens range=0-0 viram "search/<tipo>:count".
+    """
+    path = httpx.URL(url).path.split("apirest.php", 1)[-1].strip("/")
+    operation = "/".join("{id}" if part.isdigit() else part for part in path.split("/"))
+    if operation.startswith("search/") and (params or {}).get("range") == "0-0":
+        operation += ":count"
+    return operation or "/"
+
+
+def pool_stats() -> Dict[str, Any]:
+    """Estatísticas do pool de conexões com o GLPI e do circuit breaker (para monitoramento)."""
+    get_client()
+    return {**_TRANSPORT.stats(), "breaker": breaker.stats()}
+
+
+BREAKER_STATES = ("closed", "half_open", "open")
+
+
+def _pool_metrics() -> Iterable[MetricFamily]:
+    """Saturação do pool, limite adaptativo por host e estado do circuit breaker (para /metrics)."""
+    families = [
+        MetricFamily("glpi_breaker_state", "gauge", "Estado do circuit breaker do GLPI (1 no estado atual).",
+                     [({"state": state}, float(breaker.state == state)) for state in BREAKER_STATES]),
+        MetricFamily("glpi_breaker_rejected_total", "counter", "Chamadas rejeitadas com o circuito aberto.",
+                     [({}, float(breaker.rejected))]),
+        MetricFamily("glpi_breaker_opened_total", "counter", "Aberturas do circuit breaker.",
+                     [({}, float(breaker.opened))]),
+    ]
+    if _TRANSPORT is None:
+        return families
+    stats = _TRANSPORT.stats()
+    families += [
+        MetricFamily(f"glpi_pool_connections_{name}", "gauge", f"Conexões do pool com o GLPI ({name}).",
+                     [({}, float(stats[name]))])
+        for name in ("open", "in_use", "idle")
+    ]
+    families += [
+        MetricFamily("glpi_pool_max_connections", "gauge", "Conexões máximas do pool com o GLPI.",
+                     [({}, float(stats["max_connections"]))]),
+        MetricFamily("glpi_pool_waiting", "gauge", "Requisições aguardando vaga no pool ou no limite por host.",
+                     [({}, float(stats["waiting"]))]),
+        MetricFamily("glpi_pool_connections_created_total", "counter", "Conexões abertas com o GLPI.",
+                     [({}, float(stats["created"]))]),
+        MetricFamily("glpi_pool_connections_reused_total", "counter", "Requisições em conexões reaproveitadas.",
+                     [({}, float(stats["reused"]))]),
+    ]
+    for name, help in (
+        ("limit", "Limite adaptativo de requisições em voo por host."),
+        ("in_flight", "Requisições em voo por host."),
+        ("waiting", "Requisições na fila do limite por host."),
+    ):
+        families.append(MetricFamily(
+            f"glpi_concurrency_{name}", "gauge", help,
+            [({"host": host}, float(limiter[name])) for host, limiter in stats["concurrency"].items()],
+        ))
+    return families
+
+
+registry.register_collector(_pool_metrics)
+
+
+async def _send(
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, Any]],
+    json: Any,
+    timeout: httpx.Timeout,
+) -> httpx.Response:
+    """
+    Uma chamada pelo cliente compartilhado, sob o circuit breaker (timeout, rede e 5xx
+    contam como falha) e com o timeout encurtado para caber no prazo da requisição.
+    """
+    operation = _operation(url, params)
+    budget = remaining_budget()
+    if budget is not None:
+        if budget <= 0:
+            GLPI_CALL_SECONDS.observe(0.0, operation=operation, outcome="deadline")
+            record_call(operation, time.perf_counter(), 0.0, "deadline")
+            raise DeadlineExceeded("Prazo da requisição esgotado antes da chamada ao GLPI")
+        timeout = _fit_timeout(timeout, budget)
+    if not breaker.allow():
+        GLPI_CALL_SECONDS.observe(0.0, operation=operation, outcome="rejected")
+        record_call(operation, time.perf_counter(), 0.0, "rejected")
+        raise CircuitOpenError("Circuit breaker do GLPI aberto")
+    generation = breaker.generation
+    ok: Optional[bool] = None
+    outcome = "cancelled"
+    started = time.perf_counter()
+    try:
+        response = await get_client().request(
+            method, url, headers=headers, params=params, json=json, timeout=timeout
+        )
+        ok = response.status_code < 500
+        outcome = "ok" if response.status_code < 400 else f"http_{response.status_code // 100}xx"
+        return response
+    except httpx.TimeoutException as e:
+        # Timeout causado pelo prazo (e não pelo GLPI) não conta contra o GLPI
+        left = remaining_budget()
+        if left is not None and left <= 0:
+            outcome = "deadline"
+            raise DeadlineExceeded("Prazo da requisição esgotado durante a chamada ao GLPI") from e
+        ok = False
+        outcome = "timeout"
+        raise
+    except httpx.TransportError:
+        ok = False
+        outcome = "network"
+        raise
+    finally:
+        breaker.record(ok, generation)
+        elapsed = time.perf_counter() - started
+        GLPI_CALL_SECONDS.observe(elapsed, operation=operation, outcome=outcome)
+        GLPI_SECONDS_BY_ROUTE.inc(elapsed, route=current_route())
+        record_call(operation, started, elapsed, outcome)
+
+
+def _fit_timeout(timeout: httpx.Timeout, budget: float) -> httpx.Timeout:
+    """Cada fase do timeout limitada ao tempo restante do prazo."""
+    def fit(value: Optional[float]) -> float:
+        return budget if value is None else min(value, budget)
+
+    return httpx.Timeout(
+        connect=fit(timeout.connect), read=fit(timeout.read), write=fit(timeout.write), pool=fit(timeout.pool)
+    )
+
+
+def _is_retryable(exc: Exception) -> bool:
+    """Falhas transitórias: timeout, rede e 5xx (prazo esgotado e circuito aberto não)."""
+    if isinstance(exc, (DeadlineExceeded, CircuitOpenError)):
+        return False
+    if isinstance(exc, httpx.HTTPStatusError):
+        return exc.response.status_code >= 500
+    return isinstance(exc, httpx.TransportError)
+
+
+def _retry_delay(attempt: int) -> float:
+    """Backoff exponencial com jitter completo: uniforme em [0, min(máx, base * 2^tentativa)]."""
+    return random.uniform(0, min(RETRY_MAX_DELAY_SEC, RETRY_BASE_DELAY_SEC * (2 ** attempt)))
+
+
+async def request(
+    method: str,
+    url: str,
+    *,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, Any]] = None,
+    json: Any = None,
+    timeout: httpx.Timeout = DEFAULT_TIMEOUT,
+    retries: Optional[int] = None,
+) -> httpx.Response:
+    """
+    Executa uma chamada HTTP ao GLPI pelo cliente compartilhado.
+    Chamadas idempotentes são repetidas até `retries` vezes (padrão
+    GLPI_RETRY_MAX_ATTEMPTS - 1; demais métodos, nenhuma) em timeout, falha de rede
+    ou 5xx, com backoff exponencial e jitter, desde que a espera caiba no prazo da
+    requisição (deadline_budget); esgotado o prazo, levanta DeadlineExceeded (um
+    httpx.TimeoutException). Com o circuit breaker aberto, falha na hora com
+    CircuitOpenError (um httpx.TransportError, mapeado pelos chamadores como falha de rede).
+    Um 401 com Session-Token gerenciado dispara uma reautenticação e uma única nova
+    tentativa com o token renovado.
+    Respostas 4xx/5xx levantam httpx.HTTPStatusError; o mapeamento para as exceções
+    de domínio fica a cargo de quem chama (mensagens específicas por contexto).
+    """
+    if retries is None:
+        retries = RETRY_MAX_ATTEMPTS - 1 if method.upper() in IDEMPOTENT_METHODS else 0
+    attempt = 0
+    while True:
+        try:
+            return await _request_once(method, url, headers, params, json, timeout)
+        except (httpx.HTTPStatusError, httpx.TransportError) as e:
+            if attempt >= retries or not _is_retryable(e):
+                raise
+            delay = _retry_delay(attempt)
+            budget = remaining_budget()
+            if budget is not None and delay >= budget:
+                raise
+            attempt += 1
+            GLPI_RETRIES.inc(operation=_operation(url, params))
+            logger.warning(
+                "glpi_retry method=%s path=%s attempt=%s delay_ms=%.0f error=%s",
+                method, httpx.URL(url).path, attempt, delay * 1000, type(e).__name__,
+            )
+            await asyncio.sleep(delay)
+
+
+async def _request_once(
+    method: str,
+    url: str,
+    headers: Dict[str, str],
+    params: Optional[Dict[str, Any]],
+    json: Any,
+    timeout: httpx.Timeout,
+) -> httpx.Response:
+    """Uma tentativa de `request()`, com a reautenticação em 401."""
+    response = await _send(method, url, headers, params, json, timeout)
+    if response.status_code == 401:
+        stale_token = headers.get('Session-Token')
+        manager = _TOKEN_OWNERS.get(stale_token) if stale_token else None
+        if manager is not None:
+            logger.warning("glpi_session=unauthorized action=reauthenticate")
+            new_headers = await manager.renew(stale_token)
+            headers = {**headers, 'Session-Token': new_headers['Session-Token']}
+            response = await _send(method, url, headers, params, json, timeout)
+    response.raise_for_status()
+    return response
+
+
+async def gather_limited(limit: int, aws: Iterable[Awaitable[T]]) -> List[T]:
+    """
+    asyncio.gather limitado por semáforo: no máximo `limit` corrotinas em voo.
+    Na primeira falha as demais são canceladas (corrotinas ainda não iniciadas são
+    fechadas), para não continuar consultando o GLPI por um resultado descartado.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def run(aw: Awaitable[T]) -> T:
+        try:
+            await semaphore.acquire()
+        except asyncio.CancelledError:
+            if asyncio.iscoroutine(aw):
+                aw.close()
+            raise
+        try:
+            return await aw
+        finally:
+            semaphore.release()
+
+    tasks = [asyncio.ensure_future(run(aw)) for aw in aws]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
+async def _init_session(api_url: str, app_token: str, user_token: str) -> Dict[str, str]:
+    """
+    Abre uma nova sessão no GLPI (initSession) e configura a entidade ativa.
+
     Returns:
         Headers com session-token para uso nas próximas requisições
     """
-    # Cache de sessão: reutiliza se ainda válido
-    global _SESSION_HEADERS, _SESSION_TS
-    if _SESSION_HEADERS and (time.time() - _SESSION_TS) < SESSION_TTL_SEC:
-        return _SESSION_HEADERS
-
     # Endpoint de autenticação
     auth_url = f"{api_url}/initSession"
-    
+
     # Headers para autenticação
     headers = {
         'Content-Type': 'application/json',
         'Authorization': f'user_token {user_token}',
         'App-Token': app_token
     }
-    
+
     try:
-        response = requests.get(auth_url, headers=headers, timeout=(3, 6))
-        response.raise_for_status()
-        
+        response = await request("GET", auth_url, headers=headers)
+
         auth_data = response.json()
         session_token = auth_data.get('session_token')
-        
+
         if not session_token:
             raise GLPIAuthError("Token de sessão não encontrado", status_code=401)
-        
+
         # Headers para próximas requisições
         session_headers = {
             'Content-Type': 'application/json',
             'Session-Token': session_token,
             'App-Token': app_token
         }
-        
+
         # Configurar entidade ativa (CENTRAL DE ATENDIMENTOS = 2, recursivo)
         change_entity_url = f"{api_url}/changeActiveEntities"
         entity_data = {
             'entities_id': 2,
             'is_recursive': True
         }
-        
-        entity_response = requests.post(change_entity_url, headers=session_headers, json=entity_data, timeout=(3, 6))
-        entity_response.raise_for_status()
-        # Atualiza cache de sessão
-        _SESSION_HEADERS = session_headers
-        _SESSION_TS = time.time()
 
+        await request("POST", change_entity_url, headers=session_headers, json=entity_data)
         return session_headers
-        
-    except requests.exceptions.Timeout:
+
+    except httpx.TimeoutException:
         raise GLPINetworkError("Timeout na autenticação/configuração de entidade", timeout=True)
-    except requests.exceptions.HTTPError as e:
-        status = getattr(e.response, 'status_code', None)
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
         if status in (401, 403):
             raise GLPIAuthError("Falha de autenticação GLPI", status_code=status)
         raise GLPISearchError(f"Erro HTTP na autenticação/configuração (status={status})", status_code=status)
-    except requests.exceptions.RequestException:
+    except httpx.RequestError:
         raise GLPINetworkError("Falha de rede na autenticação/configuração de entidade")
 
-def search_paginated(
-    headers: Dict[str, str], 
-    api_url: str, 
-    itemtype: str, 
-    criteria: Optional[List[Dict]] = None,
-    forcedisplay: Optional[List[str]] = None,
-    uid_cols: bool = True,
-    range_step: int = 1000
-) -> List[Dict[str, Any]]:
+
+async def _kill_session(api_url: str, session_headers: Dict[str, str], delay: float = 0.0) -> None:
+    """Encerra uma sessão substituída (best-effort), após aguardar `delay` segundos."""
+    detach_budget()
+    detach_trace()
+    detach_route()
+    if delay > 0:
+        await asyncio.sleep(delay)
+    try:
+        await request("GET", f"{api_url}/killSession", headers=session_headers)
+        logger.info("glpi_session=killed")
+    except (httpx.HTTPError, GLPIAuthError, GLPINetworkError, GLPISearchError) as e:
+        logger.warning("glpi_session=kill_failed error=%s", type(e).__name__)
+
+
+class GLPISessionManager:
     """
-    Busca paginada com suporte a grandes volumes de dados.
-    
+    Gerencia o Session-Token de um par (api_url, app_token, user_token).
+    - Logins concorrentes são coalescidos em uma única chamada em voo (single-flight).
+    - Ao entrar na janela de renovação (TTL - SESSION_RENEW_MARGIN_SEC), o token atual
+      continua sendo servido enquanto um novo é obtido em segundo plano.
+    - Um 401 no meio de uma requisição força uma renovação (uma vez por token).
+    - O token substituído é encerrado via killSession após um período de carência,
+      para que requisições ainda em voo com ele terminem normalmente.
+    """
+
+    def __init__(self, api_url: str, app_token: str, user_token: str):
+        self.api_url = api_url
+        self.app_token = app_token
+        self.user_token = user_token
+        self._headers: Optional[Dict[str, str]] = None
+        self._created_ts: float = 0.0
+        self._inflight: Optional[asyncio.Task] = None
+        # Tokens substituídos recentemente: um 401 com eles reaproveita o token atual
+        self._retired: Deque[str] = deque(maxlen=8)
+        self.logins = 0
+
+    @property
+    def token(self) -> Optional[str]:
+        return self._headers.get('Session-Token') if self._headers else None
+
+    def _age(self) -> float:
+        return time.time() - self._created_ts
+
+    async def get_headers(self) -> Dict[str, str]:
+        """Retorna headers válidos, renovando em segundo plano quando próximo da expiração."""
+        if self._headers is not None:
+            age = self._age()
+            if age < SESSION_TTL_SEC:
+                if age >= SESSION_TTL_SEC - SESSION_RENEW_MARGIN_SEC:
+                    self._start_login()
+                return self._headers
+        return await asyncio.shield(self._start_login())
+
+    async def renew(self, stale_token: Optional[str]) -> Dict[str, str]:
+        """
+        Força uma nova sessão após um 401 com `stale_token`. Se o token já foi
+        substituído por outra chamada, apenas devolve os headers atuais.
+        """
+        if self._headers is not None and self.token != stale_token:
+            return self._headers
+        return await asyncio.shield(self._start_login())
+
+    def _start_login(self) -> asyncio.Task:
+        if self._inflight is None or self._inflight.done():
+            self._inflight = asyncio.create_task(self._login())
+            self._inflight.add_done_callback(self._on_login_done)
+        return self._inflight
+
+    @staticmethod
+    def _on_login_done(task: asyncio.Task) -> None:
+        # Consome a exceção de renovações de fundo (quem aguarda recebe a mesma exceção)
+        if not task.cancelled() and task.exception() is not None:
+            logger.warning("glpi_session=login_failed error=%s", type(task.exception()).__name__)
+
+    async def _login(self) -> Dict[str, str]:
+        # O login é compartilhado por todos que aguardam: não herda o prazo de quem o iniciou
+        detach_budget()
+        with trace_phase("sessao"):
+            new_headers = await _init_session(self.api_url, self.app_token, self.user_token)
+        old_headers = self._headers
+        self._headers = new_headers
+        self._created_ts = time.time()
+        self.logins += 1
+        _TOKEN_OWNERS[new_headers['Session-Token']] = self
+        logger.info("glpi_session=renewed logins=%s", self.logins)
+        if old_headers is not None:
+            self._retire(old_headers['Session-Token'])
+            _spawn(_kill_session(self.api_url, old_headers, delay=SESSION_KILL_GRACE_SEC))
+        return new_headers
+
+    def _retire(self, token: str) -> None:
+        if len(self._retired) == self._retired.maxlen:
+            _TOKEN_OWNERS.pop(self._retired[0], None)
+        self._retired.append(token)
+
+    async def close(self) -> None:
+        """Encerra a sessão atual no GLPI (shutdown)."""
+        if self._inflight is not None and not self._inflight.done():
+            self._inflight.cancel()
+        for token in self._retired:
+            _TOKEN_OWNERS.pop(token, None)
+        self._retired.clear()
+        if self._headers is not None:
+            _TOKEN_OWNERS.pop(self.token, None)
+            await _kill_session(self.api_url, self._headers)
+            self._headers = None
+
+
+# Gerenciadores por credencial e índice token -> gerenciador (para reautenticar em 401)
+_MANAGERS: Dict[Tuple[str, str, str], GLPISessionManager] = {}
+_TOKEN_OWNERS: Dict[str, GLPISessionManager] = {}
+# Referências fortes para tarefas de fundo (killSession)
+_BACKGROUND_TASKS: Set[asyncio.Task] = set()
+
+
+def _spawn(coro: Awaitable[Any]) -> None:
+    task = asyncio.ensure_future(coro)
+    _BACKGROUND_TASKS.add(task)
+    task.add_done_callback(_BACKGROUND_TASKS.discard)
+
+
+def get_session_manager(api_url: str, app_token: str, user_token: str) -> GLPISessionManager:
+    key = (api_url, app_token, user_token)
+    manager = _MANAGERS.get(key)
+    if manager is None:
+        manager = _MANAGERS[key] = GLPISessionManager(api_url, app_token, user_token)
+    return manager
+
+
+async def close_sessions() -> None:
+    """Encerra todas as sessões abertas (usado no shutdown da aplicação)."""
+    for manager in list(_MANAGERS.values()):
+        await manager.close()
+    _MANAGERS.clear()
+
+
+async def authenticate(api_url: str, app_token: str, user_token: str) -> Dict[str, str]:
+    """
+    Autentica no GLPI e configura entidade ativa, reutilizando a sessão gerenciada.
+
     Args:
-        headers: Headers com session-token
-        api_url: URL base da API GLPI
-        itemtype: Tipo do item para busca
-        criteria: Critérios de filtro
-        forcedisplay: Campos a serem exibidos
-        uid_cols: Se deve usar uid_cols=1
-        range_step: Tamanho da página
-        
+        api_url: URL da API GLPI (já incluindo /apirest.php)
+        app_token: Token da aplicação
+        user_token: Token do usuário
+
     Returns:
-        Lista completa de registros encontrados
+        Headers com session-token para uso nas próximas requisições
     """
-    search_url = f"{api_url}/search/{itemtype}"
-    all_results = []
-    start = 0
-    
-    # Parâmetros base
-    params = {}
+    return await get_session_manager(api_url, app_token, user_token).get_headers()
+
+
+def _is_range_exceeded(response: httpx.Response) -> bool:
+    """GLPI responde 400 ERROR_RANGE_EXCEED_TOTAL quando a janela começa além do total."""
+    return response.status_code == 400 and "ERROR_RANGE_EXCEED_TOTAL" in response.text
+
+
+async def _fetch_page(
+    search_url: str,
+    headers: Dict[str, str],
+    params: Dict[str, Any],
+    start: int,
+    end: int,
+    retries: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Busca uma janela `range=start-end` da pesquisa. Falhas transitórias (timeout, rede,
+    5xx) são repetidas até `retries` vezes (ver `request()`); janela além do total vira
+    página vazia.
+    """
+    page_params = {**params, 'range': f"{start}-{end}"}
+    try:
+        response = await request("GET", search_url, headers=headers, params=page_params, retries=retries)
+        return response.json() or {}
+    except httpx.HTTPStatusError as e:
+        if _is_range_exceeded(e.response):
+            return {}
+        raise
+
+
+def _search_params(
+    criteria: Optional[List[Dict]] = None,
+    forcedisplay: Optional[List[str]] = None,
+    uid_cols: bool = True,
+) -> Dict[str, Any]:
+    """Parâmetros base de /search/<itemtype> (uid_cols, forcedisplay e criteria indexados)."""
+    params: Dict[str, Any] = {}
     if uid_cols:
         params['uid_cols'] = '1'
     if forcedisplay:
@@ -126,82 +756,223 @@ def search_paginated(
         for i, c in enumerate(criteria):
             for k, v in c.items():
                 params[f'criteria[{i}][{k}]'] = v
-    
+    return params
+
+
+async def iter_search_pages(
+    headers: Dict[str, str],
+    api_url: str,
+    itemtype: str,
+    criteria: Optional[List[Dict]] = None,
+    forcedisplay: Optional[List[str]] = None,
+    uid_cols: bool = True,
+    range_step: int = 1000,
+    concurrency: int = SEARCH_PAGE_CONCURRENCY,
+    page_retries: int = SEARCH_PAGE_RETRIES,
+) -> AsyncIterator[List[Dict[str, Any]]]:
+    """
+    Busca paginada em streaming: produz as linhas de cada página, na ordem, assim que
+    ela chega. A primeira página informa o `totalcount`; das janelas restantes no máximo
+    `concurrency` ficam em voo à frente do consumidor (memória limitada a essas páginas).
+    Com concurrency=1 a busca é sequencial. Ao fechar o iterador antes do fim, as
+    páginas pendentes são canceladas; use `contextlib.aclosing` ao interromper o laço.
+
+    Args: os mesmos de `search_paginated`.
+
+    Yields:
+        Lista de registros de cada página (nunca vazia)
+    """
+    search_url = f"{api_url}/search/{itemtype}"
+    params = _search_params(criteria, forcedisplay, uid_cols)
+    pending: Deque[asyncio.Future] = deque()
+
     try:
+        first = await _fetch_page(search_url, headers, params, 0, range_step - 1, page_retries)
+        rows: List[Dict[str, Any]] = list(first.get('data') or [])
+        totalcount = int(first.get('totalcount', 0) or 0)
+        if not rows:
+            return
+        fetched = len(rows)
+        yield rows
+        if fetched >= totalcount:
+            return
+
+        # O GLPI pode limitar o tamanho da página abaixo do pedido: usa o tamanho efetivo
+        step = min(range_step, fetched)
+
+        if concurrency <= 1:
+            start = fetched
+            while start < totalcount:
+                page = await _fetch_page(search_url, headers, params, start, start + step - 1, page_retries)
+                rows = page.get('data') or []
+                if not rows:
+                    break
+                yield rows
+                if len(rows) < step:
+                    break
+                start += step
+            return
+
+        starts = iter(range(fetched, totalcount, step))
         while True:
-            # Configurar range para paginação
-            current_params = params.copy()
-            current_params['range'] = f"{start}-{start + range_step - 1}"
-            
-            response = requests.get(search_url, headers=headers, params=current_params, timeout=(3, 6))
-            response.raise_for_status()
-            
-            data = response.json()
-            
-            # Verificar se há dados
-            if not data or 'data' not in data or not data['data']:
-                break
-                
-            all_results.extend(data['data'])
-            
-            # Verificar se chegou ao fim
-            totalcount = data.get('totalcount', 0)
-            if len(all_results) >= totalcount or len(data['data']) < range_step:
-                break
-                
-            start += range_step
-            
-        return all_results
-        
-    except requests.exceptions.Timeout:
+            for st in starts:
+                pending.append(asyncio.ensure_future(
+                    _fetch_page(search_url, headers, params, st, st + step - 1, page_retries)
+                ))
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                return
+            page = await pending.popleft()
+            rows = page.get('data') or []
+            if rows:
+                yield rows
+
+    except httpx.TimeoutException:
         raise GLPINetworkError(f"Timeout na busca paginada de {itemtype}", timeout=True)
-    except requests.exceptions.HTTPError as e:
-        status = getattr(e.response, 'status_code', None)
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
         if status in (401, 403):
             raise GLPIAuthError("Falha de autenticação GLPI", status_code=status)
         raise GLPISearchError(f"Erro HTTP na busca paginada de {itemtype} (status={status})", status_code=status)
-    except requests.exceptions.RequestException:
+    except httpx.RequestError:
         raise GLPINetworkError(f"Falha de rede na busca paginada de {itemtype}")
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def iter_search(
+    headers: Dict[str, str],
+    api_url: str,
+    itemtype: str,
+    criteria: Optional[List[Dict]] = None,
+    forcedisplay: Optional[List[str]] = None,
+    uid_cols: bool = True,
+    range_step: int = 1000,
+    concurrency: int = SEARCH_PAGE_CONCURRENCY,
+    page_retries: int = SEARCH_PAGE_RETRIES,
+) -> AsyncIterator[Dict[str, Any]]:
+    """Variante de `iter_search_pages` que produz um registro por vez."""
+    pages = iter_search_pages(
+        headers, api_url, itemtype, criteria, forcedisplay, uid_cols, range_step, concurrency, page_retries
+    )
+    async with aclosing(pages):
+        async for rows in pages:
+            for row in rows:
+                yield row
 
 
-def get_user_names_in_batch_with_fallback(headers: Dict[str, str], api_url: str, requester_ids: List[int]) -> Dict[int, str]:
+async def search_paginated(
+    headers: Dict[str, str],
+    api_url: str,
+    itemtype: str,
+    criteria: Optional[List[Dict]] = None,
+    forcedisplay: Optional[List[str]] = None,
+    uid_cols: bool = True,
+    range_step: int = 1000,
+    concurrency: int = SEARCH_PAGE_CONCURRENCY,
+    page_retries: int = SEARCH_PAGE_RETRIES,
+) -> List[Dict[str, Any]]:
     """
-    Resolve nomes de usuários (requisitantes) a partir de seus IDs.
-    Implementação segura: resolve individualmente via GET /User/{id} para cada ID único.
-    Para listas pequenas (top 10), é suficiente e robusto.
+    Busca paginada com suporte a grandes volumes de dados.
+    Acumula as páginas de `iter_search_pages` (busca paralela após a primeira, cada
+    página com até `page_retries` novas tentativas). Para agregar sem materializar o
+    resultado inteiro, prefira `iter_search_pages`/`iter_search`.
 
     Args:
-        headers: Headers com Session-Token/App-Token já autenticados.
-        api_url: URL base da API GLPI (inclui /apirest.php).
-        requester_ids: Lista de IDs de usuários para resolver nomes.
+        headers: Headers com session-token
+        api_url: URL base da API GLPI
+        itemtype: Tipo do item para busca
+        criteria: Critérios de filtro
+        forcedisplay: Campos a serem exibidos
+        uid_cols: Se deve usar uid_cols=1
+        range_step: Tamanho da página
+        concurrency: Páginas buscadas simultaneamente após a primeira
+        page_retries: Novas tentativas por página em falhas transitórias
 
     Returns:
-        Dict[int, str]: Mapa de user_id -> "firstname realname" (ou rótulo seguro se não encontrado).
+        Lista completa de registros encontrados
     """
-    import requests as _requests
+    all_results: List[Dict[str, Any]] = []
+    async for rows in iter_search_pages(
+        headers, api_url, itemtype, criteria, forcedisplay, uid_cols, range_step, concurrency, page_retries
+    ):
+        all_results.extend(rows)
+    return all_results
 
-    names_map: Dict[int, str] = {}
-    unique_ids = list(sorted(set(int(rid) for rid in requester_ids if isinstance(rid, (int, str)))))
 
-    for user_id in unique_ids:
-        try:
-            user_url = f"{api_url}/User/{user_id}"
-            response = _requests.get(user_url, headers=headers, timeout=(3, 6))
-            response.raise_for_status()
-            user_data = response.json()
-
-            # A API pode retornar uma lista mesmo para um único ID
-            if isinstance(user_data, list) and user_data:
-                user_data = user_data[0]
-
-            first_name = user_data.get('firstname', '')
-            last_name = user_data.get('realname', '')
-            full_name = f"{first_name} {last_name}".strip()
-            names_map[user_id] = full_name if full_name else f"Usuário ID {user_id}"
-
-        except _requests.exceptions.RequestException:
-            names_map[user_id] = f"Usuário ID {user_id} (Não Encontrado)"
-        except (IndexError, KeyError, TypeError, ValueError):
-            names_map[user_id] = f"Usuário ID {user_id} (Dados Incompletos)"
-
-    return names_map
\ No newline at end of file
+async def search_count(
+    headers: Dict[str, str],
+    api_url: str,
+    itemtype: str,
+    criteria: Optional[List[Dict]] = None,
+) -> int:
+    """Quantidade de registros de uma busca (apenas o `totalcount`, com range=0-0)."""
+    params = _search_params(criteria, uid_cols=False)
+    params['range'] = '0-0'
+    try:
+        response = await request(
+            "GET", f"{api_url}/search/{itemtype}", headers=headers, params=params, timeout=COUNT_TIMEOUT
+        )
+        return int((response.json() or {}).get('totalcount', 0) or 0)
+    except (TypeError, ValueError, AttributeError):
+        return 0
+    except httpx.TimeoutException:
+        raise GLPINetworkError(f"Timeout ao contar {itemtype}", timeout=True)
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        if status in (401, 403):
+            raise GLPIAuthError("Falha de autenticação GLPI", status_code=status)
+        raise GLPISearchError(f"Erro HTTP ao contar {itemtype} (status={status})", status_code=status)
+    except httpx.RequestError:
+        raise GLPINetworkError(f"Falha de rede ao contar {itemtype}")
+
+
+async def search_top(
+    headers: Dict[str, str],
+    api_url: str,
+    itemtype: str,
+    criteria: Optional[List[Dict]] = None,
+    forcedisplay: Optional[List[str]] = None,
+    uid_cols: bool = True,
+    sort: Optional[str] = None,
+    order: str = "DESC",
+    limit: int = 10,
+) -> List[Dict[str, Any]]:
+    """
+    Primeiros `limit` registros de uma busca ordenada no próprio GLPI (`sort`/`order`),
+    em uma única requisição `range=0-(limit-1)`, sem paginar o resultado inteiro.
+
+    Args:
+        headers: Headers com session-token
+        api_url: URL base da API GLPI
+        itemtype: Tipo do item para busca
+        criteria: Critérios de filtro
+        forcedisplay: Campos a serem exibidos
+        uid_cols: Se deve usar uid_cols=1
+        sort: ID do campo de ordenação
+        order: ASC ou DESC
+        limit: Quantidade máxima de registros
+
+    Returns:
+        Registros da primeira página, na ordem devolvida pelo GLPI
+    """
+    params = _search_params(criteria, forcedisplay, uid_cols)
+    if sort is not None:
+        params['sort'] = sort
+        params['order'] = order
+    try:
+        page = await _fetch_page(f"{api_url}/search/{itemtype}", headers, params, 0, max(limit, 1) - 1)
+        return list(page.get('data') or [])[:limit]
+    except httpx.TimeoutException:
+        raise GLPINetworkError(f"Timeout na busca ordenada de {itemtype}", timeout=True)
+    except httpx.HTTPStatusError as e:
+        status = e.response.status_code
+        if status in (401, 403):
+            raise GLPIAuthError("Falha de autenticação GLPI", status_code=status)
+        raise GLPISearchError(f"Erro HTTP na busca ordenada de {itemtype} (status={status})", status_code=status)
+    except httpx.RequestError:
+        raise GLPINetworkError(f"Falha de rede na busca ordenada de {itemtype}")
@@ -0,0 +1,118 @@
+"""
+Planejador de contagens no GLPI.
+Recebe um conjunto de contagens sobre o mesmo conjunto base (ex.: tickets do período)
+e escolhe como executá-las com o menor custo:
+- fanout: uma requisição range=0-0 por contagem (barata, mas uma ida ao GLPI cada);
+- scan: varre o conjunto base projetando só as colunas necessárias e avalia cada
+  contagem localmente, linha a linha (poucas páginas quando o conjunto é pequeno).
+O plano e o custo estimado de cada alternativa são registrados em log de debug.
+"""
+import logging
+import math
+import os
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, NamedTuple, Optional, Sequence
+
+import backend.glpi_client as glpi_client
+
+logger = logging.getLogger(__name__)
+
+# Estratégia: auto | fanout | scan
+COUNT_PLANNER_STRATEGY = os.environ.get("COUNT_PLANNER_STRATEGY", "auto").strip().lower()
+# Página da varredura e teto de páginas (acima dele a varredura nunca é escolhida)
+COUNT_SCAN_PAGE_SIZE = int(os.environ.get("COUNT_SCAN_PAGE_SIZE", "1000"))
+COUNT_SCAN_MAX_PAGES = int(os.environ.get("COUNT_SCAN_MAX_PAGES", "20"))
+# Custo relativo de uma página da varredura frente a uma contagem range=0-0
+COUNT_SCAN_PAGE_COST = float(os.environ.get("COUNT_SCAN_PAGE_COST", "3"))
+
+
+class CountQuery(NamedTuple):
+    """Uma contagem: como pedi-la ao GLPI e a mesma condição avaliada sobre uma linha."""
+
+    key: Hashable
+    count: Callable[[], Awaitable[int]]
+    matches: Callable[[Dict[str, Any]], bool]
+
+
+class CountPlan(NamedTuple):
+    strategy: str
+    queries: int
+    totalcount: Optional[int]
+    pages: int
+    cost: float
+
+
+def choose_count_plan(queries: int, totalcount: Optional[int]) -> CountPlan:
+    """
+    Compara `queries` contagens range=0-0 com 1 sondagem + `pages` páginas de varredura
+    (cada uma com peso COUNT_SCAN_PAGE_COST). Sem `totalcount` (não sondado), fanout.
+    """
+    if totalcount is None:
+        return CountPlan("fanout", queries, None, 0, float(queries))
+    pages = max(1, math.ceil(totalcount / COUNT_SCAN_PAGE_SIZE))
+    scan_cost = 1 + pages * COUNT_SCAN_PAGE_COST
+    if COUNT_PLANNER_STRATEGY == "scan" or (
+        COUNT_PLANNER_STRATEGY == "auto" and pages <= COUNT_SCAN_MAX_PAGES and scan_cost < queries
+    ):
+        return CountPlan("scan", queries, totalcount, pages, scan_cost)
+    return CountPlan("fanout", queries, totalcount, pages, 1.0 + queries)
+
+
+def _worth_probing(queries: int) -> bool:
+    """A sondagem só compensa se a menor varredura possível (1 página) puder vencer o fanout."""
+    if COUNT_PLANNER_STRATEGY == "fanout":
+        return False
+    return COUNT_PLANNER_STRATEGY == "scan" or 1 + COUNT_SCAN_PAGE_COST < queries
+
+
+async def run_counts(
+    headers: Dict[str, str],
+    api_url: str,
+    itemtype: str,
+    base_criteria: List[Dict[str, Any]],
+    fields: Sequence[str],
+    queries: Sequence[CountQuery],
+    concurrency: int,
+    label: str = "counts",
+) -> Dict[Hashable, int]:
+    """
+    Executa `queries` (todas restritas ao conjunto base `base_criteria`) pelo plano mais
+    barato. Na varredura, apenas `fields` são projetados e cada linha é testada contra
+    o `matches` de cada contagem. Exceções de domínio do cliente GLPI propagam.
+    """
+    totalcount: Optional[int] = None
+    if queries and _worth_probing(len(queries)):
+        totalcount = await glpi_client.search_count(headers, api_url, itemtype, base_criteria)
+    plan = choose_count_plan(len(queries), totalcount)
+    logger.debug(
+        "count_plan label=%s strategy=%s queries=%s totalcount=%s pages=%s cost=%.1f fanout_cost=%s",
+        label, plan.strategy, plan.queries, "-" if totalcount is None else totalcount,
+        plan.pages, plan.cost, len(queries),
+    )
+
+    counts: Dict[Hashable, int] = {q.key: 0 for q in queries}
+    if totalcount == 0:
+        return counts
+    if plan.strategy == "scan":
+        rows = 0
+        async for row in glpi_client.iter_search(
+            headers,
+            api_url,
+            itemtype,
+            base_criteria,
+            forcedisplay=list(fields),
+            uid_cols=False,
+            range_step=COUNT_SCAN_PAGE_SIZE,
+        ):
+            rows += 1
+            for q in queries:
+                if q.matches(row):
+                    counts[q.key] += 1
+        logger.debug("count_plan_done label=%s strategy=scan rows=%s", label, rows)
+        return counts
+
+    async def run(q: CountQuery):
+        return q.key, await q.count()
+
+    for key, value in await glpi_client.gather_limited(concurrency, (run(q) for q in queries)):
+        counts[key] = value
+    return counts
@@ -1,4 +1,4 @@
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from backend.logic.glpi_constants import FIELD_CREATED, FIELD_STATUS
 
@@ -53,4 +53,14 @@ def add_status(params: Dict[str, Any], status_id: int) -> Dict[str, Any]:
     params[f"criteria[{idx}][field]"] = str(FIELD_STATUS)
     params[f"criteria[{idx}][searchtype]"] = "equals"
     params[f"criteria[{idx}][value]"] = str(status_id)
-    return params
\ No newline at end of file
+    return params
+
+
+def date_range_criteria(inicio: str | None, fim: str | None) -> List[Dict[str, str]]:
+    """Critérios de intervalo (FIELD_CREATED) no formato de lista usado por search_paginated."""
+    if not (inicio and fim):
+        return []
+    return [
+        {"field": str(FIELD_CREATED), "searchtype": "morethan", "value": inicio},
+        {"link": "AND", "field": str(FIELD_CREATED), "searchtype": "lessthan", "value": _normalize_end(fim)},
+    ]
@@ -0,0 +1,254 @@
+"""
+Contagens por dia de criação (buckets diários) para compor intervalos arbitrários.
+Cada dia guarda, em cache próprio, a matriz status × nível e a contagem por técnico
+dos tickets criados nele. Um intervalo `inicio`/`fim` é respondido somando os buckets
+dos seus dias; apenas os dias ausentes (ou vencidos) são buscados no GLPI, em uma
+varredura por trecho contínuo de dias que projeta só criação, status, nível e técnico.
+Assim, intervalos que se sobrepõem (ex.: arrastar o seletor de datas) reaproveitam os
+dias já calculados, e uma mesma varredura atende métricas e ranking.
+Status e técnico de tickets antigos ainda mudam: dias recentes expiram com o TTL das
+respostas (DAY_BUCKET_TTL_SEC) e o dia corrente, mais cedo; dias com mais de
+DAY_BUCKET_SETTLED_AFTER_DAYS dias, que quase não mudam, ficam DAY_BUCKET_SETTLED_TTL_SEC.
+O GLPI grava a data de criação no fuso do servidor: "hoje" é tomado nesse fuso
+(GLPI_TIMEZONE). Sem o fuso configurado, usa a data UTC e trata também a véspera como
+dia corrente, já que perto da meia-noite o dia local do GLPI pode ser o anterior.
+"""
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+import logging
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import backend.glpi_client as glpi_client
+from backend.logic.criteria_helpers import date_range_criteria
+from backend.logic.glpi_constants import (
+    FIELD_CREATED,
+    FIELD_LEVEL,
+    FIELD_STATUS,
+    FIELD_TECH,
+    LEVELS,
+)
+from backend.utils.cache import cache
+from backend.utils.tracing import trace_phase
+
+logger = logging.getLogger(__name__)
+
+DAY_BUCKETS_ENABLED = os.environ.get("DAY_BUCKETS_ENABLED", "1").lower() in ("1", "true", "yes")
+# Validade dos dias passados e do dia corrente (que ainda recebe tickets novos)
+DAY_BUCKET_TTL_SEC = int(os.environ.get("DAY_BUCKET_TTL_SEC", os.environ.get("CACHE_TTL_SEC", "300")))
+DAY_BUCKET_TODAY_TTL_SEC = int(os.environ.get("DAY_BUCKET_TODAY_TTL_SEC", "60"))
+# Dias mais antigos que isso são tratados como assentados e ganham validade longa
+DAY_BUCKET_SETTLED_AFTER_DAYS = int(os.environ.get("DAY_BUCKET_SETTLED_AFTER_DAYS", "7"))
+DAY_BUCKET_SETTLED_TTL_SEC = int(os.environ.get("DAY_BUCKET_SETTLED_TTL_SEC", str(6 * 3600)))
+# Intervalos mais longos (em dias) ou trechos com mais tickets seguem o caminho direto
+DAY_BUCKET_MAX_DAYS = int(os.environ.get("DAY_BUCKET_MAX_DAYS", "400"))
+DAY_BUCKET_MAX_SCAN_ROWS = int(os.environ.get("DAY_BUCKET_MAX_SCAN_ROWS", "20000"))
+DAY_BUCKET_PAGE_SIZE = 1000
+# Fuso IANA em que o GLPI grava as datas (ex.: America/Sao_Paulo); vazio: UTC com margem de um dia
+GLPI_TIMEZONE = os.environ.get("GLPI_TIMEZONE", "").strip()
+
+# Linha da matriz sem filtro de nível (mesma convenção de metrics_logic.ALL_LEVELS)
+ALL_LEVELS = "ALL"
+SCAN_FIELDS = [str(FIELD_CREATED), str(FIELD_STATUS), str(FIELD_LEVEL), str(FIELD_TECH)]
+
+# {"status": {"ALL" | "N1".."N4": {"<status_id>": n}}, "techs": {"<tech_id>": n}}
+DayBucket = Dict[str, Dict[str, Any]]
+
+
+def day_bucket_cache_key(day: date) -> str:
+    return f"contagens-dia|dia={day.isoformat()}"
+
+
+def _parse_day(value: str | None) -> Optional[date]:
+    if not value or len(value) != 10:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        return None
+
+
+def _glpi_zone() -> Optional[ZoneInfo]:
+    if not GLPI_TIMEZONE:
+        return None
+    try:
+        return ZoneInfo(GLPI_TIMEZONE)
+    except (ZoneInfoNotFoundError, ValueError):
+        logger.warning("day_buckets_invalid_timezone tz=%s fallback=utc", GLPI_TIMEZONE)
+        return None
+
+
+_GLPI_ZONE = _glpi_zone()
+# Dias antes de "hoje" ainda tratados como dia corrente (incerteza entre UTC e o fuso do GLPI)
+_TODAY_MARGIN_DAYS = 0 if _GLPI_ZONE is not None else 1
+
+
+def _glpi_today() -> date:
+    return datetime.now(_GLPI_ZONE or timezone.utc).date()
+
+
+def day_bucket_ttl(day: date, today: date) -> int:
+    """Validade do bucket de `day`: curta para hoje, a das respostas para dias recentes, longa para os antigos."""
+    age = (today - day).days
+    if age <= _TODAY_MARGIN_DAYS:
+        return DAY_BUCKET_TODAY_TTL_SEC
+    if age > max(DAY_BUCKET_SETTLED_AFTER_DAYS, _TODAY_MARGIN_DAYS + 1):
+        return max(DAY_BUCKET_SETTLED_TTL_SEC, DAY_BUCKET_TTL_SEC)
+    return DAY_BUCKET_TTL_SEC
+
+
+def _days(first: date, last: date) -> List[date]:
+    return [first + timedelta(days=i) for i in range((last - first).days + 1)]
+
+
+def _spans(days: List[date]) -> List[Tuple[date, date]]:
+    """Agrupa dias ordenados em trechos contínuos (primeiro, último)."""
+    spans: List[Tuple[date, date]] = []
+    for day in days:
+        if spans and day - spans[-1][1] == timedelta(days=1):
+            spans[-1] = (spans[-1][0], day)
+        else:
+            spans.append((day, day))
+    return spans
+
+
+def _empty_bucket() -> DayBucket:
+    return {"status": {}, "techs": {}}
+
+
+def _add_row(bucket: DayBucket, row: Dict[str, Any]) -> None:
+    status = row.get(str(FIELD_STATUS))
+    if status is not None:
+        value = row.get(str(FIELD_LEVEL))
+        text = ("\n".join(str(v) for v in value) if isinstance(value, list) else str(value or "")).lower()
+        for lvl in [ALL_LEVELS] + [lvl for lvl in LEVELS if lvl.lower() in text]:
+            cells = bucket["status"].setdefault(lvl, {})
+            cells[str(status)] = cells.get(str(status), 0) + 1
+    techs = row.get(str(FIELD_TECH))
+    for tech in techs if isinstance(techs, list) else [techs]:
+        if str(tech).isdigit():
+            bucket["techs"][str(tech)] = bucket["techs"].get(str(tech), 0) + 1
+
+
+class DayBuckets:
+    """Carrega e mantém os buckets diários no cache de respostas (local ou compartilhado)."""
+
+    def __init__(self) -> None:
+        self.scans = 0
+        self.scanned_days = 0
+        self.reused_days = 0
+        self.fallbacks = 0
+
+    async def _scan_span(
+        self, headers: Dict[str, str], api_url: str, first: date, last: date
+    ) -> Optional[Dict[date, DayBucket]]:
+        """Varre os tickets criados no trecho e agrega por dia; None se o trecho for grande demais."""
+        criteria = date_range_criteria(first.isoformat(), last.isoformat())
+        total = await glpi_client.search_count(headers, api_url, "Ticket", criteria)
+        if total > DAY_BUCKET_MAX_SCAN_ROWS:
+            logger.info("day_buckets_fallback span=%s..%s totalcount=%s", first, last, total)
+            return None
+        buckets = {day: _empty_bucket() for day in _days(first, last)}
+        if total:
+            async for row in glpi_client.iter_search(
+                headers,
+                api_url,
+                "Ticket",
+                criteria,
+                forcedisplay=SCAN_FIELDS,
+                uid_cols=False,
+                range_step=DAY_BUCKET_PAGE_SIZE,
+            ):
+                day = _parse_day(str(row.get(str(FIELD_CREATED)) or "")[:10])
+                if day in buckets:
+                    _add_row(buckets[day], row)
+        self.scans += 1
+        self.scanned_days += len(buckets)
+        logger.debug("day_buckets_scan span=%s..%s days=%s rows=%s", first, last, len(buckets), total)
+        return buckets
+
+    async def _store(self, buckets: Dict[date, DayBucket]) -> None:
+        today = _glpi_today()
+        await asyncio.gather(*(
+            cache.put(day_bucket_cache_key(day), bucket, ttl=day_bucket_ttl(day, today), stale_ttl=0)
+            for day, bucket in buckets.items()
+        ))
+
+    async def load_range(
+        self, headers: Dict[str, str], api_url: str, inicio: str | None, fim: str | None
+    ) -> Optional[List[DayBucket]]:
+        """
+        Buckets de todos os dias de `inicio` a `fim` (datas YYYY-MM-DD), buscando no GLPI
+        só os ausentes. None quando o intervalo não é decomponível (sem datas, com horário,
+        longo demais ou com tickets demais): o chamador segue pelo caminho direto.
+        """
+        first, last = _parse_day(inicio), _parse_day(fim)
+        if not DAY_BUCKETS_ENABLED or first is None or last is None or last < first:
+            return None
+        days = _days(first, last)
+        if len(days) > DAY_BUCKET_MAX_DAYS:
+            self.fallbacks += 1
+            return None
+
+        with trace_phase("buckets-diarios"):
+            cached = await cache.lookup_many(day_bucket_cache_key(day) for day in days)
+            found: Dict[date, DayBucket] = {
+                day: cached[day_bucket_cache_key(day)] for day in days if day_bucket_cache_key(day) in cached
+            }
+            self.reused_days += len(found)
+
+            missing = [day for day in days if day not in found]
+            for span_first, span_last in _spans(missing):
+                # Pedidos simultâneos do mesmo trecho compartilham uma única varredura
+                scanned = (await cache.single_flight.do(
+                    f"contagens-dia-varredura|{span_first}|{span_last}",
+                    lambda a=span_first, b=span_last: self._scan_and_store(headers, api_url, a, b),
+                ))[0]
+                if scanned is None:
+                    self.fallbacks += 1
+                    return None
+                found.update(scanned)
+        return [found[day] for day in days]
+
+    async def _scan_and_store(
+        self, headers: Dict[str, str], api_url: str, first: date, last: date
+    ) -> Optional[Dict[date, DayBucket]]:
+        buckets = await self._scan_span(headers, api_url, first, last)
+        if buckets is not None:
+            await self._store(buckets)
+        return buckets
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": DAY_BUCKETS_ENABLED,
+            "scans": self.scans,
+            "scanned_days": self.scanned_days,
+            "reused_days": self.reused_days,
+            "fallbacks": self.fallbacks,
+        }
+
+
+def status_counts_from_buckets(buckets: Iterable[DayBucket], rows: Iterable[str]) -> Dict[str, Dict[str, int]]:
+    """Soma as matrizes status × nível dos dias nas linhas pedidas (StatusCounts)."""
+    counts: Dict[str, Dict[str, int]] = {lvl: {} for lvl in rows}
+    for bucket in buckets:
+        for lvl, cells in counts.items():
+            for status, n in bucket["status"].get(lvl, {}).items():
+                cells[status] = cells.get(status, 0) + n
+    return counts
+
+
+def tech_counts_from_buckets(buckets: Iterable[DayBucket], tech_ids: Iterable[int]) -> Dict[int, int]:
+    """Soma as contagens por técnico dos dias, apenas para os IDs informados."""
+    wanted = {str(t) for t in tech_ids}
+    totals: Dict[int, int] = {}
+    for bucket in buckets:
+        for tech, n in bucket["techs"].items():
+            if tech in wanted:
+                totals[int(tech)] = totals.get(int(tech), 0) + n
+    return totals
+
+
+# Instância global (usada por metrics_logic e ranking_logic)
+day_buckets = DayBuckets()
@@ -11,13 +11,21 @@ FIELD_LEVEL = 8
 FIELD_STATUS = 12
 FIELD_CREATED = 15
 FIELD_TECH = 5
+FIELD_REQUESTER = 4
+FIELD_DATE_MOD = 19
 FIELD_ENTITY = 80
 FIELD_CATEGORY = 7
 
 # Campos de User (para buscas auxiliares)
+FIELD_USER_ID = 2
+FIELD_USER_FIRSTNAME = 9
+FIELD_USER_REALNAME = 34
 FIELD_USER_ACTIVE = 8
 FIELD_GROUP = 13
 
+# Níveis de atendimento (texto buscado com "contains" no grupo atribuído, FIELD_LEVEL)
+LEVELS = ["N1", "N2", "N3", "N4"]
+
 # Status de Ticket
 STATUS = {
     "NEW": 1,
@@ -1,181 +1,209 @@
 """
 Módulo de lógica de negócios para geração de métricas de estatísticas do GLPI.
 Implementação direta usando filtros de busca na API GLPI.
-"""
 
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from typing import Any, Dict, Tuple
+As duas visões (métricas gerais e por nível) são derivadas de uma única matriz de
+contagens status × nível, obtida pelo planejador de contagens (fan-out de contagens
+paralelas ou varredura agregada localmente, o que custar menos requisições).
+"""
 
-import requests
-from requests.adapters import HTTPAdapter
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence
 
-from backend.logic.criteria_helpers import add_date_range, add_status
+import backend.glpi_client as glpi_client
+from backend.logic.count_planner import CountQuery, run_counts
+from backend.logic.criteria_helpers import date_range_criteria
+from backend.logic.day_buckets import day_buckets, status_counts_from_buckets
 from backend.logic.errors import GLPIAuthError, GLPINetworkError, GLPISearchError
 from backend.logic.glpi_constants import (
     FIELD_LEVEL,
+    FIELD_STATUS,
+    LEVELS,
     STATUS,
 )
+from backend.logic.ticket_mirror import mirror
+from backend.utils.tracing import trace_phase
+
+# Máximo de contagens simultâneas no fan-out da matriz de status
+LEVEL_STATS_CONCURRENCY = 12
+
+# Linha da matriz sem filtro de nível (base das métricas gerais: inclui tickets sem nível)
+ALL_LEVELS = "ALL"
+MATRIX_ROWS = LEVELS + [ALL_LEVELS]
+STATUSES = [
+    STATUS["NEW"],
+    STATUS["ASSIGNED"],
+    STATUS["PLANNED"],
+    STATUS["IN_PROGRESS"],
+    STATUS["SOLVED"],
+    STATUS["CLOSED"],
+]
+# Agrupamento dos status do GLPI nos indicadores do dashboard
+STATUS_GROUPS = {
+    "novos": (STATUS["NEW"],),
+    "em_progresso": (STATUS["ASSIGNED"], STATUS["PLANNED"]),
+    "pendentes": (STATUS["IN_PROGRESS"],),
+    "resolvidos": (STATUS["SOLVED"], STATUS["CLOSED"]),
+}
+
+# {"ALL" | "N1".."N4": {"<status_id>": contagem}} — chaves em texto para serializar em JSON
+StatusCounts = Dict[str, Dict[str, int]]
+
+
+def status_count_criteria(
+    status_id: int,
+    level: Optional[str] = None,
+    inicio: str | None = None,
+    fim: str | None = None,
+) -> List[Dict[str, str]]:
+    """
+    Critérios de uma célula da matriz: status (FIELD_STATUS equals), opcionalmente o nível
+    (FIELD_LEVEL contains "N1".."N4") e o intervalo de criação (FIELD_CREATED).
+    """
+    criteria: List[Dict[str, str]] = []
+    if level is not None:
+        criteria.append({"field": str(FIELD_LEVEL), "searchtype": "contains", "value": level})
+    criteria.extend(date_range_criteria(inicio, fim))
+    criteria.append({"field": str(FIELD_STATUS), "searchtype": "equals", "value": str(status_id)})
+    return [criterion if i == 0 else {"link": "AND", **criterion} for i, criterion in enumerate(criteria)]
+
 
+def _row_matches(level: str, status_id: int, row: Dict[str, Any]) -> bool:
+    """
+    Avaliação local de uma célula da matriz sobre uma linha de /search/Ticket (uid_cols=0):
+    status igual e, fora da linha ALL, nível contido no(s) grupo(s) como no "contains" do GLPI.
+    """
+    if str(row.get(str(FIELD_STATUS))) != str(status_id):
+        return False
+    if level == ALL_LEVELS:
+        return True
+    value = row.get(str(FIELD_LEVEL))
+    text = "\n".join(str(v) for v in value) if isinstance(value, list) else str(value or "")
+    return level.lower() in text.lower()
 
-def generate_level_stats(
+
+async def fetch_status_counts(
     api_url: str,
     session_headers: Dict[str, str],
     inicio: str | None = None,
     fim: str | None = None,
-) -> Dict[str, Any]:
+    rows: Sequence[str] = MATRIX_ROWS,
+) -> StatusCounts:
     """
-    Conta tickets por nível usando filtros diretos na API GLPI:
-    - Hierarquia (FIELD_LEVEL) com searchtype=contains para "N1".."N4"
-    - Status (FIELD_STATUS) com searchtype=equals para IDs definidos em STATUS
-
-    Retorna um dicionário com as chaves N1..N4 nas agregações:
-    { "N1": {"novos": int, "em_progresso": int, "pendentes": int, "resolvidos": int, "total": int }, ... }
+    Obtém a matriz de contagens status × nível (N1..N4 e ALL, sem filtro de nível) pelo
+    planejador de contagens: um fan-out paralelo (limitado por LEVEL_STATS_CONCURRENCY)
+    ou, se o período tiver poucos tickets, uma varredura de status/nível agregada localmente.
+    Intervalos de datas são compostos dos buckets diários (ver day_buckets).
+    `rows` restringe as linhas calculadas (ex.: apenas ALL para as métricas gerais).
+    Com o espelho local pronto, a matriz é calculada localmente, sem chamadas ao GLPI.
     """
+    if await mirror.is_ready():
+        local: StatusCounts = {}
+        for lvl in rows:
+            by_status = await mirror.status_counts(None if lvl == ALL_LEVELS else lvl, inicio, fim)
+            local[lvl] = {str(st): by_status.get(st, 0) for st in STATUSES}
+        return local
+
     try:
-        def fetch_count(session: requests.Session, level_value: str, status_id: int) -> Tuple[str, int, int]:
-            url = f"{api_url}/search/Ticket"
-            params: Dict[str, Any] = {
-                "uid_cols": "1",
-                "range": "0-0",
-            }
-
-            # criteria 0: nível (FIELD_LEVEL)
-            index = 0
-            params[f"criteria[{index}][field]"] = str(FIELD_LEVEL)
-            params[f"criteria[{index}][searchtype]"] = "contains"
-            params[f"criteria[{index}][value]"] = level_value
-            index += 1
-
-            # critérios de data opcionais (FIELD_CREATED) e status (FIELD_STATUS)
-            if inicio and fim:
-                add_date_range(params, inicio, fim)
-            add_status(params, status_id)
-            try:
-                resp = session.get(url, headers=session_headers, params=params, timeout=(2, 4))
-                resp.raise_for_status()
-                data = resp.json()
-                try:
-                    count = int(data.get("totalcount", 0))
-                except (TypeError, ValueError):
-                    count = 0
-                return level_value, status_id, count
-            except requests.exceptions.Timeout:
-                raise GLPINetworkError("Timeout ao buscar métricas por nível", timeout=True)
-            except requests.exceptions.HTTPError as e:
-                status = getattr(e.response, 'status_code', None)
-                if status in (401, 403):
-                    raise GLPIAuthError("Falha de autenticação em métricas por nível", status_code=status)
-                raise GLPISearchError(f"Erro HTTP em métricas por nível (status={status})", status_code=status)
-            except requests.exceptions.RequestException:
-                raise GLPINetworkError("Falha de rede ao buscar métricas por nível")
-
-        levels = ["N1", "N2", "N3", "N4"]
-        statuses = [
-            STATUS["NEW"],
-            STATUS["ASSIGNED"],
-            STATUS["PLANNED"],
-            STATUS["IN_PROGRESS"],
-            STATUS["SOLVED"],
-            STATUS["CLOSED"],
-        ]
-        level_stats = {lvl: {"novos": 0, "em_progresso": 0, "pendentes": 0, "resolvidos": 0, "total": 0} for lvl in levels}
-
-        session = requests.Session()
-        adapter = HTTPAdapter(pool_connections=20, pool_maxsize=20)
-        session.mount('http://', adapter)
-        session.mount('https://', adapter)
-
-        with ThreadPoolExecutor(max_workers=12) as executor:
-            futures = []
-            for lvl in levels:
-                for st in statuses:
-                    futures.append(executor.submit(fetch_count, session, lvl, st))
-            for fut in as_completed(futures):
-                lvl, st, cnt = fut.result()
-                if st == STATUS["NEW"]:
-                    level_stats[lvl]["novos"] += cnt
-                elif st in (STATUS["ASSIGNED"], STATUS["PLANNED"]):
-                    level_stats[lvl]["em_progresso"] += cnt
-                elif st == STATUS["IN_PROGRESS"]:
-                    level_stats[lvl]["pendentes"] += cnt
-                elif st in (STATUS["SOLVED"], STATUS["CLOSED"]):
-                    level_stats[lvl]["resolvidos"] += cnt
-                # Atualiza total incrementalmente
-                level_stats[lvl]["total"] = (
-                    level_stats[lvl]["novos"] +
-                    level_stats[lvl]["em_progresso"] +
-                    level_stats[lvl]["pendentes"] +
-                    level_stats[lvl]["resolvidos"]
-                )
-
-        return level_stats
+        # Intervalo de datas: composto dos buckets diários (só os dias ausentes vão ao GLPI)
+        buckets = await day_buckets.load_range(session_headers, api_url, inicio, fim)
+        if buckets is not None:
+            composed = status_counts_from_buckets(buckets, rows)
+            return {lvl: {str(st): composed[lvl].get(str(st), 0) for st in STATUSES} for lvl in rows}
+
+        def count_query(level: str, status_id: int) -> CountQuery:
+            return CountQuery(
+                (level, status_id),
+                partial(
+                    glpi_client.search_count,
+                    session_headers,
+                    api_url,
+                    "Ticket",
+                    status_count_criteria(status_id, None if level == ALL_LEVELS else level, inicio, fim),
+                ),
+                partial(_row_matches, level, status_id),
+            )
+
+        with trace_phase("status-contagens"):
+            results = await run_counts(
+                session_headers,
+                api_url,
+                "Ticket",
+                date_range_criteria(inicio, fim),
+                [str(FIELD_STATUS), str(FIELD_LEVEL)],
+                [count_query(lvl, st) for lvl in rows for st in STATUSES],
+                concurrency=LEVEL_STATS_CONCURRENCY,
+                label="status-contagens",
+            )
+        counts: StatusCounts = {lvl: {} for lvl in rows}
+        for (lvl, st), cnt in results.items():
+            counts[lvl][str(st)] = cnt
+        return counts
 
     except (GLPIAuthError, GLPISearchError, GLPINetworkError):
         # Propaga erros específicos para serem mapeados pelo router
         raise
     except Exception as e:
         # Falhas não previstas na lógica
-        raise GLPISearchError("Erro interno na lógica de métricas por nível") from e
+        raise GLPISearchError("Erro interno na lógica de contagem por status") from e
+
 
+def group_status_counts(counts: Dict[str, int]) -> Dict[str, int]:
+    """Agrupa contagens por status nos indicadores novos/em_progresso/pendentes/resolvidos."""
+    return {
+        group: sum(counts.get(str(st), 0) for st in statuses)
+        for group, statuses in STATUS_GROUPS.items()
+    }
 
-def generate_general_stats(
+
+def level_stats_from_counts(counts: StatusCounts) -> Dict[str, Any]:
+    """
+    Deriva as métricas por nível da matriz de contagens:
+    { "N1": {"novos": int, "em_progresso": int, "pendentes": int, "resolvidos": int, "total": int }, ... }
+    """
+    level_stats: Dict[str, Any] = {}
+    for lvl in LEVELS:
+        grouped = group_status_counts(counts.get(lvl, {}))
+        level_stats[lvl] = {**grouped, "total": sum(grouped.values())}
+    return level_stats
+
+
+def general_stats_from_counts(counts: StatusCounts) -> Dict[str, int]:
+    """
+    Deriva as métricas gerais da linha sem filtro de nível da matriz:
+      - novos: STATUS["NEW"]
+      - em_progresso: STATUS["ASSIGNED"] + STATUS["PLANNED"]
+      - pendentes: STATUS["IN_PROGRESS"]
+      - resolvidos: STATUS["SOLVED"] + STATUS["CLOSED"]
+    """
+    return group_status_counts(counts.get(ALL_LEVELS, {}))
+
+
+async def generate_level_stats(
+    api_url: str,
+    session_headers: Dict[str, str],
+    inicio: str | None = None,
+    fim: str | None = None,
+) -> Dict[str, Any]:
+    """
+    Conta tickets por nível usando filtros diretos na API GLPI:
+    - Hierarquia (FIELD_LEVEL) com searchtype=contains para "N1".."N4"
+    - Status (FIELD_STATUS) com searchtype=equals para IDs definidos em STATUS
+    """
+    counts = await fetch_status_counts(api_url, session_headers, inicio, fim, rows=LEVELS)
+    return level_stats_from_counts(counts)
+
+
+async def generate_general_stats(
     api_url: str,
     session_headers: Dict[str, str],
     inicio: str | None = None,
     fim: str | None = None,
 ) -> Dict[str, int]:
     """
-    Conta tickets diretamente pelo Status (FIELD_STATUS) usando /search/Ticket
-    e retorna agregados conforme o dashboard:
-      - novos: STATUS["NEW"]
-      - em_progresso: STATUS["ASSIGNED"] + STATUS["PLANNED"]
-      - pendentes: STATUS["IN_PROGRESS"]
-      - resolvidos: STATUS["SOLVED"] + STATUS["CLOSED"]
+    Conta tickets diretamente pelo Status (FIELD_STATUS) usando /search/Ticket.
     Se "inicio" e "fim" forem fornecidos, aplica filtro de intervalo de datas
     usando sempre a data de criação (FIELD_CREATED).
     """
-    try:
-        def count_status(status_id: int) -> int:
-            url = f"{api_url}/search/Ticket"
-            params: Dict[str, Any] = {
-                "uid_cols": "1",
-                "range": "0-0",
-            }
-
-            if inicio and fim:
-                add_date_range(params, inicio, fim)
-            add_status(params, status_id)
-            try:
-                resp = requests.get(url, headers=session_headers, params=params, timeout=(2, 4))
-                resp.raise_for_status()
-                data = resp.json()
-                try:
-                    return int(data.get("totalcount", 0))
-                except (TypeError, ValueError):
-                    return 0
-            except requests.exceptions.Timeout:
-                raise GLPINetworkError("Timeout ao buscar métricas gerais", timeout=True)
-            except requests.exceptions.HTTPError as e:
-                status = getattr(e.response, 'status_code', None)
-                if status in (401, 403):
-                    raise GLPIAuthError("Falha de autenticação em métricas gerais", status_code=status)
-                raise GLPISearchError(f"Erro HTTP em métricas gerais (status={status})", status_code=status)
-            except requests.exceptions.RequestException:
-                raise GLPINetworkError("Falha de rede ao buscar métricas gerais")
-
-        novos = count_status(STATUS["NEW"])
-        em_progresso = count_status(STATUS["ASSIGNED"]) + count_status(STATUS["PLANNED"])
-        pendentes = count_status(STATUS["IN_PROGRESS"])
-        resolvidos = count_status(STATUS["SOLVED"]) + count_status(STATUS["CLOSED"])
-
-        return {
-            "novos": novos,
-            "em_progresso": em_progresso,
-            "pendentes": pendentes,
-            "resolvidos": resolvidos,
-        }
-
-    except (GLPIAuthError, GLPISearchError, GLPINetworkError):
-        raise
-    except Exception as e:
-        raise GLPISearchError("Erro interno na lógica de métricas gerais") from e
\ No newline at end of file
+    counts = await fetch_status_counts(api_url, session_headers, inicio, fim, rows=[ALL_LEVELS])
+    return general_stats_from_counts(counts)
@@ -4,101 +4,142 @@ Implementação correta baseada no ranking_refactored.py validado.
 """
 
 from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
+import math
 import os
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Tuple
 
-import requests
-from requests.adapters import HTTPAdapter
+import httpx
 
 # A autenticação será feita no nível da API (router) e injetada aqui.
-from backend.glpi_client import get_user_names_in_batch_with_fallback
+import backend.glpi_client as glpi_client
+from backend.logic.criteria_helpers import _next_criteria_index, add_date_range, date_range_criteria
+from backend.logic.day_buckets import day_buckets, tech_counts_from_buckets
 from backend.logic.errors import GLPIAuthError, GLPINetworkError, GLPISearchError
-from backend.logic.glpi_constants import FIELD_GROUP, FIELD_TECH, FIELD_USER_ACTIVE
+from backend.logic.glpi_constants import (
+    FIELD_GROUP,
+    FIELD_TECH,
+    FIELD_USER_ACTIVE,
+    FIELD_USER_FIRSTNAME,
+    FIELD_USER_ID,
+    FIELD_USER_REALNAME,
+)
+from backend.logic.ticket_mirror import mirror
+from backend.logic.user_directory import user_directory
+from backend.utils.cache import cache
+from backend.utils.tracing import trace_phase
 
 # O ID do grupo é uma configuração de lógica de negócio, então pode ficar aqui.
 TECHNICIAN_GROUP_ID = int(os.environ.get("RANKING_TECHNICIAN_PARENT_GROUP_ID", "17"))  # grupo pai padrão
 # Limite padrão de itens no ranking (Top N)
 TOP_N_RANKING = 20
+# Estratégia de contagem: auto | per_tech (uma contagem por técnico) | bulk (varredura paginada)
+RANKING_STRATEGY = os.environ.get("RANKING_STRATEGY", "auto").strip().lower()
+# Página da varredura e teto de páginas (acima dele a varredura nunca é escolhida)
+RANKING_BULK_PAGE_SIZE = int(os.environ.get("RANKING_BULK_PAGE_SIZE", "1000"))
+RANKING_BULK_MAX_PAGES = int(os.environ.get("RANKING_BULK_MAX_PAGES", "50"))
+# Custo relativo de uma página da varredura frente a uma contagem range=0-0
+RANKING_BULK_PAGE_COST = float(os.environ.get("RANKING_BULK_PAGE_COST", "3"))
+# Contagens simultâneas na estratégia por técnico
+RANKING_COUNT_CONCURRENCY = 10
+# Composição do grupo técnico: TTL próprio (muda raramente) e página da busca de membros
+RANKING_GROUP_CACHE_TTL_SEC = int(os.environ.get("RANKING_GROUP_CACHE_TTL_SEC", str(24 * 3600)))
+GROUP_MEMBERS_PAGE_SIZE = 1000
 
+# Estratégia de busca de membros (`under` ou `equals`) que funcionou por grupo
+_group_searchtype: Dict[int, str] = {}
 
-def get_group_members(headers: Dict[str, str], api_url: str, parent_group_id: int) -> List[int]:
+logger = logging.getLogger(__name__)
+
+
+class _EmptyGroup(Exception):
+    """Busca de membros sem resultado: interrompe o loader para que nada seja gravado em cache."""
+
+
+def group_members_cache_key(parent_group_id: int) -> str:
+    return f"grupo-membros|grupo={parent_group_id}"
+
+
+async def _search_group_members(
+    headers: Dict[str, str], api_url: str, parent_group_id: int, searchtype: str
+) -> List[Dict[str, Any]]:
+    """Usuários ativos do grupo (`under`: grupo e subgrupos; `equals`: só o grupo), paginado."""
+    criteria = [
+        {"field": str(FIELD_GROUP), "searchtype": searchtype, "value": str(parent_group_id)},
+        {"link": "AND", "field": str(FIELD_USER_ACTIVE), "searchtype": "equals", "value": "1"},
+    ]
+    return await glpi_client.search_paginated(
+        headers,
+        api_url,
+        "User",
+        criteria,
+        # ID, nome e sobrenome: os nomes alimentam o diretório de usuários sem buscas extras
+        forcedisplay=[str(FIELD_USER_ID), str(FIELD_USER_FIRSTNAME), str(FIELD_USER_REALNAME)],
+        uid_cols=False,
+        range_step=GROUP_MEMBERS_PAGE_SIZE,
+    )
+
+
+async def fetch_group_members(headers: Dict[str, str], api_url: str, parent_group_id: int) -> List[int]:
     """
-    Busca IDs de técnicos ativos que pertencem a um grupo pai ou a seus subgrupos.
-    Estratégia em duas etapas: primeiro obtém `totalcount` com range 0-0; depois
-    faz uma única chamada com `range` ajustado ao total (limitado a 1000).
+    Busca no GLPI os IDs de técnicos ativos do grupo pai ou de seus subgrupos.
+    Tenta primeiro a estratégia (`under`/`equals`) que funcionou da última vez para o
+    grupo; se ela não trouxer membros, tenta a outra e memoriza a que funcionou.
     """
-    search_url = f"{api_url}/search/User"
-    base_params = {
-        'uid_cols': '0',
-        'forcedisplay[0]': '2',  # ID do usuário (GLPI retorna '2'/'User.id')
-        'criteria[0][field]': FIELD_GROUP,       # Grupos
-        'criteria[0][searchtype]': 'under',
-        'criteria[0][value]': str(parent_group_id),
-        'criteria[1][field]': FIELD_USER_ACTIVE,        # Ativo
-        'criteria[1][searchtype]': 'equals',
-        'criteria[1][value]': '1',
-    }
-    try:
-        # Etapa 1: obter apenas o totalcount
-        params_count = dict(base_params)
-        params_count['range'] = '0-0'
-        resp_count = requests.get(search_url, headers=headers, params=params_count, timeout=(3, 6))
-        resp_count.raise_for_status()
-        data_count = resp_count.json()
-        total = int(data_count.get('totalcount', 0) or 0)
-        # Se não retornar nada com 'under', tentar com 'equals' (grupo direto)
-        if total <= 0:
-            params_count_eq = dict(base_params)
-            params_count_eq['criteria[0][searchtype]'] = 'equals'
-            resp_count_eq = requests.get(search_url, headers=headers, params=params_count_eq, timeout=(3, 6))
-            resp_count_eq.raise_for_status()
-            data_count_eq = resp_count_eq.json()
-            total = int(data_count_eq.get('totalcount', 0) or 0)
-            if total <= 0:
-                return []
-
-        # Etapa 2: buscar linhas com range ajustado
-        end_index = min(total - 1, 999)  # limita a 1000 registros
-        params_rows = dict(base_params)
-        params_rows['range'] = f'0-{end_index}'
-        resp_rows = requests.get(search_url, headers=headers, params=params_rows, timeout=(3, 6))
-        resp_rows.raise_for_status()
-        data_rows = resp_rows.json()
-        rows = data_rows.get('data', []) or []
-        # Se com 'under' não vierem linhas, tenta com 'equals'
+    preferred = _group_searchtype.get(parent_group_id, "under")
+    for searchtype in (preferred, "equals" if preferred == "under" else "under"):
+        rows = await _search_group_members(headers, api_url, parent_group_id, searchtype)
         if not rows:
-            params_rows_eq = dict(base_params)
-            params_rows_eq['criteria[0][searchtype]'] = 'equals'
-            params_rows_eq['range'] = f'0-{end_index}'
-            resp_rows_eq = requests.get(search_url, headers=headers, params=params_rows_eq, timeout=(3, 6))
-            resp_rows_eq.raise_for_status()
-            data_rows_eq = resp_rows_eq.json()
-            rows = data_rows_eq.get('data', []) or []
+            continue
+        _group_searchtype[parent_group_id] = searchtype
+        user_directory.remember_rows(rows)
         ids: List[int] = []
         for row in rows:
-            id_val = row.get('2') or row.get('User.id') or row.get('id')
+            id_val = row.get(str(FIELD_USER_ID)) or row.get('User.id') or row.get('id')
             try:
                 if id_val is not None:
                     ids.append(int(id_val))
             except (TypeError, ValueError):
                 continue
-        return ids
-    except requests.exceptions.Timeout:
-        raise GLPINetworkError("Timeout ao buscar membros do grupo", timeout=True)
-    except requests.exceptions.HTTPError as e:
-        status = getattr(e.response, 'status_code', None)
-        if status in (401, 403):
-            raise GLPIAuthError("Falha de autenticação ao buscar membros do grupo", status_code=status)
-        raise GLPISearchError(f"Erro HTTP ao buscar membros do grupo (status={status})", status_code=status)
-    except requests.exceptions.RequestException:
-        raise GLPINetworkError("Falha de rede ao buscar membros do grupo")
+        return sorted(set(ids))
+    return []
+
+
+async def get_group_members(headers: Dict[str, str], api_url: str, parent_group_id: int) -> List[int]:
+    """
+    IDs de técnicos ativos que pertencem a um grupo pai ou a seus subgrupos.
+    A composição muda raramente: fica em cache próprio (RANKING_GROUP_CACHE_TTL_SEC),
+    separado do resultado do ranking, e pode ser invalidada manualmente. Uma resposta
+    vazia do GLPI não é guardada (nem substitui a composição anterior na revalidação):
+    pode ser uma falha transitória, e em cache deixaria o ranking vazio por dias.
+    """
+
+    async def load() -> List[int]:
+        members = await fetch_group_members(headers, api_url, parent_group_id)
+        if not members:
+            raise _EmptyGroup()
+        return members
+
+    try:
+        result = await cache.fetch(
+            group_members_cache_key(parent_group_id),
+            load,
+            ttl=RANKING_GROUP_CACHE_TTL_SEC,
+            stale_ttl=RANKING_GROUP_CACHE_TTL_SEC,
+        )
+    except _EmptyGroup:
+        logger.warning("ranking_group_empty group=%s", parent_group_id)
+        return []
+    return result.value
 
 
- 
+async def invalidate_group_members(parent_group_id: int = TECHNICIAN_GROUP_ID) -> bool:
+    """Descarta a composição em cache do grupo e a estratégia memorizada (`under`/`equals`)."""
+    _group_searchtype.pop(parent_group_id, None)
+    return await cache.invalidate(group_members_cache_key(parent_group_id))
 
 
-def generate_technician_ranking(
+async def generate_technician_ranking(
     api_url: str,
     session_headers: Dict[str, str],
     inicio: str | None = None,
@@ -115,44 +156,41 @@ def generate_technician_ranking(
     """
     try:
         # 1) Obter técnicos ativos do grupo de produção
-        active_technician_ids = get_group_members(session_headers, api_url, TECHNICIAN_GROUP_ID)
+        with trace_phase("ranking-membros"):
+            active_technician_ids = await get_group_members(session_headers, api_url, TECHNICIAN_GROUP_ID)
         active_technician_set = set(active_technician_ids)
         if not active_technician_set:
             return []
 
-        # 2) Contar tickets por técnico com consulta paralela (campo técnico)
-        ticket_counts = count_tickets_by_tech_parallel(
-            headers=session_headers,
-            api_url=api_url,
-            active_technician_set=active_technician_set,
-            range_step=1000,
-            max_workers=10,
-            pool_size=20,
-            field_name=str(FIELD_TECH),
-            inicio=inicio,
-            fim=fim,
-        )
-
-        if not ticket_counts:
-            # Fallback simples: tenta nome alternativo de campo
-            ticket_counts = count_tickets_by_tech_parallel(
-                headers=session_headers,
-                api_url=api_url,
-                active_technician_set=active_technician_set,
-                range_step=1000,
-                max_workers=10,
-                pool_size=20,
-                field_name="users_id_assign",
-                inicio=inicio,
-                fim=fim,
-            )
+        # 2) Contar tickets por técnico: no espelho local, se pronto; senão pelos buckets
+        # diários ou no GLPI, com a estratégia mais barata (contagem por técnico ou varredura)
+        if await mirror.is_ready():
+            ticket_counts = Counter(await mirror.tech_counts(active_technician_set, inicio, fim))
+            if not ticket_counts:
+                return []
+        else:
+            # Intervalo de datas: composto dos buckets diários, se decomponível (um período
+            # sem tickets dos técnicos é um ranking vazio, não motivo para contar no GLPI)
+            buckets = await day_buckets.load_range(session_headers, api_url, inicio, fim)
+            if buckets is not None:
+                ticket_counts = Counter(tech_counts_from_buckets(buckets, active_technician_set))
+            else:
+                with trace_phase("ranking-contagens"):
+                    ticket_counts = await count_tickets_by_tech(
+                        headers=session_headers,
+                        api_url=api_url,
+                        active_technician_set=active_technician_set,
+                        inicio=inicio,
+                        fim=fim,
+                    )
             if not ticket_counts:
                 return []
 
         # 3) Montar ranking com nomes (Top N)
-        sorted_counts = sorted(ticket_counts.items(), key=lambda x: x[1], reverse=True)
+        # Empates desfeitos pelo ID para o resultado não depender da estratégia de contagem
+        sorted_counts = sorted(ticket_counts.items(), key=lambda x: (-x[1], x[0]))
         top_ids = [tech_id for tech_id, _ in sorted_counts[:TOP_N_RANKING]]
-        names_map = get_user_names_in_batch_with_fallback(session_headers, api_url, top_ids)
+        names_map = await user_directory.get_names(session_headers, api_url, top_ids)
         ranking_data = []
         for tech_id, count in sorted_counts[:TOP_N_RANKING]:
             tech_name = names_map.get(tech_id, f"Usuário ID {tech_id}")
@@ -166,13 +204,126 @@ def generate_technician_ranking(
         raise GLPISearchError("Erro interno na lógica de ranking") from e
 
 
-def count_tickets_by_tech_parallel(
+def choose_ranking_strategy(technicians: int, totalcount: int) -> Tuple[str, int]:
+    """
+    Escolhe entre contar por técnico (`technicians` requisições range=0-0) e varrer os
+    tickets do período projetando só FIELD_TECH (`pages` requisições, cada uma com peso
+    RANKING_BULK_PAGE_COST). Retorna (estratégia, páginas da varredura).
+    """
+    pages = max(1, math.ceil(totalcount / RANKING_BULK_PAGE_SIZE))
+    if RANKING_STRATEGY in ("per_tech", "bulk"):
+        return RANKING_STRATEGY, pages
+    if pages <= RANKING_BULK_MAX_PAGES and pages * RANKING_BULK_PAGE_COST < technicians:
+        return "bulk", pages
+    return "per_tech", pages
+
+
+async def count_period_tickets(
+    headers: Dict[str, str],
+    api_url: str,
+    inicio: str | None = None,
+    fim: str | None = None,
+) -> int:
+    """Total de tickets do período (totalcount com range=0-0), usado para escolher a estratégia."""
+    return await glpi_client.search_count(headers, api_url, "Ticket", date_range_criteria(inicio, fim))
+
+
+async def count_tickets_by_tech_bulk(
+    headers: Dict[str, str],
+    api_url: str,
+    active_technician_set: set,
+    inicio: str | None = None,
+    fim: str | None = None,
+    page_size: int = RANKING_BULK_PAGE_SIZE,
+) -> Counter:
+    """
+    Conta tickets por técnico em uma única varredura paginada dos tickets do período,
+    projetando apenas FIELD_TECH e agregando página a página, sem materializar os
+    tickets (um ticket com vários técnicos conta para cada um deles, como na contagem
+    por técnico).
+    """
+    aggregated = Counter()
+    async for row in glpi_client.iter_search(
+        headers,
+        api_url,
+        "Ticket",
+        date_range_criteria(inicio, fim),
+        forcedisplay=[str(FIELD_TECH)],
+        uid_cols=False,
+        range_step=page_size,
+    ):
+        value = row.get(str(FIELD_TECH))
+        for tech in value if isinstance(value, list) else [value]:
+            tech_str = str(tech)
+            if tech_str.isdigit() and int(tech_str) in active_technician_set:
+                aggregated[int(tech_str)] += 1
+    return aggregated
+
+
+async def count_tickets_by_tech(
+    headers: Dict[str, str],
+    api_url: str,
+    active_technician_set: set,
+    inicio: str | None = None,
+    fim: str | None = None,
+) -> Counter:
+    """
+    Conta tickets por técnico no GLPI escolhendo a estratégia mais barata para o tamanho
+    do grupo e o volume do período (ver choose_ranking_strategy). A varredura sem
+    resultado cai para a contagem por técnico; esta, para o campo alternativo
+    `users_id_assign`. A estratégia e o número de requisições são registrados em log.
+    """
+    totalcount: int | None = None
+    requests_made = 0
+    if RANKING_STRATEGY != "per_tech":
+        totalcount = await count_period_tickets(headers, api_url, inicio, fim)
+        requests_made += 1
+        if totalcount == 0:
+            logger.info(
+                "ranking_strategy=none technicians=%s totalcount=0 requests=%s",
+                len(active_technician_set), requests_made,
+            )
+            return Counter()
+    if totalcount is None:
+        strategy, pages = "per_tech", 0
+    else:
+        strategy, pages = choose_ranking_strategy(len(active_technician_set), totalcount)
+
+    ticket_counts = Counter()
+    if strategy == "bulk":
+        ticket_counts = await count_tickets_by_tech_bulk(headers, api_url, active_technician_set, inicio, fim)
+        requests_made += pages
+        if not ticket_counts:
+            # Campo técnico sem IDs numéricos nesta instalação: conta por técnico
+            strategy = "bulk+per_tech"
+    if not ticket_counts:
+        for field_name in (str(FIELD_TECH), "users_id_assign"):
+            ticket_counts = await count_tickets_by_tech_parallel(
+                headers=headers,
+                api_url=api_url,
+                active_technician_set=active_technician_set,
+                max_workers=RANKING_COUNT_CONCURRENCY,
+                field_name=field_name,
+                inicio=inicio,
+                fim=fim,
+            )
+            requests_made += len(active_technician_set)
+            if ticket_counts:
+                break
+
+    logger.info(
+        "ranking_strategy=%s technicians=%s totalcount=%s pages=%s requests=%s",
+        strategy, len(active_technician_set), "-" if totalcount is None else totalcount, pages, requests_made,
+    )
+    return ticket_counts
+
+
+async def count_tickets_by_tech_parallel(
     headers: Dict[str, str],
     api_url: str,
     active_technician_set: set,
     range_step: int = 1000,
     max_workers: int = 10,
-    pool_size: int = 20,
     field_name: str = str(FIELD_TECH),
     inicio: str | None = None,
     fim: str | None = None,
@@ -190,32 +341,23 @@ def count_tickets_by_tech_parallel(
         api_url: URL base da API GLPI.
         active_technician_set: Conjunto de IDs de técnicos válidos (ativos no grupo).
         range_step: Mantido por compatibilidade (não utilizado nesta estratégia).
-        max_workers: Número de workers para paralelização.
-        pool_size: Tamanho do pool de conexões HTTP.
+        max_workers: Número máximo de contagens simultâneas (semáforo).
 
     Returns:
         Counter com contagem de tickets por técnico.
     """
     search_url = f"{api_url}/search/Ticket"
 
-    # Sessão com pool de conexões
-    session = requests.Session()
-    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
-    session.mount('http://', adapter)
-    session.mount('https://', adapter)
-
-    def fetch_count(tech_id: int) -> tuple[int, int]:
+    async def fetch_count(tech_id: int) -> tuple[int, int]:
         params: Dict[str, Any] = {
             "range": "0-0",
         }
         # Critérios de data opcionais
         if inicio and fim:
-            from backend.logic.criteria_helpers import add_date_range
             add_date_range(params, inicio, fim)
 
         # Filtro de técnico
         # Adiciona após qualquer critério existente
-        from backend.logic.criteria_helpers import _next_criteria_index
         idx = _next_criteria_index(params)
         if idx > 0:
             params[f"criteria[{idx}][link]"] = "AND"
@@ -223,22 +365,23 @@ def count_tickets_by_tech_parallel(
         params[f"criteria[{idx}][searchtype]"] = "equals"
         params[f"criteria[{idx}][value]"] = str(tech_id)
         try:
-            resp = session.get(search_url, headers=headers, params=params, timeout=(2, 4))
-            resp.raise_for_status()
+            resp = await glpi_client.request(
+                "GET", search_url, headers=headers, params=params, timeout=glpi_client.COUNT_TIMEOUT
+            )
             data = resp.json()
             try:
                 count = int(data.get("totalcount", 0) or 0)
             except (TypeError, ValueError):
                 count = 0
             return tech_id, count
-        except requests.exceptions.Timeout:
+        except httpx.TimeoutException:
             raise GLPINetworkError("Timeout ao contar tickets por técnico", timeout=True)
-        except requests.exceptions.HTTPError as e:
-            status = getattr(e.response, 'status_code', None)
+        except httpx.HTTPStatusError as e:
+            status = e.response.status_code
             if status in (401, 403):
                 raise GLPIAuthError("Falha de autenticação ao contar tickets por técnico", status_code=status)
             raise GLPISearchError(f"Erro HTTP ao contar tickets por técnico (status={status})", status_code=status)
-        except requests.exceptions.RequestException:
+        except httpx.RequestError:
             raise GLPINetworkError("Falha de rede ao contar tickets por técnico")
 
     aggregated = Counter()
@@ -246,11 +389,9 @@ def count_tickets_by_tech_parallel(
     if not tech_ids:
         return aggregated
 
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {executor.submit(fetch_count, tid): tid for tid in tech_ids}
-        for fut in as_completed(futures):
-            tid, cnt = fut.result()
-            if cnt > 0:
-                aggregated[tid] = cnt
+    results = await glpi_client.gather_limited(max_workers, (fetch_count(tid) for tid in tech_ids))
+    for tid, cnt in results:
+        if cnt > 0:
+            aggregated[tid] = cnt
 
     return aggregated
\ No newline at end of file
@@ -0,0 +1,444 @@
+"""
+Espelho local de tickets do GLPI (opcional, MIRROR_ENABLED=1).
+Faz uma carga inicial via `iter_search_pages` apenas dos campos usados pelo dashboard
+e, periodicamente, sincronizações delta filtradas pela data de modificação
+(FIELD_DATE_MOD), gravando tudo em um arquivo SQLite compacto. Enquanto o espelho
+estiver pronto e em dia, métricas, ranking e tickets novos são respondidos localmente.
+Uma recarga completa periódica remove tickets excluídos/purgados, que o delta não vê.
+"""
+import asyncio
+from contextlib import aclosing
+from datetime import datetime, timedelta
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import uuid
+
+import backend.glpi_client as glpi_client
+from backend.logic.errors import GLPIAuthError, GLPINetworkError, GLPISearchError
+from backend.logic.glpi_constants import (
+    FIELD_CREATED,
+    FIELD_DATE_MOD,
+    FIELD_ID,
+    FIELD_LEVEL,
+    FIELD_NAME,
+    FIELD_REQUESTER,
+    FIELD_STATUS,
+    FIELD_TECH,
+)
+from backend.utils.tracing import trace_phase
+
+logger = logging.getLogger(__name__)
+
+MIRROR_ENABLED = os.environ.get("MIRROR_ENABLED", "0").lower() in ("1", "true", "yes")
+MIRROR_SQLITE_PATH = os.environ.get(
+    "MIRROR_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "glpi-dashboard-mirror.sqlite3")
+)
+# Intervalo entre sincronizações delta
+MIRROR_SYNC_INTERVAL_SEC = float(os.environ.get("MIRROR_SYNC_INTERVAL_SEC", "60"))
+# Intervalo entre recargas completas (remove tickets excluídos no GLPI)
+MIRROR_FULL_RESYNC_SEC = float(os.environ.get("MIRROR_FULL_RESYNC_SEC", str(6 * 3600)))
+# Defasagem máxima aceita: acima disso as consultas voltam a ir direto ao GLPI
+MIRROR_MAX_LAG_SEC = float(os.environ.get("MIRROR_MAX_LAG_SEC", "600"))
+# Sobreposição da janela delta (tolera relógios e gravações concorrentes no GLPI)
+MIRROR_OVERLAP_SEC = int(os.environ.get("MIRROR_OVERLAP_SEC", "120"))
+# Validade do lock de sincronização entre processos (cobre uma carga completa lenta)
+MIRROR_SYNC_LOCK_TTL_SEC = max(MIRROR_SYNC_INTERVAL_SEC * 3, 900.0)
+# Após falhas seguidas, o intervalo de sincronização dobra até este múltiplo
+MIRROR_MAX_BACKOFF_FACTOR = 8
+# Página da carga via iter_search_pages
+MIRROR_PAGE_SIZE = int(os.environ.get("MIRROR_PAGE_SIZE", "1000"))
+
+GLPI_DATETIME = "%Y-%m-%d %H:%M:%S"
+# Campos buscados no GLPI: título, ID, requerente, técnico, nível, status, criação, modificação
+MIRROR_FIELDS = [
+    str(FIELD_NAME),
+    str(FIELD_ID),
+    str(FIELD_REQUESTER),
+    str(FIELD_TECH),
+    str(FIELD_LEVEL),
+    str(FIELD_STATUS),
+    str(FIELD_CREATED),
+    str(FIELD_DATE_MOD),
+]
+
+SCHEMA = [
+    "CREATE TABLE IF NOT EXISTS tickets ("
+    " id INTEGER PRIMARY KEY, title TEXT, status INTEGER, level TEXT,"
+    " requester_id INTEGER, created TEXT, date_mod TEXT)",
+    "CREATE INDEX IF NOT EXISTS idx_tickets_status_created ON tickets (status, created)",
+    "CREATE TABLE IF NOT EXISTS ticket_techs ("
+    " ticket_id INTEGER NOT NULL, tech_id INTEGER NOT NULL, PRIMARY KEY (ticket_id, tech_id))",
+    "CREATE INDEX IF NOT EXISTS idx_ticket_techs_tech ON ticket_techs (tech_id)",
+    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)",
+    "CREATE TABLE IF NOT EXISTS sync_lock (id INTEGER PRIMARY KEY CHECK (id = 1), owner TEXT, expires REAL)",
+]
+# Staging da carga completa (tabelas temporárias da conexão de escrita)
+STAGING_SCHEMA = [
+    "CREATE TEMP TABLE IF NOT EXISTS tickets_stage ("
+    " id INTEGER PRIMARY KEY, title TEXT, status INTEGER, level TEXT,"
+    " requester_id INTEGER, created TEXT, date_mod TEXT)",
+    "CREATE TEMP TABLE IF NOT EXISTS ticket_techs_stage ("
+    " ticket_id INTEGER NOT NULL, tech_id INTEGER NOT NULL, PRIMARY KEY (ticket_id, tech_id))",
+]
+
+TicketRow = Tuple[int, str, Optional[int], str, Optional[int], Optional[str], Optional[str]]
+
+
+def _as_list(value: Any) -> List[Any]:
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+
+def _numeric_ids(value: Any) -> List[int]:
+    """IDs numéricos de um campo do GLPI (valor único, lista ou nulo)."""
+    return [int(str(v)) for v in _as_list(value) if str(v).isdigit()]
+
+
+def parse_ticket(row: Dict[str, Any]) -> Optional[Tuple[TicketRow, List[int]]]:
+    """Converte uma linha de /search/Ticket (uid_cols=0) em linha do espelho + técnicos."""
+    ids = _numeric_ids(row.get(str(FIELD_ID)))
+    if not ids:
+        return None
+    try:
+        status = int(row.get(str(FIELD_STATUS)))
+    except (TypeError, ValueError):
+        status = None
+    requesters = _numeric_ids(row.get(str(FIELD_REQUESTER)))
+    # Nível: grupo(s) atribuído(s); mantido como texto para o mesmo "contains" do GLPI
+    level = "\n".join(str(v) for v in _as_list(row.get(str(FIELD_LEVEL))))
+    ticket: TicketRow = (
+        ids[0],
+        str(row.get(str(FIELD_NAME)) or ""),
+        status,
+        level,
+        requesters[0] if requesters else None,
+        row.get(str(FIELD_CREATED)),
+        row.get(str(FIELD_DATE_MOD)),
+    )
+    return ticket, _numeric_ids(row.get(str(FIELD_TECH)))
+
+
+def _end_of_day(fim: str) -> str:
+    return fim if len(fim) > 10 else f"{fim} 23:59:59"
+
+
+class TicketMirror:
+    """
+    Espelho SQLite de tickets. Leituras e escritas usam conexões separadas (modo WAL),
+    executadas em thread para não bloquear o event loop. Entre processos, apenas o
+    detentor do `sync_lock` sincroniza; os demais apenas leem o arquivo.
+    """
+
+    def __init__(self, path: str = MIRROR_SQLITE_PATH):
+        self.path = path
+        self._read_conn: Optional[sqlite3.Connection] = None
+        self._write_conn: Optional[sqlite3.Connection] = None
+        self._read_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._owner = uuid.uuid4().hex
+        self._headers_factory: Optional[Callable[[], Awaitable[Dict[str, str]]]] = None
+        self._api_url: Optional[str] = None
+        self._task: Optional[asyncio.Task] = None
+        self.enabled = False
+        self.syncs = 0
+        self.full_syncs = 0
+        self.errors = 0
+        self.last_delta_rows = 0
+        self.last_sync_ms = 0.0
+
+    # --- SQLite ---------------------------------------------------------------------
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, timeout=10, isolation_level=None, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        for statement in SCHEMA:
+            conn.execute(statement)
+        return conn
+
+    def _read(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        with self._read_lock:
+            if self._read_conn is None:
+                self._read_conn = self._connect()
+            return self._read_conn.execute(sql, tuple(params)).fetchall()
+
+    def _write_tx(self, fn: Callable[[sqlite3.Connection], Any]) -> Any:
+        """Executa `fn` em uma transação de escrita (BEGIN IMMEDIATE ... COMMIT)."""
+        with self._write_lock:
+            if self._write_conn is None:
+                self._write_conn = self._connect()
+            conn = self._write_conn
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                result = fn(conn)
+                conn.execute("COMMIT")
+                return result
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    async def _query(self, sql: str, params: Iterable[Any] = ()) -> List[tuple]:
+        with trace_phase("espelho"):
+            return await asyncio.to_thread(self._read, sql, params)
+
+    def _meta(self, key: str) -> Optional[str]:
+        rows = self._read("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    # --- sincronização --------------------------------------------------------------
+
+    def configure(self, api_url: str, headers_factory: Callable[[], Awaitable[Dict[str, str]]]) -> None:
+        """Define a URL do GLPI e como obter headers autenticados (chamado no startup)."""
+        self._api_url = api_url
+        self._headers_factory = headers_factory
+        self.enabled = True
+
+    def _claim_sync(self, ttl: float) -> bool:
+        def claim(conn: sqlite3.Connection) -> bool:
+            now = time.time()
+            cur = conn.execute(
+                "INSERT INTO sync_lock (id, owner, expires) VALUES (1, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+                "WHERE sync_lock.expires < ? OR sync_lock.owner = excluded.owner",
+                (self._owner, now + ttl, now),
+            )
+            return cur.rowcount == 1
+
+        return self._write_tx(claim)
+
+    def _pages(
+        self, headers: Dict[str, str], criteria: Optional[List[Dict[str, Any]]]
+    ) -> AsyncIterator[List[Dict[str, Any]]]:
+        assert self._api_url is not None
+        return glpi_client.iter_search_pages(
+            headers,
+            self._api_url,
+            "Ticket",
+            criteria,
+            forcedisplay=MIRROR_FIELDS,
+            uid_cols=False,
+            range_step=MIRROR_PAGE_SIZE,
+        )
+
+    def _reset_staging(self) -> None:
+        """Cria/limpa as tabelas temporárias que recebem a carga completa página a página."""
+        def reset(conn: sqlite3.Connection) -> None:
+            for statement in STAGING_SCHEMA:
+                conn.execute(statement)
+            conn.execute("DELETE FROM temp.tickets_stage")
+            conn.execute("DELETE FROM temp.ticket_techs_stage")
+
+        self._write_tx(reset)
+
+    def _store_page(self, rows: List[Dict[str, Any]], full: bool) -> int:
+        """Grava uma página: na carga completa, nas tabelas de staging; no delta, direto."""
+        parsed = [p for p in (parse_ticket(r) for r in rows) if p is not None]
+        tickets, techs = ("temp.tickets_stage", "temp.ticket_techs_stage") if full else ("tickets", "ticket_techs")
+
+        def apply(conn: sqlite3.Connection) -> int:
+            if not full:
+                conn.executemany("DELETE FROM ticket_techs WHERE ticket_id = ?", [(t[0],) for t, _ in parsed])
+            conn.executemany(f"INSERT OR REPLACE INTO {tickets} VALUES (?, ?, ?, ?, ?, ?, ?)", [t for t, _ in parsed])
+            conn.executemany(
+                f"INSERT OR IGNORE INTO {techs} VALUES (?, ?)",
+                [(t[0], tech) for t, tech_ids in parsed for tech in tech_ids],
+            )
+            return len(parsed)
+
+        return self._write_tx(apply)
+
+    def _finish_sync(self, full: bool) -> None:
+        """Conclui a sincronização: troca o conteúdo pela carga completa e atualiza o meta."""
+        def apply(conn: sqlite3.Connection) -> None:
+            if full:
+                conn.execute("DELETE FROM tickets")
+                conn.execute("DELETE FROM ticket_techs")
+                conn.execute("INSERT INTO tickets SELECT * FROM temp.tickets_stage")
+                conn.execute("INSERT INTO ticket_techs SELECT * FROM temp.ticket_techs_stage")
+                conn.execute("DELETE FROM temp.tickets_stage")
+                conn.execute("DELETE FROM temp.ticket_techs_stage")
+            now = str(time.time())
+            meta = [("last_sync_ts", now)]
+            if full:
+                meta.append(("last_full_sync_ts", now))
+            max_mod = conn.execute("SELECT MAX(date_mod) FROM tickets").fetchone()[0]
+            if max_mod:
+                meta.append(("max_date_mod", max_mod))
+            conn.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", meta)
+
+        self._write_tx(apply)
+
+    async def sync_once(self) -> Optional[int]:
+        """
+        Executa uma sincronização (completa se nunca houve carga ou se a última recarga
+        completa for antiga; delta caso contrário). Retorna as linhas gravadas, ou None se
+        outro processo detém a sincronização. As páginas são gravadas à medida que chegam
+        (memória limitada às páginas em voo); a carga completa só substitui o espelho ao
+        final, em uma única transação, e o delta só avança o `max_date_mod` ao final.
+        """
+        if not await asyncio.to_thread(self._claim_sync, MIRROR_SYNC_LOCK_TTL_SEC):
+            return None
+        assert self._headers_factory is not None
+        started = time.perf_counter()
+        last_full = await asyncio.to_thread(self._meta, "last_full_sync_ts")
+        max_mod = await asyncio.to_thread(self._meta, "max_date_mod")
+        full = last_full is None or max_mod is None or time.time() - float(last_full) > MIRROR_FULL_RESYNC_SEC
+        criteria = None
+        if not full:
+            since = datetime.strptime(max_mod, GLPI_DATETIME) - timedelta(seconds=MIRROR_OVERLAP_SEC)
+            criteria = [
+                {"field": str(FIELD_DATE_MOD), "searchtype": "morethan", "value": since.strftime(GLPI_DATETIME)}
+            ]
+        if full:
+            await asyncio.to_thread(self._reset_staging)
+        headers = await self._headers_factory()
+        stored = 0
+        pages = self._pages(headers, criteria)
+        async with aclosing(pages):
+            async for rows in pages:
+                stored += await asyncio.to_thread(self._store_page, rows, full)
+        await asyncio.to_thread(self._finish_sync, full)
+        self.syncs += 1
+        self.full_syncs += 1 if full else 0
+        self.last_delta_rows = stored
+        self.last_sync_ms = (time.perf_counter() - started) * 1000
+        logger.info(
+            "mirror_sync mode=%s rows=%s duration_ms=%.0f", "full" if full else "delta", stored, self.last_sync_ms
+        )
+        return stored
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+
+        async def run() -> None:
+            failures = 0
+            while True:
+                try:
+                    await self.sync_once()
+                    failures = 0
+                except (GLPIAuthError, GLPINetworkError, GLPISearchError, sqlite3.Error, ValueError) as e:
+                    failures += 1
+                    self.errors += 1
+                    logger.warning("mirror_sync_failed error=%s detail=%s", type(e).__name__, e)
+                except Exception:
+                    # Erro inesperado (linha malformada, falha HTTP não mapeada): o loop não pode morrer
+                    failures += 1
+                    self.errors += 1
+                    logger.exception("mirror_sync_error")
+                # Falhas seguidas espaçam as tentativas; as consultas voltam ao GLPI após MIRROR_MAX_LAG_SEC
+                await asyncio.sleep(MIRROR_SYNC_INTERVAL_SEC * min(2 ** failures, MIRROR_MAX_BACKOFF_FACTOR))
+
+        self._task = asyncio.ensure_future(run())
+        logger.info("mirror_started path=%s interval=%s", self.path, MIRROR_SYNC_INTERVAL_SEC)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        with self._read_lock, self._write_lock:
+            for conn in (self._read_conn, self._write_conn):
+                if conn is not None:
+                    conn.close()
+            self._read_conn = self._write_conn = None
+
+    # --- consultas ------------------------------------------------------------------
+
+    def _lag(self) -> Optional[float]:
+        last = self._meta("last_sync_ts")
+        return time.time() - float(last) if last else None
+
+    async def is_ready(self) -> bool:
+        """Pronto quando habilitado, já carregado e sincronizado há menos de MIRROR_MAX_LAG_SEC."""
+        if not self.enabled:
+            return False
+        try:
+            lag = await asyncio.to_thread(self._lag)
+        except sqlite3.Error:
+            return False
+        return lag is not None and lag < MIRROR_MAX_LAG_SEC
+
+    @staticmethod
+    def _range_filter(inicio: str | None, fim: str | None, column: str = "created") -> Tuple[str, List[Any]]:
+        if inicio and fim:
+            return f" AND {column} >= ? AND {column} <= ?", [inicio, _end_of_day(fim)]
+        return "", []
+
+    async def status_counts(
+        self, level: Optional[str] = None, inicio: str | None = None, fim: str | None = None
+    ) -> Dict[int, int]:
+        """Contagem de tickets por status, opcionalmente por nível ("contains") e período de criação."""
+        where, params = self._range_filter(inicio, fim)
+        if level is not None:
+            where += " AND level LIKE ?"
+            params.append(f"%{level}%")
+        rows = await self._query(f"SELECT status, COUNT(*) FROM tickets WHERE 1=1{where} GROUP BY status", params)
+        return {status: count for status, count in rows if status is not None}
+
+    async def tech_counts(
+        self, tech_ids: Iterable[int], inicio: str | None = None, fim: str | None = None
+    ) -> Dict[int, int]:
+        """Contagem de tickets por técnico atribuído (apenas os IDs informados)."""
+        wanted = set(tech_ids)
+        where, params = self._range_filter(inicio, fim, column="t.created")
+        rows = await self._query(
+            "SELECT tt.tech_id, COUNT(*) FROM ticket_techs tt JOIN tickets t ON t.id = tt.ticket_id "
+            f"WHERE 1=1{where} GROUP BY tt.tech_id",
+            params,
+        )
+        return {tech: count for tech, count in rows if tech in wanted}
+
+    async def newest_tickets(self, status: int, limit: int) -> List[Dict[str, Any]]:
+        """Tickets mais recentes (maior ID) de um status, no formato das linhas de /search/Ticket."""
+        rows = await self._query(
+            "SELECT id, title, requester_id, created FROM tickets WHERE status = ? ORDER BY id DESC LIMIT ?",
+            (status, limit),
+        )
+        return [
+            {
+                str(FIELD_ID): ticket_id,
+                str(FIELD_NAME): title,
+                str(FIELD_REQUESTER): requester_id,
+                str(FIELD_CREATED): created,
+            }
+            for ticket_id, title, requester_id, created in rows
+        ]
+
+    def _db_stats(self) -> Dict[str, Any]:
+        return {
+            "tickets": self._read("SELECT COUNT(*) FROM tickets")[0][0],
+            "lag_sec": self._lag(),
+            "max_date_mod": self._meta("max_date_mod"),
+        }
+
+    async def stats(self) -> Dict[str, Any]:
+        info: Dict[str, Any] = {
+            "enabled": self.enabled,
+            "running": self._task is not None and not self._task.done(),
+            "path": self.path,
+            "syncs": self.syncs,
+            "full_syncs": self.full_syncs,
+            "errors": self.errors,
+            "last_sync_rows": self.last_delta_rows,
+            "last_sync_ms": round(self.last_sync_ms, 1),
+        }
+        if self.enabled:
+            try:
+                info.update(await asyncio.to_thread(self._db_stats))
+            except sqlite3.Error as e:
+                info["error"] = str(e)
+        return info
+
+
+# Instância global (configurada e iniciada em backend/main.py quando MIRROR_ENABLED=1)
+mirror = TicketMirror()
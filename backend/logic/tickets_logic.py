@@ -2,31 +2,62 @@
 Módulo de lógica de negócios para funcionalidades relacionadas a tickets.
 """
 
+import os
 from typing import Any, Dict, List
 
 import backend.glpi_client as glpi_client
-from backend.logic.glpi_constants import FIELD_CREATED, FIELD_STATUS, FIELD_TECH, STATUS
+from backend.logic.glpi_constants import FIELD_CREATED, FIELD_ID, FIELD_STATUS, FIELD_TECH, STATUS
+from backend.logic.ticket_mirror import mirror
+from backend.logic.user_directory import user_directory
+from backend.utils.tracing import trace_phase
 
+# Quantidade padrão de tickets novos e teto aceito pelo endpoint (?limite=)
+NEW_TICKETS_DEFAULT_LIMIT = 10
+NEW_TICKETS_MAX_LIMIT = int(os.environ.get("TICKETS_NOVOS_MAX_LIMIT", "50"))
 
-def get_new_tickets(api_url: str, session_headers: Dict[str, str]) -> List[Dict[str, Any]]:
+
+def _ticket_id(ticket: Dict[str, Any]) -> int:
+    value = ticket.get(str(FIELD_ID))
+    return int(value) if str(value).isdigit() else 0
+
+
+async def _search_new_tickets(
+    api_url: str, session_headers: Dict[str, str], limit: int = NEW_TICKETS_DEFAULT_LIMIT
+) -> List[Dict[str, Any]]:
     """
-    Busca os 10 tickets mais recentes com status 'Novo'.
-    A lógica de resolução de nome de solicitante foi simplificada para esta versão.
+    Busca no GLPI os `limit` tickets 'Novo' de maior ID (linhas de /search/Ticket),
+    ordenados pelo próprio GLPI (sort=ID, order=DESC) em uma única página.
     """
     criteria = [{"field": str(FIELD_STATUS), "searchtype": "equals", "value": str(STATUS["NEW"])}]  # Status = Novo
 # Campos: Título(1), ID(2), Requisitante(4), Técnico(FIELD_TECH), Recipiente(6), Último Atualizador(71), Data de Criação(FIELD_CREATED)
     forcedisplay = ["1", "2", "4", str(FIELD_TECH), "6", "71", str(FIELD_CREATED)]
 
-    tickets = glpi_client.search_paginated(
+    tickets = await glpi_client.search_top(
         session_headers, api_url, "Ticket", criteria, forcedisplay=forcedisplay,
-        uid_cols=False, range_step=50
+        uid_cols=False, sort=str(FIELD_ID), order="DESC", limit=limit
     )
 
-    if not tickets:
-        return []
+    # Reordena por ID (campo '2') de forma decrescente: barato e não depende da ordenação do GLPI
+    return sorted(tickets, key=_ticket_id, reverse=True)
+
 
-    # Ordena por ID (campo '2') em ordem decrescente para obter os mais recentes
-    tickets_sorted = sorted(tickets, key=lambda x: x.get("2", 0), reverse=True)[:10]
+async def get_new_tickets(
+    api_url: str, session_headers: Dict[str, str], limit: int = NEW_TICKETS_DEFAULT_LIMIT
+) -> List[Dict[str, Any]]:
+    """
+    Busca os `limit` tickets mais recentes com status 'Novo' (no máximo NEW_TICKETS_MAX_LIMIT).
+    A lógica de resolução de nome de solicitante foi simplificada para esta versão.
+    Com o espelho local pronto, os tickets vêm dele; os nomes vêm do diretório de usuários.
+    """
+    limit = max(1, min(limit, NEW_TICKETS_MAX_LIMIT))
+    if await mirror.is_ready():
+        tickets_sorted = await mirror.newest_tickets(STATUS["NEW"], limit)
+    else:
+        with trace_phase("tickets-novos"):
+            tickets_sorted = await _search_new_tickets(api_url, session_headers, limit)
+
+    if not tickets_sorted:
+        return []
 
     # Otimização: Coletar IDs de requisitantes (campo 4) para buscar nomes em lote
     def get_first_numeric_id(value):
@@ -49,7 +80,7 @@ def get_new_tickets(api_url: str, session_headers: Dict[str, str]) -> List[Dict[
         if isinstance(rid, int):
             requester_ids.append(rid)
 
-    user_names_map = glpi_client.get_user_names_in_batch_with_fallback(session_headers, api_url, requester_ids)
+    user_names_map = await user_directory.get_names(session_headers, api_url, requester_ids)
 
     result = []
     for ticket in tickets_sorted:
@@ -0,0 +1,335 @@
+"""
+Diretório de nomes de usuários do GLPI (requerentes e técnicos).
+Mantém em memória o nome de cada ID com TTL longo e cache negativo para usuários
+inexistentes. Os nomes que faltam são resolvidos em lote por uma única busca
+/search/User (IDs combinados com OR); só os IDs que a busca não devolver caem para
+GET /User/{id}. Nomes vencidos continuam sendo servidos enquanto são renovados em
+segundo plano. Opcionalmente (USER_DIRECTORY_PATH), o diretório é gravado em um
+arquivo JSON e recarregado no startup, evitando resolver todos de novo após um restart.
+"""
+import asyncio
+import json
+import logging
+import os
+import tempfile
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+import httpx
+
+import backend.glpi_client as glpi_client
+from backend.logic.errors import GLPIAuthError, GLPINetworkError, GLPISearchError
+from backend.logic.glpi_constants import FIELD_USER_FIRSTNAME, FIELD_USER_ID, FIELD_USER_REALNAME
+from backend.utils.cache import SingleFlight
+from backend.utils.metrics import detach_route
+from backend.utils.resilience import detach_budget
+from backend.utils.tracing import detach_trace, trace_phase
+
+logger = logging.getLogger(__name__)
+
+# Validade de um nome resolvido; depois dela o nome ainda é servido e renovado em segundo plano
+USER_DIRECTORY_TTL_SEC = float(os.environ.get("USER_DIRECTORY_TTL_SEC", str(24 * 3600)))
+# Validade do cache negativo (usuário inexistente no GLPI)
+USER_DIRECTORY_NEGATIVE_TTL_SEC = float(os.environ.get("USER_DIRECTORY_NEGATIVE_TTL_SEC", "3600"))
+# Arquivo JSON de persistência (vazio desliga)
+USER_DIRECTORY_PATH = os.environ.get("USER_DIRECTORY_PATH", "").strip()
+# IDs por busca /search/User (limita o tamanho da URL com os critérios OR)
+USER_DIRECTORY_BATCH_SIZE = 50
+
+NOT_FOUND_LABEL = "Usuário ID {} (Não Encontrado)"
+# Usuário existente sem nome nem sobrenome (mesmo rótulo na busca em lote e no GET /User/{id})
+UNNAMED_LABEL = "Usuário ID {}"
+INCOMPLETE_LABEL = "Usuário ID {} (Dados Incompletos)"
+
+# (nome ou None para inexistente, instante da resolução)
+Entry = Tuple[Optional[str], float]
+
+
+def _full_name(firstname: Any, realname: Any) -> str:
+    return f"{firstname or ''} {realname or ''}".strip()
+
+
+class UserDirectory:
+    """
+    Mapa user_id -> nome compartilhado por todos os endpoints do processo.
+    Cada resolução de IDs faltantes roda uma vez por lote (single-flight): uma requisição
+    concorrente aguarda os lotes em voo que já contêm seus IDs e só inicia um lote para
+    os demais, sem serializar resoluções independentes.
+    """
+
+    def __init__(self, path: str = USER_DIRECTORY_PATH):
+        self.path = path
+        self._entries: Dict[int, Entry] = {}
+        self._flight = SingleFlight()
+        # user_id -> chave do lote em voo que o resolve
+        self._resolving: Dict[int, str] = {}
+        self._refreshing: Set[int] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._dirty = False
+        self.hits = 0
+        self.misses = 0
+        self.negative_hits = 0
+        self.bulk_searches = 0
+        self.single_lookups = 0
+        self.background_refreshes = 0
+        self.errors = 0
+
+    # --- entradas -------------------------------------------------------------------
+
+    def _expired(self, entry: Entry, now: float) -> bool:
+        name, ts = entry
+        ttl = USER_DIRECTORY_TTL_SEC if name is not None else USER_DIRECTORY_NEGATIVE_TTL_SEC
+        return now - ts > ttl
+
+    def _put(self, user_id: int, name: Optional[str], now: Optional[float] = None) -> None:
+        self._entries[user_id] = (name, time.time() if now is None else now)
+        self._dirty = True
+
+    def remember_rows(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """
+        Aproveita linhas de /search/User (uid_cols=0) que já tragam ID, nome e sobrenome,
+        como a busca de membros do grupo técnico do ranking. Retorna os nomes gravados.
+        """
+        now = time.time()
+        stored = 0
+        for row in rows:
+            user_id = str(row.get(str(FIELD_USER_ID), ""))
+            if not user_id.isdigit():
+                continue
+            name = _full_name(row.get(str(FIELD_USER_FIRSTNAME)), row.get(str(FIELD_USER_REALNAME)))
+            if name:
+                self._put(int(user_id), name, now)
+                stored += 1
+        return stored
+
+    def _label(self, user_id: int) -> str:
+        name, _ = self._entries[user_id]
+        return name if name is not None else NOT_FOUND_LABEL.format(user_id)
+
+    # --- resolução no GLPI ----------------------------------------------------------
+
+    async def _search_batch(self, headers: Dict[str, str], api_url: str, ids: List[int]) -> Dict[int, str]:
+        criteria: List[Dict[str, Any]] = []
+        for i, user_id in enumerate(ids):
+            criterion = {"field": str(FIELD_USER_ID), "searchtype": "equals", "value": str(user_id)}
+            if i > 0:
+                criterion["link"] = "OR"
+            criteria.append(criterion)
+        rows = await glpi_client.search_paginated(
+            headers,
+            api_url,
+            "User",
+            criteria,
+            forcedisplay=[str(FIELD_USER_ID), str(FIELD_USER_FIRSTNAME), str(FIELD_USER_REALNAME)],
+            uid_cols=False,
+            range_step=len(ids),
+        )
+        self.bulk_searches += 1
+        found: Dict[int, str] = {}
+        for row in rows:
+            user_id = str(row.get(str(FIELD_USER_ID), ""))
+            name = _full_name(row.get(str(FIELD_USER_FIRSTNAME)), row.get(str(FIELD_USER_REALNAME)))
+            if user_id.isdigit() and int(user_id) in ids:
+                found[int(user_id)] = name or UNNAMED_LABEL.format(user_id)
+        return found
+
+    async def _fetch_one(self, headers: Dict[str, str], api_url: str, user_id: int) -> Tuple[int, Optional[str], bool]:
+        """GET /User/{id}: (id, nome ou None se inexistente, se o resultado pode ser cacheado)."""
+        self.single_lookups += 1
+        try:
+            response = await glpi_client.request("GET", f"{api_url}/User/{user_id}", headers=headers)
+            user_data = response.json()
+            # A API pode retornar uma lista mesmo para um único ID
+            if isinstance(user_data, list) and user_data:
+                user_data = user_data[0]
+            name = _full_name(user_data.get("firstname"), user_data.get("realname"))
+            return user_id, name or UNNAMED_LABEL.format(user_id), True
+        except httpx.HTTPStatusError as e:
+            # 404: usuário inexistente (cache negativo); demais falhas não são cacheadas
+            return user_id, None, e.response.status_code == 404
+        except httpx.HTTPError:
+            return user_id, None, False
+        except (IndexError, KeyError, TypeError, ValueError, AttributeError):
+            return user_id, INCOMPLETE_LABEL.format(user_id), True
+
+    async def _resolve(self, headers: Dict[str, str], api_url: str, ids: List[int]) -> Dict[int, Optional[str]]:
+        """Resolve `ids` no GLPI e grava no diretório; IDs com falha transitória ficam de fora."""
+        resolved: Dict[int, Optional[str]] = {}
+        batches = [ids[i:i + USER_DIRECTORY_BATCH_SIZE] for i in range(0, len(ids), USER_DIRECTORY_BATCH_SIZE)]
+        try:
+            for found in await glpi_client.gather_limited(
+                glpi_client.USER_LOOKUP_CONCURRENCY, (self._search_batch(headers, api_url, b) for b in batches)
+            ):
+                resolved.update(found)
+        except (GLPIAuthError, GLPINetworkError, GLPISearchError) as e:
+            # Sem permissão de busca em User ou GLPI instável: cai para GET /User/{id}
+            self.errors += 1
+            logger.warning("user_directory_search_failed error=%s detail=%s", type(e).__name__, e)
+
+        missing = [user_id for user_id in ids if user_id not in resolved]
+        results = await glpi_client.gather_limited(
+            glpi_client.USER_LOOKUP_CONCURRENCY, (self._fetch_one(headers, api_url, uid) for uid in missing)
+        )
+        now = time.time()
+        for user_id, name in resolved.items():
+            self._put(user_id, name, now)
+        for user_id, name, cacheable in results:
+            if cacheable:
+                self._put(user_id, name, now)
+                resolved[user_id] = name
+        return resolved
+
+    def _batch_loader(self, headers: Dict[str, str], api_url: str, key: str) -> Callable[[], Awaitable[None]]:
+        ids = [int(uid) for uid in key.split("|", 1)[1].split(",")]
+
+        async def load() -> None:
+            try:
+                # O lote pode ter terminado antes deste loader começar: resolve só o que falta
+                pending = [uid for uid in ids if uid not in self._entries]
+                if pending:
+                    with trace_phase("nomes-usuarios"):
+                        await self._resolve(headers, api_url, pending)
+            finally:
+                for uid in ids:
+                    if self._resolving.get(uid) == key:
+                        del self._resolving[uid]
+
+        return load
+
+    def _refresh_in_background(self, headers: Dict[str, str], api_url: str, ids: List[int]) -> None:
+        pending = [user_id for user_id in ids if user_id not in self._refreshing]
+        if not pending:
+            return
+        self._refreshing.update(pending)
+
+        async def run() -> None:
+            detach_budget()
+            detach_trace()
+            detach_route()
+            try:
+                await self._resolve(headers, api_url, pending)
+                self.background_refreshes += 1
+                await self.save()
+            except Exception as e:
+                self.errors += 1
+                logger.warning("user_directory_refresh_failed ids=%s error=%s", len(pending), type(e).__name__)
+            finally:
+                self._refreshing.difference_update(pending)
+
+        task = asyncio.ensure_future(run())
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def get_names(self, headers: Dict[str, str], api_url: str, user_ids: Iterable[Any]) -> Dict[int, str]:
+        """
+        Mapa user_id -> nome para cada ID numérico de `user_ids`: "firstname realname";
+        UNNAMED_LABEL para usuário sem nome, INCOMPLETE_LABEL para resposta ilegível e
+        NOT_FOUND_LABEL para inexistente ou não resolvido (falha transitória no GLPI).
+        """
+        ids = sorted({int(uid) for uid in user_ids if str(uid).isdigit()})
+        now = time.time()
+        expired = [uid for uid in ids if uid in self._entries and self._expired(self._entries[uid], now)]
+        missing = [uid for uid in ids if uid not in self._entries]
+        if missing:
+            # Sem await até registrar o novo lote: requisições concorrentes veem os mesmos IDs em voo
+            keys = {self._resolving[uid] for uid in missing if uid in self._resolving}
+            new = [uid for uid in missing if uid not in self._resolving]
+            if new:
+                self.misses += len(new)
+                key = "nomes-usuarios|" + ",".join(map(str, new))
+                self._resolving.update(dict.fromkeys(new, key))
+                keys.add(key)
+            await asyncio.gather(*(
+                self._flight.do(key, self._batch_loader(headers, api_url, key)) for key in sorted(keys)
+            ))
+            await self.save()
+        if expired:
+            self._refresh_in_background(headers, api_url, expired)
+
+        names: Dict[int, str] = {}
+        for uid in ids:
+            if uid in self._entries:
+                if self._entries[uid][0] is None:
+                    self.negative_hits += 1
+                else:
+                    self.hits += 1
+                names[uid] = self._label(uid)
+            else:
+                names[uid] = NOT_FOUND_LABEL.format(uid)
+        return names
+
+    # --- persistência ---------------------------------------------------------------
+
+    def _load_file(self) -> int:
+        with open(self.path, encoding="utf-8") as f:
+            data = json.load(f)
+        for user_id, (name, ts) in data.get("users", {}).items():
+            if str(user_id).isdigit():
+                self._entries.setdefault(int(user_id), (name, float(ts)))
+        return len(self._entries)
+
+    def _save_file(self, snapshot: Dict[str, Entry]) -> None:
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".users-", suffix=".json")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"users": snapshot}, f, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    async def load(self) -> None:
+        """Recarrega o arquivo de persistência, se configurado (chamado no startup)."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            loaded = await asyncio.to_thread(self._load_file)
+            logger.info("user_directory_loaded path=%s users=%s", self.path, loaded)
+        except (OSError, ValueError, TypeError) as e:
+            self.errors += 1
+            logger.warning("user_directory_load_failed path=%s error=%s", self.path, e)
+
+    async def save(self) -> None:
+        """Grava o diretório no arquivo de persistência, se configurado e alterado."""
+        if not self.path or not self._dirty:
+            return
+        self._dirty = False
+        snapshot = {str(uid): entry for uid, entry in self._entries.items()}
+        try:
+            await asyncio.to_thread(self._save_file, snapshot)
+        except OSError as e:
+            self.errors += 1
+            logger.warning("user_directory_save_failed path=%s error=%s", self.path, e)
+
+    async def close(self) -> None:
+        """Aguarda renovações em andamento e grava o diretório (chamado no shutdown)."""
+        for task in list(self._tasks):
+            task.cancel()
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        await self.save()
+
+    def clear(self) -> None:
+        """Esquece todos os nomes (o arquivo persistido não é alterado)."""
+        self._entries.clear()
+        self._dirty = False
+
+    def stats(self) -> Dict[str, Any]:
+        negatives = sum(1 for name, _ in self._entries.values() if name is None)
+        return {
+            "users": len(self._entries) - negatives,
+            "negative": negatives,
+            "hits": self.hits,
+            "misses": self.misses,
+            "negative_hits": self.negative_hits,
+            "bulk_searches": self.bulk_searches,
+            "single_lookups": self.single_lookups,
+            "background_refreshes": self.background_refreshes,
+            "errors": self.errors,
+            "path": self.path or None,
+        }
+
+
+# Instância global (carregada e gravada no ciclo de vida em backend/main.py)
+user_directory = UserDirectory()
@@ -2,13 +2,16 @@
 Backend FastAPI: Ponto de entrada principal da aplicação.
 Este arquivo inicializa a aplicação FastAPI e inclui os roteadores modulares.
 """
+from contextlib import asynccontextmanager
+from functools import partial
 import logging
 import os
+from typing import List
 
 from dotenv import load_dotenv
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse
 
 # Constrói o caminho absoluto para o arquivo .env dentro da pasta 'backend'
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
@@ -21,25 +24,118 @@ from backend.utils.logging_setup import configure_logging
 configure_logging()
 
 # Os roteadores são importados DEPOIS que as variáveis de ambiente foram carregadas
-from backend.api import ranking_router, stats_router, tickets_router
+from backend.api import monitoring_router, ranking_router, stats_router, tickets_router
+import backend.glpi_client as glpi_client
+from backend.logic.ticket_mirror import MIRROR_ENABLED, mirror
+from backend.logic.user_directory import user_directory
+from backend.utils.cache import cache
+from backend.utils.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from backend.utils.metrics import MetricsMiddleware, registry
+from backend.utils.prewarm import PREWARM_ENABLED, WarmJob, popular_ranges, scheduler
+from backend.utils.request_budget import RequestBudgetMiddleware
+from backend.utils.tracing import TracingMiddleware
+
+
+def build_prewarm_jobs() -> List[WarmJob]:
+    """
+    Visões mantidas quentes pelo pré-aquecimento: tickets novos e, para cada intervalo
+    popular (sem filtro, últimos 30 dias, hoje, semana, mês), a matriz de contagens
+    por status (base de métricas gerais e status por nível) e o ranking. Reavaliado a cada ciclo para acompanhar a virada do dia.
+    """
+    API_URL = os.getenv("API_URL")
+    APP_TOKEN = os.getenv("APP_TOKEN")
+    USER_TOKEN = os.getenv("USER_TOKEN")
+    if not all([API_URL, APP_TOKEN, USER_TOKEN]):
+        return []
+
+    creds = (API_URL, APP_TOKEN, USER_TOKEN)
+    jobs = [
+        WarmJob(
+            tickets_router.new_tickets_cache_key(),
+            partial(tickets_router.load_new_tickets, *creds),
+            tickets_router.TICKETS_CACHE_TTL_SEC,
+            tickets_router.CACHE_STALE_TTL_SEC,
+        )
+    ]
+    for inicio, fim in popular_ranges():
+        jobs += [
+            WarmJob(
+                stats_router.status_counts_cache_key(inicio, fim),
+                partial(stats_router.load_status_counts, *creds, inicio, fim),
+                stats_router.CACHE_TTL_SEC,
+                stats_router.CACHE_STALE_TTL_SEC,
+            ),
+            WarmJob(
+                ranking_router.ranking_cache_key(inicio, fim),
+                partial(ranking_router.load_ranking, *creds, inicio, fim),
+                ranking_router.CACHE_TTL_SEC,
+                ranking_router.CACHE_STALE_TTL_SEC,
+            ),
+        ]
+    return jobs
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Ciclo de vida: inicia a varredura de expirados do cache, recarrega o diretório de
+    usuários persistido, o espelho local de tickets (se MIRROR_ENABLED) e o
+    pré-aquecimento no startup; no shutdown, grava o diretório, encerra as sessões
+    GLPI e libera o pool de conexões.
+    """
+    cache.start_sweeper()
+    await user_directory.load()
+    API_URL = os.getenv("API_URL")
+    APP_TOKEN = os.getenv("APP_TOKEN")
+    USER_TOKEN = os.getenv("USER_TOKEN")
+    if MIRROR_ENABLED and all([API_URL, APP_TOKEN, USER_TOKEN]):
+        mirror.configure(API_URL, partial(glpi_client.authenticate, API_URL, APP_TOKEN, USER_TOKEN))
+        mirror.start()
+    if PREWARM_ENABLED:
+        scheduler.configure(build_prewarm_jobs)
+        scheduler.start()
+    yield
+    await scheduler.stop()
+    await mirror.stop()
+    await user_directory.close()
+    await cache.stop_sweeper()
+    await cache.close()
+    await glpi_client.close_sessions()
+    await glpi_client.close_client()
+
 
 # Cria a instância principal da aplicação FastAPI
 app = FastAPI(
     title="GLPI Dashboard API",
     description="API para fornecer dados de tickets do GLPI para o dashboard.",
-    version="3.1.0" # Bump de versão para refletir a correção final
+    version="3.1.0", # Bump de versão para refletir a correção final
+    lifespan=lifespan,
 )
 
+# Prazo por requisição para as chamadas ao GLPI (GLPI_REQUEST_BUDGET_SEC)
+app.add_middleware(RequestBudgetMiddleware)
+# Request-id, fases e chamadas ao GLPI por requisição (headers X-Request-ID e Server-Timing)
+app.add_middleware(TracingMiddleware)
+# Latência por rota para /metrics (mais externo: mede também o prazo e os erros)
+app.add_middleware(MetricsMiddleware)
+
 # Adiciona um endpoint raiz para verificação de status
 @app.get("/")
 def read_root():
     """Endpoint raiz para verificar se a API está funcionando."""
     return {"message": "GLPI Dashboard API", "version": app.version}
 
+
+@app.get("/metrics", include_in_schema=False)
+async def read_metrics():
+    """Métricas no formato de texto do Prometheus (latências da API e do GLPI, cache, pools)."""
+    return PlainTextResponse(registry.render(), media_type=METRICS_CONTENT_TYPE)
+
 # Inclui os roteadores modulares na aplicação principal
 app.include_router(ranking_router.router)
 app.include_router(stats_router.router)
 app.include_router(tickets_router.router)
+app.include_router(monitoring_router.router)
 
 """Montagem de estáticos do frontend em /dashboard.
 Usamos StaticFiles com html=True para que quaisquer rotas desconhecidas
@@ -0,0 +1,126 @@
+"""
+Servidor local que fala o subconjunto do protocolo Redis (RESP2) usado pelo RedisBackend:
+GET, SET (NX/PX), DEL, AUTH, SELECT e EVAL do script de unlock. Guarda os dados em
+memória e permite atrasar respostas (`delay`) para simular um servidor lento.
+"""
+import asyncio
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from backend.utils.cache_backends import REDIS_UNLOCK_SCRIPT
+
+
+def _encode(value: Any) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    if isinstance(value, int):
+        return b":%d\r\n" % value
+    if isinstance(value, bytes):
+        return b"$%d\r\n%s\r\n" % (len(value), value)
+    return b"+%s\r\n" % str(value).encode()
+
+
+def _error(message: str) -> bytes:
+    return b"-%s\r\n" % message.encode()
+
+
+class RedisStub:
+    def __init__(self, password: Optional[str] = None):
+        self.password = password
+        self.delay = 0.0
+        self.connections = 0
+        self.commands: List[Tuple[str, ...]] = []
+        # chave -> (valor, expiração em time.monotonic() ou None)
+        self.data: Dict[bytes, Tuple[bytes, Optional[float]]] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.port = 0
+
+    async def start(self, port: int = 0) -> "RedisStub":
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    @property
+    def url(self) -> str:
+        auth = f":{self.password}@" if self.password else ""
+        return f"redis://{auth}127.0.0.1:{self.port}/0"
+
+    def _get(self, key: bytes) -> Optional[bytes]:
+        item = self.data.get(key)
+        if item is None:
+            return None
+        value, expires = item
+        if expires is not None and time.monotonic() >= expires:
+            del self.data[key]
+            return None
+        return value
+
+    async def _read_command(self, reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+        line = await reader.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            size = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(size + 2))[:-2])
+        return args
+
+    def _execute(self, args: List[bytes], state: Dict[str, bool]) -> bytes:
+        name = args[0].decode().upper()
+        self.commands.append((name, *(a.decode(errors="replace") for a in args[1:])))
+        if name == "AUTH":
+            if args[-1].decode() != self.password:
+                return _error("WRONGPASS invalid password")
+            state["auth"] = True
+            return _encode("OK")
+        if self.password and not state.get("auth"):
+            return _error("NOAUTH Authentication required")
+        if name == "SELECT":
+            return _encode("OK")
+        if name == "GET":
+            return _encode(self._get(args[1]))
+        if name == "SET":
+            key, value = args[1], args[2]
+            options = [a.decode().upper() for a in args[3:]]
+            expires = None
+            if "PX" in options:
+                expires = time.monotonic() + int(args[3 + options.index("PX") + 1]) / 1000
+            if "NX" in options and self._get(key) is not None:
+                return _encode(None)
+            self.data[key] = (value, expires)
+            return _encode("OK")
+        if name == "DEL":
+            return _encode(sum(1 for key in args[1:] if self.data.pop(key, None) is not None))
+        if name == "EVAL":
+            if args[1].decode() != REDIS_UNLOCK_SCRIPT:
+                return _error("ERR script não suportado pelo stub")
+            key, owner = args[3], args[4]
+            if self._get(key) == owner:
+                del self.data[key]
+                return _encode(1)
+            return _encode(0)
+        return _error(f"ERR unknown command '{name}'")
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        state: Dict[str, bool] = {}
+        try:
+            while True:
+                args = await self._read_command(reader)
+                if args is None:
+                    break
+                reply = self._execute(args, state)
+                if self.delay:
+                    await asyncio.sleep(self.delay)
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
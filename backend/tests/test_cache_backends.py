@@ -0,0 +1,167 @@
+import asyncio
+import time
+
+import pytest
+
+from backend.tests.redis_stub import RedisStub
+from backend.utils.cache_backends import RedisBackend, SharedBackend, SharedCacheError, SharedRecord
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+async def _started(password=None):
+    stub = await RedisStub(password=password).start()
+    backend = RedisBackend(stub.url, prefix="t:", timeout=0.5, lock_ttl=1.0, retry_after=0.2)
+    return stub, backend
+
+
+def test_shared_backend_is_abstract():
+    with pytest.raises(TypeError):
+        SharedBackend()
+
+
+def test_record_roundtrip_with_auth_and_delete():
+    async def scenario():
+        stub, backend = await _started(password="segredo")
+        try:
+            record = SharedRecord({"total": 3}, time.time(), 60, 60)
+            await backend.set("k", record)
+            assert await backend.get("k") == record
+            await backend.delete("k")
+            assert await backend.get("k") is None
+            assert stub.commands[0] == ("AUTH", "segredo")
+            assert stub.connections == 1
+        finally:
+            await backend.close()
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_lock_is_exclusive_and_unlock_checks_owner():
+    async def scenario():
+        stub, backend = await _started()
+        try:
+            assert await backend.try_lock("k", "a", 1.0)
+            assert not await backend.try_lock("k", "b", 1.0)
+            # Quem não é dono não remove o lock
+            await backend.unlock("k", "b")
+            assert not await backend.try_lock("k", "b", 1.0)
+            await backend.unlock("k", "a")
+            assert await backend.try_lock("k", "b", 1.0)
+            assert any(command[0] == "EVAL" for command in stub.commands)
+        finally:
+            await backend.close()
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_expired_lock_taken_by_other_owner_is_not_released():
+    async def scenario():
+        stub, backend = await _started()
+        try:
+            assert await backend.try_lock("k", "a", 0.05)
+            await asyncio.sleep(0.1)
+            assert await backend.try_lock("k", "b", 1.0)
+            # O dono antigo termina atrasado e não pode apagar o lock do novo dono
+            await backend.unlock("k", "a")
+            assert stub.data[b"t:lock:k"][0] == b"b"
+        finally:
+            await backend.close()
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_lock_context_serializes_holders():
+    async def scenario():
+        stub, backend = await _started()
+        events = []
+
+        async def holder(name):
+            async with backend.lock("k") as acquired:
+                events.append((name, "in", acquired))
+                await asyncio.sleep(0.1)
+                events.append((name, "out", acquired))
+
+        try:
+            await asyncio.gather(holder("a"), holder("b"))
+            assert [event[1] for event in events] == ["in", "out", "in", "out"]
+            assert all(event[2] for event in events)
+            assert backend.lock_waits == 1
+        finally:
+            await backend.close()
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_cancelled_command_does_not_leave_reply_on_connection():
+    async def scenario():
+        stub, backend = await _started()
+        try:
+            await backend.command("SET", "a", "1")
+            await backend.command("SET", "b", "2")
+            stub.delay = 0.3
+            task = asyncio.create_task(backend.command("GET", "a"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            stub.delay = 0.0
+            # Sem descartar a conexão, este GET leria a resposta pendente do anterior ("1")
+            assert await backend.command("GET", "b") == b"2"
+            assert stub.connections == 2
+        finally:
+            await backend.close()
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_timeout_drops_connection_and_backs_off():
+    async def scenario():
+        stub, backend = await _started()
+        try:
+            stub.delay = 1.0
+            with pytest.raises(SharedCacheError, match="TimeoutError"):
+                await backend.get("k")
+            stub.delay = 0.0
+            # Dentro da janela de espera nenhuma conexão é tentada
+            with pytest.raises(SharedCacheError, match="indisponível"):
+                await backend.get("k")
+            assert stub.connections == 1
+            await asyncio.sleep(0.25)
+            assert await backend.get("k") is None
+            assert stub.connections == 2
+        finally:
+            await backend.close()
+            await stub.stop()
+
+    run(scenario())
+
+
+def test_unreachable_server_backs_off_then_reconnects():
+    async def scenario():
+        stub, backend = await _started()
+        port = stub.port
+        await stub.stop()
+        try:
+            with pytest.raises(SharedCacheError, match="ConnectionRefusedError"):
+                await backend.get("k")
+            with pytest.raises(SharedCacheError, match="indisponível"):
+                await backend.get("k")
+            # O lock segue sem coordenação enquanto o backend está fora
+            async with backend.lock("k") as acquired:
+                assert acquired is False
+            stub = await RedisStub().start(port)
+            await asyncio.sleep(0.25)
+            assert await backend.try_lock("k", "a", 1.0)
+        finally:
+            await backend.close()
+            await stub.stop()
+
+    run(scenario())
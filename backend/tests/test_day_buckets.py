@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from backend.logic import day_buckets
+from backend.logic.day_buckets import (
+    DAY_BUCKET_SETTLED_AFTER_DAYS,
+    DAY_BUCKET_SETTLED_TTL_SEC,
+    DAY_BUCKET_TODAY_TTL_SEC,
+    DAY_BUCKET_TTL_SEC,
+    day_bucket_ttl,
+)
+
+TODAY = date(2026, 3, 10)
+
+
+def _ttl(days_ago):
+    return day_bucket_ttl(TODAY - timedelta(days=days_ago), TODAY)
+
+
+def test_ttl_tiers_with_glpi_timezone(monkeypatch):
+    monkeypatch.setattr(day_buckets, "_TODAY_MARGIN_DAYS", 0)
+    assert _ttl(-1) == DAY_BUCKET_TODAY_TTL_SEC
+    assert _ttl(0) == DAY_BUCKET_TODAY_TTL_SEC
+    assert _ttl(1) == DAY_BUCKET_TTL_SEC
+    assert _ttl(DAY_BUCKET_SETTLED_AFTER_DAYS) == DAY_BUCKET_TTL_SEC
+    assert _ttl(DAY_BUCKET_SETTLED_AFTER_DAYS + 1) == max(DAY_BUCKET_SETTLED_TTL_SEC, DAY_BUCKET_TTL_SEC)
+
+
+def test_ttl_without_timezone_keeps_the_eve_as_current_day(monkeypatch):
+    monkeypatch.setattr(day_buckets, "_TODAY_MARGIN_DAYS", 1)
+    # Perto da meia-noite UTC o dia local do GLPI pode ser a véspera
+    assert _ttl(1) == DAY_BUCKET_TODAY_TTL_SEC
+    assert _ttl(2) == DAY_BUCKET_TTL_SEC
+
+
+def test_settled_tier_stays_away_from_the_boundary(monkeypatch):
+    monkeypatch.setattr(day_buckets, "_TODAY_MARGIN_DAYS", 1)
+    monkeypatch.setattr(day_buckets, "DAY_BUCKET_SETTLED_AFTER_DAYS", 0)
+    assert _ttl(1) == DAY_BUCKET_TODAY_TTL_SEC
+    assert _ttl(2) == DAY_BUCKET_TTL_SEC
+    assert _ttl(3) == max(DAY_BUCKET_SETTLED_TTL_SEC, DAY_BUCKET_TTL_SEC)
+
+
+def test_today_follows_glpi_timezone(monkeypatch):
+    zone = day_buckets.ZoneInfo("America/Sao_Paulo")
+    monkeypatch.setattr(day_buckets, "_GLPI_ZONE", zone)
+    assert day_buckets._glpi_today() == day_buckets.datetime.now(zone).date()
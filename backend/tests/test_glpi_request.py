@@ -0,0 +1,152 @@
+import asyncio
+
+import httpx
+import pytest
+
+import backend.glpi_client as glpi_client
+from backend.utils.request_budget import RequestBudgetMiddleware
+from backend.utils.resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    DeadlineExceeded,
+    deadline_budget,
+    remaining_budget,
+)
+
+URL = "http://glpi.test/apirest.php/search/Ticket"
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+@pytest.fixture
+def glpi(monkeypatch):
+    """Cliente do GLPI sobre um MockTransport que responde com a sequência de `replies`."""
+    state = {"replies": [], "calls": 0}
+
+    async def handler(request):
+        state["calls"] += 1
+        reply = state["replies"].pop(0) if state["replies"] else 200
+        if callable(reply):
+            reply = await reply()
+        if isinstance(reply, Exception):
+            raise reply
+        return httpx.Response(reply, json={})
+
+    monkeypatch.setattr(glpi_client, "get_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    monkeypatch.setattr(glpi_client, "breaker", CircuitBreaker(enabled=False))
+    monkeypatch.setattr(glpi_client, "_retry_delay", lambda attempt: 0.0)
+    return state
+
+
+@pytest.mark.parametrize("reply", [500, 503, httpx.ConnectError("recusada"), httpx.ReadTimeout("lento")])
+def test_transient_failures_are_retried(glpi, reply):
+    glpi["replies"] = [reply, reply, 200]
+    response = run(glpi_client.request("GET", URL, headers={}))
+    assert response.status_code == 200
+    assert glpi["calls"] == 3
+
+
+def test_retries_stop_after_max_attempts(glpi):
+    glpi["replies"] = [503] * 5
+    with pytest.raises(httpx.HTTPStatusError):
+        run(glpi_client.request("GET", URL, headers={}))
+    assert glpi["calls"] == glpi_client.RETRY_MAX_ATTEMPTS
+
+
+@pytest.mark.parametrize("status", [400, 403, 404])
+def test_client_errors_are_not_retried(glpi, status):
+    glpi["replies"] = [status, 200]
+    with pytest.raises(httpx.HTTPStatusError):
+        run(glpi_client.request("GET", URL, headers={}))
+    assert glpi["calls"] == 1
+
+
+def test_non_idempotent_methods_are_not_retried_by_default(glpi):
+    glpi["replies"] = [503, 200]
+    with pytest.raises(httpx.HTTPStatusError):
+        run(glpi_client.request("POST", URL, headers={}, json={}))
+    assert glpi["calls"] == 1
+
+
+def test_open_circuit_fails_without_calling_or_retrying(glpi, monkeypatch):
+    breaker = CircuitBreaker(window=1, min_calls=1, open_sec=60)
+    breaker.record(False)
+    monkeypatch.setattr(glpi_client, "breaker", breaker)
+    with pytest.raises(CircuitOpenError):
+        run(glpi_client.request("GET", URL, headers={}))
+    assert glpi["calls"] == 0
+
+
+def test_backoff_longer_than_remaining_budget_is_not_waited(glpi, monkeypatch):
+    monkeypatch.setattr(glpi_client, "_retry_delay", lambda attempt: 0.5)
+    glpi["replies"] = [503, 200]
+
+    async def scenario():
+        with deadline_budget(0.2):
+            with pytest.raises(httpx.HTTPStatusError):
+                await glpi_client.request("GET", URL, headers={})
+
+    run(scenario())
+    assert glpi["calls"] == 1
+
+
+def test_no_retry_once_deadline_is_spent(glpi):
+    async def slow_timeout():
+        await asyncio.sleep(0.1)
+        return httpx.ReadTimeout("lento")
+
+    glpi["replies"] = [slow_timeout, 200]
+
+    async def scenario():
+        with deadline_budget(0.05):
+            # O timeout veio do prazo da requisição: DeadlineExceeded, sem nova tentativa
+            with pytest.raises(DeadlineExceeded):
+                await glpi_client.request("GET", URL, headers={})
+            with pytest.raises(DeadlineExceeded):
+                await glpi_client.request("GET", URL, headers={})
+
+    run(scenario())
+    assert glpi["calls"] == 1
+
+
+def test_retry_delay_is_capped(monkeypatch):
+    monkeypatch.setattr(glpi_client.random, "uniform", lambda low, high: high)
+    delays = [glpi_client._retry_delay(attempt) for attempt in range(8)]
+    assert delays == sorted(delays)
+    assert delays[0] == glpi_client.RETRY_BASE_DELAY_SEC
+    assert max(delays) == glpi_client.RETRY_MAX_DELAY_SEC
+
+
+def test_timeout_is_fitted_to_budget():
+    fitted = glpi_client._fit_timeout(httpx.Timeout(10.0, connect=None), 0.5)
+    assert (fitted.connect, fitted.read, fitted.write, fitted.pool) == (0.5, 0.5, 0.5, 0.5)
+
+
+@pytest.mark.parametrize(
+    "path, budgeted",
+    [("/api/v1/ranking-tecnicos", True), ("/api/v1/monitoramento/cache", False), ("/", False)],
+)
+def test_budget_middleware_applies_to_api_paths(path, budgeted):
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(remaining_budget())
+
+    middleware = RequestBudgetMiddleware(app, budget_sec=5)
+    run(middleware({"type": "http", "path": path}, None, None))
+    if budgeted:
+        assert 4 < seen[0] <= 5
+    else:
+        assert seen == [None]
+
+
+def test_budget_middleware_disabled_with_zero():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(remaining_budget())
+
+    run(RequestBudgetMiddleware(app, budget_sec=0)({"type": "http", "path": "/api/v1/x"}, None, None))
+    assert seen == [None]
@@ -0,0 +1,59 @@
+import asyncio
+import time
+
+from backend.logic import ranking_logic
+from backend.utils.cache import cache
+from backend.utils.cache_backends import SharedRecord
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_empty_group_is_not_cached(monkeypatch):
+    searches = []
+    members = []
+
+    async def search(headers, api_url, parent_group_id, searchtype):
+        searches.append(searchtype)
+        return list(members)
+
+    monkeypatch.setattr(ranking_logic, "_search_group_members", search)
+    group_id = 9901
+    key = ranking_logic.group_members_cache_key(group_id)
+
+    async def scenario():
+        try:
+            # Resposta vazia (transitória): nada fica em cache, a próxima chamada busca de novo
+            assert await ranking_logic.get_group_members({}, "http://glpi", group_id) == []
+            assert cache.get(key) is None
+            members.append({"2": "7", "9": "Ana", "34": "Silva"})
+            assert await ranking_logic.get_group_members({}, "http://glpi", group_id) == [7]
+            assert searches == ["under", "equals", "under"]
+        finally:
+            await ranking_logic.invalidate_group_members(group_id)
+
+    run(scenario())
+
+
+def test_empty_revalidation_keeps_previous_members(monkeypatch):
+    async def search(headers, api_url, parent_group_id, searchtype):
+        return []
+
+    monkeypatch.setattr(ranking_logic, "_search_group_members", search)
+    group_id = 9902
+    key = ranking_logic.group_members_cache_key(group_id)
+
+    async def scenario():
+        try:
+            # Composição vencida, mas ainda na janela stale: revalidação vazia não a substitui
+            cache._install(key, SharedRecord([5, 6], time.time() - 10, 1, 3600))
+            failures = cache.revalidation_failures
+            assert await ranking_logic.get_group_members({}, "http://glpi", group_id) == [5, 6]
+            await asyncio.sleep(0.05)
+            assert cache.revalidation_failures == failures + 1
+            assert await ranking_logic.get_group_members({}, "http://glpi", group_id) == [5, 6]
+        finally:
+            await ranking_logic.invalidate_group_members(group_id)
+
+    run(scenario())
@@ -0,0 +1,138 @@
+import asyncio
+import time
+
+from backend.utils.resilience import AdaptiveLimiter, CircuitBreaker
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _open(breaker):
+    for ok in (False, False, True, True):
+        assert breaker.allow()
+        breaker.record(ok, breaker.generation)
+
+
+def test_limiter_shrinks_once_per_window_down_to_minimum():
+    limiter = AdaptiveLimiter(10, minimum=2, target_latency=0.05, backoff=0.5)
+    limiter.observe(0.2, True)
+    assert int(limiter.limit) == 5
+    # Outra resposta lenta na mesma janela não reduz de novo
+    limiter.observe(0.2, True)
+    limiter.observe(0.01, False)
+    assert int(limiter.limit) == 5
+    for _ in range(3):
+        time.sleep(0.06)
+        limiter.observe(0.01, False)
+    assert limiter.limit == 2.0
+    assert limiter.decreases == 2
+
+
+def test_limiter_grows_one_slot_per_window_of_fast_responses():
+    limiter = AdaptiveLimiter(4, minimum=2, target_latency=0.05, backoff=0.5)
+    limiter.observe(0.2, True)
+    assert int(limiter.limit) == 2
+    # Aumento aditivo: cerca de uma vaga a cada `limit` respostas rápidas
+    limiter.observe(0.01, True)
+    limiter.observe(0.01, True)
+    assert int(limiter.limit) == 2
+    limiter.observe(0.01, True)
+    assert int(limiter.limit) == 3
+    for _ in range(10):
+        limiter.observe(0.01, True)
+    assert limiter.limit == 4.0
+    assert limiter.increases == 2
+
+
+def test_limiter_growth_wakes_waiters():
+    async def scenario():
+        limiter = AdaptiveLimiter(4, minimum=1, target_latency=0.05, backoff=0.25)
+        limiter.observe(0.2, True)
+        assert int(limiter.limit) == 1
+        await limiter.acquire()
+        waiter = asyncio.ensure_future(limiter.acquire())
+        await asyncio.sleep(0)
+        assert not waiter.done() and limiter.waiting == 1
+        limiter.observe(0.01, True)
+        await asyncio.sleep(0)
+        assert waiter.done() and limiter.in_flight == 2
+
+    run(scenario())
+
+
+def test_limiter_not_adaptive_keeps_limit():
+    limiter = AdaptiveLimiter(4, adaptive=False)
+    limiter.observe(5.0, False)
+    assert limiter.limit == 4.0
+
+
+def test_breaker_closed_open_half_open_closed():
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, open_sec=0.05)
+    _open(breaker)
+    assert breaker.state == "open" and breaker.opened == 1
+    assert not breaker.allow()
+    time.sleep(0.06)
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    # Só uma chamada de teste por vez
+    assert not breaker.allow()
+    breaker.record(True, breaker.generation)
+    assert breaker.state == "closed"
+    assert breaker.allow()
+    assert breaker.rejected == 2
+
+
+def test_breaker_failed_probe_reopens():
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, open_sec=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(False, breaker.generation)
+    assert breaker.state == "open" and breaker.opened == 2
+
+
+def test_breaker_cancelled_probe_frees_the_slot():
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, open_sec=0.05)
+    _open(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(None, breaker.generation)
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+
+def test_breaker_ignores_calls_started_in_older_generation():
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, open_sec=0.05)
+    assert breaker.allow()
+    old = breaker.generation
+    _open(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    probe = breaker.generation
+    # A chamada antiga termina durante o half_open: não fecha o circuito
+    breaker.record(True, old)
+    assert breaker.state == "half_open"
+    breaker.record(False, probe)
+    assert breaker.state == "open"
+
+
+def test_breaker_window_does_not_count_calls_from_before_closing():
+    breaker = CircuitBreaker(window=4, min_calls=4, failure_ratio=0.5, open_sec=0.05)
+    assert breaker.allow()
+    old = breaker.generation
+    _open(breaker)
+    time.sleep(0.06)
+    assert breaker.allow()
+    breaker.record(True, breaker.generation)
+    assert breaker.state == "closed"
+    breaker.record(False, old)
+    assert breaker.stats()["recent_calls"] == 0
+
+
+def test_disabled_breaker_always_allows():
+    breaker = CircuitBreaker(window=4, min_calls=4, enabled=False)
+    for _ in range(10):
+        assert breaker.allow()
+        breaker.record(False)
+    assert breaker.state == "closed"
@@ -0,0 +1,108 @@
+import asyncio
+import time
+
+from backend.utils.cache import SingleFlight
+from backend.utils.metrics import SHARED_ROUTE, current_route
+from backend.utils.resilience import deadline_budget, remaining_budget
+from backend.utils.tracing import DEFAULT_PHASE, Trace, current_request_id, record_call, use_trace
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_followers_share_one_load():
+    async def scenario():
+        flight = SingleFlight()
+        calls = []
+
+        async def loader():
+            calls.append(1)
+            await asyncio.sleep(0.05)
+            return "valor"
+
+        results = await asyncio.gather(*(flight.do("k", loader) for _ in range(3)))
+        assert [value for value, _ in results] == ["valor"] * 3
+        assert [shared for _, shared in results] == [False, True, True]
+        assert len(calls) == 1
+
+    run(scenario())
+
+
+def test_shared_load_runs_with_widest_waiter_deadline():
+    async def scenario():
+        flight = SingleFlight()
+        seen = []
+
+        async def loader():
+            await asyncio.sleep(0.2)
+            # O líder tinha 0,1 s; o seguidor que chegou depois ampliou o prazo
+            seen.append(remaining_budget())
+            return "valor"
+
+        async def leader():
+            with deadline_budget(0.1):
+                return await flight.do("k", loader)
+
+        async def follower():
+            await asyncio.sleep(0.01)
+            with deadline_budget(5):
+                return await flight.do("k", loader)
+
+        results = await asyncio.gather(leader(), follower())
+        assert [value for value, _ in results] == ["valor", "valor"]
+        assert seen[0] is not None and seen[0] > 4
+
+    run(scenario())
+
+
+def test_waiter_without_deadline_lifts_it():
+    async def scenario():
+        flight = SingleFlight()
+        seen = []
+
+        async def loader():
+            await asyncio.sleep(0.05)
+            seen.append(remaining_budget())
+
+        async def leader():
+            with deadline_budget(1):
+                await flight.do("k", loader)
+
+        async def background():
+            await asyncio.sleep(0.01)
+            await flight.do("k", loader)
+
+        await asyncio.gather(leader(), background())
+        assert seen == [None]
+
+    run(scenario())
+
+
+def test_shared_load_has_own_trace_and_route():
+    async def scenario():
+        flight = SingleFlight()
+        seen = []
+
+        async def loader():
+            await asyncio.sleep(0.05)
+            seen.append((current_request_id(), current_route()))
+            record_call("search/Ticket", time.perf_counter(), 0.01, "ok")
+            return "valor"
+
+        async def waiter(request_id):
+            trace = Trace(request_id, "GET", "/api/v1/x")
+            use_trace(trace)
+            await flight.do("k", loader)
+            return trace
+
+        traces = await asyncio.gather(waiter("req-a"), waiter("req-b"))
+        request_id, route = seen[0]
+        assert request_id not in ("req-a", "req-b")
+        assert route == SHARED_ROUTE
+        # Cada requisição que aguardou recebe as chamadas do cálculo compartilhado
+        for trace in traces:
+            assert trace.phases[DEFAULT_PHASE]["calls"] == 1
+            assert [call["operation"] for call in trace.calls] == ["search/Ticket"]
+
+    run(scenario())
@@ -0,0 +1,91 @@
+import asyncio
+import time
+
+import httpx
+
+import backend.glpi_client as glpi_client
+from backend.logic.user_directory import UNNAMED_LABEL, UserDirectory
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def _directory(delay=0.1):
+    directory = UserDirectory(path="")
+    calls = []
+
+    async def resolve(headers, api_url, ids):
+        calls.append(list(ids))
+        await asyncio.sleep(delay)
+        for user_id in ids:
+            directory._put(user_id, f"Usuario {user_id}")
+        return {}
+
+    directory._resolve = resolve
+    return directory, calls
+
+
+def test_overlapping_requests_share_in_flight_ids():
+    async def scenario():
+        directory, calls = _directory()
+
+        async def later(ids):
+            await asyncio.sleep(0.01)
+            return await directory.get_names({}, "http://glpi", ids)
+
+        first, second = await asyncio.gather(
+            directory.get_names({}, "http://glpi", [1, 2]), later([2, 3])
+        )
+        assert calls == [[1, 2], [3]]
+        assert first == {1: "Usuario 1", 2: "Usuario 2"}
+        assert second == {2: "Usuario 2", 3: "Usuario 3"}
+        assert directory._resolving == {}
+
+    run(scenario())
+
+
+def test_independent_resolutions_run_concurrently():
+    async def scenario():
+        directory, calls = _directory(delay=0.2)
+        started = time.monotonic()
+        await asyncio.gather(*(directory.get_names({}, "http://glpi", [uid]) for uid in (1, 2, 3)))
+        # Com um lock global as três resoluções somariam 0,6 s
+        assert time.monotonic() - started < 0.4
+        assert sorted(calls) == [[1], [2], [3]]
+
+    run(scenario())
+
+
+def test_background_refresh_does_not_block_missing_ids():
+    async def scenario():
+        directory, calls = _directory(delay=0.2)
+        directory._put(1, "Antigo", now=0.0)
+        started = time.monotonic()
+        # O ID 1 vencido é servido e renovado em segundo plano
+        assert await directory.get_names({}, "http://glpi", [1]) == {1: "Antigo"}
+        assert await directory.get_names({}, "http://glpi", [2]) == {2: "Usuario 2"}
+        assert time.monotonic() - started < 0.35
+        await directory.close()
+        assert sorted(calls) == [[1], [2]]
+
+    run(scenario())
+
+
+def test_unnamed_user_gets_same_label_from_batch_and_single_lookup(monkeypatch):
+    async def search_paginated(headers, api_url, itemtype, criteria, **kwargs):
+        return [{"2": "7", "9": "", "34": None}]
+
+    async def request(method, url, headers):
+        return httpx.Response(200, json={"firstname": "", "realname": ""})
+
+    monkeypatch.setattr(glpi_client, "search_paginated", search_paginated)
+    monkeypatch.setattr(glpi_client, "request", request)
+
+    async def scenario():
+        directory = UserDirectory(path="")
+        found = await directory._search_batch({}, "http://glpi", [7])
+        _, single, _ = await directory._fetch_one({}, "http://glpi", 7)
+        assert found[7] == single == UNNAMED_LABEL.format(7)
+
+    run(scenario())
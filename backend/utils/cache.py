@@ -1,40 +1,647 @@
+import asyncio
+from collections import OrderedDict
+import logging
 import os
+import sys
 import time
-from typing import Any, Optional, Tuple
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from backend.utils.cache_backends import (
+    SharedBackend,
+    SharedCacheError,
+    SharedRecord,
+    create_shared_backend,
+)
+from backend.utils.metrics import SHARED_ROUTE, MetricFamily, detach_route, registry
+from backend.utils.resilience import (
+    SharedDeadline,
+    current_deadline,
+    detach_budget,
+    use_shared_deadline,
+)
+from backend.utils.tracing import Trace, detach_trace, detached_trace, merge_into_current, use_trace
+
+logger = logging.getLogger(__name__)
 
 # TTL padrão curto e configurável via variável de ambiente
 DEFAULT_TTL = int(os.environ.get("CACHE_TTL_SEC", "300"))  # 5 minutos por padrão
+# Janela adicional (após o TTL) em que o valor ainda é servido enquanto é revalidado
+DEFAULT_STALE_TTL = int(os.environ.get("CACHE_STALE_TTL_SEC", "3600"))
+# Limites de armazenamento: total de entradas, bytes aproximados e por namespace
+# (ex.: CACHE_NAMESPACE_MAX_ENTRIES="ranking-tecnicos=100,status-contagens=200")
+MAX_ENTRIES = int(os.environ.get("CACHE_MAX_ENTRIES", "1000"))
+MAX_BYTES = int(os.environ.get("CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+NAMESPACE_LIMITS_RAW = os.environ.get(
+    "CACHE_NAMESPACE_MAX_ENTRIES", "ranking-tecnicos=200,status-contagens=300,contagens-dia=800"
+)
+# Intervalo da varredura de entradas vencidas
+SWEEP_INTERVAL_SEC = float(os.environ.get("CACHE_SWEEP_INTERVAL_SEC", "60"))
+# Quantidade máxima de chaves com estatísticas individuais de coalescência
+SINGLE_FLIGHT_STATS_MAX_KEYS = 500
+
+
+def namespace_of(key: str) -> str:
+    """Namespace de uma chave de cache (prefixo antes do primeiro '|')."""
+    return key.split("|", 1)[0]
+
+
+class _Flight(NamedTuple):
+    """Cálculo em voo de uma chave: a task, o prazo ampliável e o trace próprio."""
+
+    task: asyncio.Task
+    deadline: SharedDeadline
+    trace: Trace
+
+
+class SingleFlight:
+    """
+    Coalescência de requisições concorrentes por chave (single-flight).
+    A primeira chamada para uma chave executa o loader em uma task própria; chamadas
+    concorrentes para a mesma chave aguardam essa task e compartilham seu resultado
+    (ou sua exceção). A task não é cancelada se o cliente que a iniciou desconectar e
+    não fica presa ao contexto de quem a iniciou: roda com o prazo mais largo entre as
+    requisições que a aguardam (ampliado a cada nova), registra as chamadas num trace
+    próprio, somado ao de cada requisição ao receber o resultado, e é contabilizada
+    na rota "shared" das métricas.
+    """
+
+    def __init__(self) -> None:
+        self._inflight: Dict[str, _Flight] = {}
+        # key -> {"leaders": n, "deduplicated": n}; limitado às chaves mais recentes
+        self._key_stats: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+        self.leaders = 0
+        self.deduplicated = 0
+
+    async def do(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Executa (ou aguarda) o loader da chave. Retorna (valor, compartilhado)."""
+        flight = self._inflight.get(key)
+        shared = flight is not None
+        if flight is None:
+            deadline = SharedDeadline(current_deadline())
+            trace = detached_trace(key)
+            task = asyncio.ensure_future(self._run(deadline, trace, loader))
+            flight = self._inflight[key] = _Flight(task, deadline, trace)
+            task.add_done_callback(lambda _t, k=key: self._inflight.pop(k, None))
+        else:
+            flight.deadline.widen(current_deadline())
+        self._count(key, shared)
+        try:
+            return await asyncio.shield(flight.task), shared
+        finally:
+            if flight.task.done():
+                merge_into_current(flight.trace)
+
+    @staticmethod
+    async def _run(deadline: SharedDeadline, trace: Trace, loader: Callable[[], Awaitable[Any]]) -> Any:
+        use_shared_deadline(deadline)
+        use_trace(trace)
+        detach_route(SHARED_ROUTE)
+        return await loader()
+
+    def in_flight(self, key: str) -> bool:
+        return key in self._inflight
+
+    def _count(self, key: str, shared: bool) -> None:
+        stats = self._key_stats.pop(key, None) or {"leaders": 0, "deduplicated": 0}
+        self._key_stats[key] = stats
+        if len(self._key_stats) > SINGLE_FLIGHT_STATS_MAX_KEYS:
+            self._key_stats.popitem(last=False)
+        if shared:
+            stats["deduplicated"] += 1
+            self.deduplicated += 1
+        else:
+            stats["leaders"] += 1
+            self.leaders += 1
+
+    def stats(self) -> Dict[str, Any]:
+        by_namespace: Dict[str, Dict[str, int]] = {}
+        for key, stats in self._key_stats.items():
+            ns = by_namespace.setdefault(namespace_of(key), {"leaders": 0, "deduplicated": 0})
+            ns["leaders"] += stats["leaders"]
+            ns["deduplicated"] += stats["deduplicated"]
+        return {
+            "in_flight": len(self._inflight),
+            "leaders": self.leaders,
+            "deduplicated": self.deduplicated,
+            "by_namespace": by_namespace,
+            "by_key": {key: dict(stats) for key, stats in self._key_stats.items()},
+        }
+
+    def clear(self) -> None:
+        self._key_stats.clear()
+        self.leaders = 0
+        self.deduplicated = 0
+
+
+class CacheEntry:
+    """Valor em cache com TTL de frescor, janela stale e marca de falha na revalidação."""
+
+    __slots__ = ("value", "ts", "ttl", "stale_ttl", "refresh_failed", "size")
+
+    def __init__(self, value: Any, ttl: float, stale_ttl: float, ts: Optional[float] = None):
+        self.value = value
+        self.ts = time.time() if ts is None else ts
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.refresh_failed = False
+        self.size = 0
+
+    def age(self, now: float) -> float:
+        return now - self.ts
+
+    def is_fresh(self, now: float) -> bool:
+        return self.age(now) < self.ttl
+
+    def is_usable(self, now: float) -> bool:
+        return self.age(now) < self.ttl + self.stale_ttl
+
+
+class CacheResult(NamedTuple):
+    """Resultado de SimpleCache.fetch: valor e como ele foi obtido."""
+
+    value: Any
+    # "hit" | "stale" | "miss" | "coalesced"
+    status: str
+    age: float = 0.0
+    # True quando o valor é stale porque a última revalidação no GLPI falhou
+    glpi_unavailable: bool = False
+
+    @property
+    def hit(self) -> bool:
+        return self.status in ("hit", "stale")
+
+    def headers(self) -> Dict[str, str]:
+        """Headers de resposta que descrevem a origem do dado."""
+        headers = {"X-Cache": self.status.upper(), "X-Cache-Age": str(int(self.age))}
+        if self.glpi_unavailable:
+            headers["X-GLPI-Status"] = "unavailable"
+        return headers
+
+
+def approx_size(value: Any) -> int:
+    """Tamanho aproximado (bytes) de um valor JSON-like, somando sys.getsizeof recursivamente."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        for k, v in value.items():
+            size += approx_size(k) + approx_size(v)
+    elif isinstance(value, (list, tuple, set)):
+        for item in value:
+            size += approx_size(item)
+    return size
+
+
+def parse_namespace_limits(raw: str) -> Dict[str, int]:
+    """Converte "ranking-tecnicos=100,status-contagens=200" em {namespace: limite}."""
+    limits: Dict[str, int] = {}
+    for part in raw.split(","):
+        name, sep, value = part.partition("=")
+        if sep and name.strip() and value.strip().isdigit():
+            limits[name.strip()] = int(value)
+    return limits
 
 
 class SimpleCache:
-    def __init__(self, default_ttl: int = DEFAULT_TTL):
-        self._store: dict[str, Tuple[Any, float, int]] = {}
+    """
+    Cache em memória limitado (LRU) com stale-while-revalidate:
+    - dentro do TTL o valor é servido diretamente (hit);
+    - dentro da janela stale o valor é servido imediatamente e uma task em segundo
+      plano o recalcula (uma por chave, via single-flight);
+    - se a revalidação falhar (ex.: GLPI fora do ar), o último valor bom continua
+      sendo servido até o fim da janela stale, sinalizado em `glpi_unavailable`.
+    O armazenamento é limitado por número de entradas, por bytes aproximados e por
+    namespace (prefixo da chave); ao exceder, as entradas menos usadas são despejadas.
+    Entradas vencidas de vez são removidas por um varredor periódico (`start_sweeper`).
+    Com um backend compartilhado (`shared`, ver cache_backends), a memória local funciona
+    como primeiro nível: misses e entradas vencidas consultam o backend, valores
+    calculados são gravados nele e o cálculo de uma chave é serializado entre processos.
+    """
+
+    def __init__(
+        self,
+        default_ttl: int = DEFAULT_TTL,
+        default_stale_ttl: int = DEFAULT_STALE_TTL,
+        max_entries: int = MAX_ENTRIES,
+        max_bytes: int = MAX_BYTES,
+        namespace_limits: Optional[Dict[str, int]] = None,
+        shared: Optional[SharedBackend] = None,
+    ):
+        self._store: "OrderedDict[str, CacheEntry]" = OrderedDict()
         self.default_ttl = default_ttl
+        self.default_stale_ttl = default_stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.namespace_limits = (
+            parse_namespace_limits(NAMESPACE_LIMITS_RAW) if namespace_limits is None else dict(namespace_limits)
+        )
+        self.bytes = 0
         self.hits = 0
         self.misses = 0
+        self.stale_hits = 0
+        self.revalidations = 0
+        self.revalidation_failures = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self._ns: Dict[str, Dict[str, int]] = {}
+        self.single_flight = SingleFlight()
+        self._background: Set[asyncio.Task] = set()
+        self._sweeper: Optional[asyncio.Task] = None
+        self.shared = shared
+        self.shared_hits = 0
+        self.shared_errors = 0
+
+    # --- armazenamento -------------------------------------------------------------
+
+    def _ns_stats(self, namespace: str) -> Dict[str, int]:
+        stats = self._ns.get(namespace)
+        if stats is None:
+            stats = self._ns[namespace] = {
+                "entries": 0, "bytes": 0, "hits": 0, "stale_hits": 0, "misses": 0,
+                "evictions": 0, "expirations": 0, "invalidations": 0,
+            }
+        return stats
+
+    def _count(self, key: str, counter: str) -> None:
+        setattr(self, counter, getattr(self, counter) + 1)
+        self._ns_stats(namespace_of(key))[counter] += 1
+
+    def _remove(self, key: str, reason: Optional[str] = None) -> None:
+        entry = self._store.pop(key, None)
+        if entry is None:
+            return
+        ns = self._ns_stats(namespace_of(key))
+        ns["entries"] -= 1
+        ns["bytes"] -= entry.size
+        self.bytes -= entry.size
+        if reason is not None:
+            self._count(key, reason)
+
+    def _lookup(self, key: str, now: float) -> Optional[CacheEntry]:
+        """Entrada ainda utilizável (fresca ou stale), marcada como recém-usada (LRU)."""
+        entry = self._store.get(key)
+        if entry is None:
+            return None
+        if not entry.is_usable(now):
+            self._remove(key, "expirations")
+            return None
+        self._store.move_to_end(key)
+        return entry
+
+    def _enforce_limits(self, namespace: str) -> None:
+        ns_limit = self.namespace_limits.get(namespace)
+        if ns_limit is not None:
+            ns = self._ns_stats(namespace)
+            while ns["entries"] > ns_limit:
+                oldest = next(k for k in self._store if namespace_of(k) == namespace)
+                self._remove(oldest, "evictions")
+        while self._store and (len(self._store) > self.max_entries or self.bytes > self.max_bytes):
+            oldest = next(iter(self._store))
+            self._remove(oldest, "evictions")
 
     def get(self, key: str) -> Optional[Any]:
+        """Retorna o valor apenas se ainda fresco (sem considerar a janela stale)."""
+        entry = self._lookup(key, time.time())
+        if entry is not None and entry.is_fresh(time.time()):
+            self._count(key, "hits")
+            return entry.value
+        self._count(key, "misses")
+        return None
+
+    def fresh_for(self, key: str) -> Optional[float]:
+        """
+        Segundos de frescor restantes da entrada (negativo se já stale), ou None se ausente.
+        Não altera estatísticas nem a ordem LRU (usado pelo pré-aquecimento).
+        """
         entry = self._store.get(key)
-        if not entry:
-            self.misses += 1
+        now = time.time()
+        if entry is None or not entry.is_usable(now):
             return None
-        value, ts, ttl = entry
-        if (time.time() - ts) < ttl:
-            self.hits += 1
-            return value
-        # Expirado: remove e contabiliza miss
-        self._store.pop(key, None)
-        self.misses += 1
+        return entry.ttl - entry.age(now)
+
+    def _record(self, value: Any, ttl: Optional[int], stale_ttl: Optional[int]) -> SharedRecord:
+        return SharedRecord(
+            value,
+            time.time(),
+            ttl or self.default_ttl,
+            self.default_stale_ttl if stale_ttl is None else stale_ttl,
+        )
+
+    def _install(self, key: str, record: SharedRecord) -> CacheEntry:
+        """Grava a entrada na memória local preservando o instante original do cálculo."""
+        self._remove(key)
+        entry = CacheEntry(record.value, record.ttl, record.stale_ttl, ts=record.ts)
+        entry.size = approx_size(record.value)
+        self._store[key] = entry
+        namespace = namespace_of(key)
+        ns = self._ns_stats(namespace)
+        ns["entries"] += 1
+        ns["bytes"] += entry.size
+        self.bytes += entry.size
+        self._enforce_limits(namespace)
+        return entry
+
+    def set(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: Optional[int] = None) -> None:
+        self._install(key, self._record(value, ttl, stale_ttl))
+
+    # --- backend compartilhado (falhas degradam para memória local) ----------------
+
+    async def _shared_get(self, key: str) -> Optional[SharedRecord]:
+        if self.shared is None:
+            return None
+        try:
+            return await self.shared.get(key)
+        except SharedCacheError as e:
+            self.shared_errors += 1
+            logger.warning("cache_shared_error op=get key=%s error=%s", key, e)
+            return None
+
+    async def _shared_set(self, key: str, record: SharedRecord) -> None:
+        if self.shared is None:
+            return
+        try:
+            await self.shared.set(key, record)
+        except SharedCacheError as e:
+            self.shared_errors += 1
+            logger.warning("cache_shared_error op=set key=%s error=%s", key, e)
+
+    async def lookup(self, key: str) -> Optional[Any]:
+        """
+        Valor fresco da chave na memória local ou, se ausente, no backend compartilhado
+        (instalado localmente). None em miss. Para leituras de muitas chaves pequenas.
+        """
+        now = time.time()
+        entry = self._lookup(key, now)
+        if entry is not None and entry.is_fresh(now):
+            self._count(key, "hits")
+            return entry.value
+        record = await self._shared_get(key)
+        if record is not None and record.is_fresh(now):
+            self.shared_hits += 1
+            self._count(key, "hits")
+            return self._install(key, record).value
+        self._count(key, "misses")
         return None
 
-    def set(self, key: str, value: Any, ttl: Optional[int] = None) -> None:
-        self._store[key] = (value, time.time(), ttl or self.default_ttl)
+    async def lookup_many(self, keys: Iterable[str]) -> Dict[str, Any]:
+        """
+        Como `lookup` para várias chaves: a memória local é lida de uma vez e só as chaves
+        ausentes vão ao backend compartilhado, em paralelo. Retorna apenas as encontradas.
+        """
+        now = time.time()
+        found: Dict[str, Any] = {}
+        remote: List[str] = []
+        for key in keys:
+            entry = self._lookup(key, now)
+            if entry is not None and entry.is_fresh(now):
+                self._count(key, "hits")
+                found[key] = entry.value
+            elif self.shared is not None:
+                remote.append(key)
+            else:
+                self._count(key, "misses")
+        if remote:
+            records = await asyncio.gather(*(self._shared_get(key) for key in remote))
+            for key, record in zip(remote, records):
+                if record is not None and record.is_fresh(now):
+                    self.shared_hits += 1
+                    self._count(key, "hits")
+                    found[key] = self._install(key, record).value
+                else:
+                    self._count(key, "misses")
+        return found
+
+    async def put(self, key: str, value: Any, ttl: Optional[int] = None, stale_ttl: Optional[int] = None) -> None:
+        """Grava na memória local e no backend compartilhado (quando configurado)."""
+        record = self._record(value, ttl, stale_ttl)
+        self._install(key, record)
+        await self._shared_set(key, record)
+
+    async def invalidate(self, key: str) -> bool:
+        """
+        Remove a chave da memória local e do backend compartilhado (invalidação manual).
+        Retorna se havia entrada local.
+        """
+        existed = key in self._store
+        self._remove(key, "invalidations")
+        if self.shared is not None:
+            try:
+                await self.shared.delete(key)
+            except SharedCacheError as e:
+                self.shared_errors += 1
+                logger.warning("cache_shared_error op=delete key=%s error=%s", key, e)
+        return existed
+
+    async def close(self) -> None:
+        """Fecha a conexão com o backend compartilhado (shutdown da aplicação)."""
+        if self.shared is not None:
+            await self.shared.close()
+
+    def sweep(self) -> int:
+        """Remove todas as entradas vencidas de vez (além da janela stale)."""
+        now = time.time()
+        expired = [key for key, entry in self._store.items() if not entry.is_usable(now)]
+        for key in expired:
+            self._remove(key, "expirations")
+        return len(expired)
+
+    def start_sweeper(self, interval: float = SWEEP_INTERVAL_SEC) -> None:
+        """Inicia a varredura periódica de expirados (chamado no startup da aplicação)."""
+        if self._sweeper is not None and not self._sweeper.done():
+            return
+
+        async def run() -> None:
+            while True:
+                await asyncio.sleep(interval)
+                removed = self.sweep()
+                if self.shared is not None:
+                    try:
+                        await self.shared.sweep()
+                    except SharedCacheError as e:
+                        logger.warning("cache_shared_error op=sweep error=%s", e)
+                if removed:
+                    logger.info("cache_sweep expired=%s entries=%s bytes=%s", removed, len(self._store), self.bytes)
+
+        self._sweeper = asyncio.ensure_future(run())
+
+    async def stop_sweeper(self) -> None:
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
+
+    # --- leitura com coalescência / stale-while-revalidate -------------------------
+
+    async def coalesce(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ) -> Tuple[Any, bool]:
+        """
+        Calcula o valor de uma chave ausente com coalescência: misses concorrentes
+        para a mesma chave aguardam um único loader, cujo resultado é gravado no cache.
+        Retorna (valor, compartilhado) — compartilhado=True para quem apenas aguardou.
+        Com backend compartilhado, o cálculo ocorre sob o lock da chave entre processos;
+        se outro processo já gravou um valor fresco enquanto esperávamos, ele é reutilizado.
+        """
+
+        async def load_and_store() -> Any:
+            if self.shared is None:
+                value = await loader()
+                self.set(key, value, ttl=ttl, stale_ttl=stale_ttl)
+                return value
+            async with self.shared.lock(key):
+                record = await self._shared_get(key)
+                if record is not None and record.is_fresh(time.time()):
+                    self.shared_hits += 1
+                    self._install(key, record)
+                    return record.value
+                record = self._record(await loader(), ttl, stale_ttl)
+                self._install(key, record)
+                await self._shared_set(key, record)
+                return record.value
+
+        return await self.single_flight.do(key, load_and_store)
+
+    async def fetch(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int] = None,
+        stale_ttl: Optional[int] = None,
+    ) -> CacheResult:
+        """
+        Leitura com stale-while-revalidate. Em miss, calcula via `coalesce` (exceções
+        do loader propagam); em stale, devolve o valor atual e revalida em segundo plano.
+        """
+        now = time.time()
+        entry = self._lookup(key, now)
+        if self.shared is not None and (entry is None or not entry.is_fresh(now)):
+            # Outro processo pode já ter um valor mais recente para a chave
+            record = await self._shared_get(key)
+            if record is not None and record.is_usable(now) and (entry is None or record.ts > entry.ts):
+                self.shared_hits += 1
+                entry = self._install(key, record)
+        if entry is not None:
+            if entry.is_fresh(now):
+                self._count(key, "hits")
+                return CacheResult(entry.value, "hit", entry.age(now), entry.refresh_failed)
+            self._count(key, "stale_hits")
+            self._revalidate(key, loader, ttl, stale_ttl)
+            return CacheResult(entry.value, "stale", entry.age(now), entry.refresh_failed)
+        self._count(key, "misses")
+        value, shared = await self.coalesce(key, loader, ttl=ttl, stale_ttl=stale_ttl)
+        return CacheResult(value, "coalesced" if shared else "miss")
+
+    def _revalidate(
+        self,
+        key: str,
+        loader: Callable[[], Awaitable[Any]],
+        ttl: Optional[int],
+        stale_ttl: Optional[int],
+    ) -> None:
+        if self.single_flight.in_flight(key):
+            return
+        self.revalidations += 1
+
+        async def run() -> None:
+            # A revalidação sobrevive à requisição que a disparou: sem o prazo, o trace e a rota dela
+            detach_budget()
+            detach_trace()
+            detach_route()
+            try:
+                await self.coalesce(key, loader, ttl=ttl, stale_ttl=stale_ttl)
+                logger.info("cache_revalidated key=%s", key)
+            except Exception as e:
+                self.revalidation_failures += 1
+                entry = self._store.get(key)
+                if entry is not None:
+                    entry.refresh_failed = True
+                logger.warning("cache_revalidate_failed key=%s error=%s", key, type(e).__name__)
+
+        task = asyncio.ensure_future(run())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._store),
+            "bytes": self.bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "stale_hits": self.stale_hits,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+            "revalidations": self.revalidations,
+            "revalidation_failures": self.revalidation_failures,
+            "namespaces": {
+                name: {**stats, "max_entries": self.namespace_limits.get(name)}
+                for name, stats in self._ns.items()
+            },
+            "single_flight": self.single_flight.stats(),
+            "backend": self.shared.name if self.shared is not None else "memory",
+            "shared": (
+                {**self.shared.stats(), "hits": self.shared_hits, "errors": self.shared_errors}
+                if self.shared is not None
+                else None
+            ),
+        }
 
     def clear(self) -> None:
         self._store.clear()
+        self._ns.clear()
+        self.bytes = 0
         self.hits = 0
         self.misses = 0
+        self.stale_hits = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+        self.revalidations = 0
+        self.revalidation_failures = 0
+        self.shared_hits = 0
+        self.shared_errors = 0
+        self.single_flight.clear()
+
+
+# Instância global para uso nos roteadores (backend compartilhado conforme CACHE_BACKEND)
+cache = SimpleCache(shared=create_shared_backend())
+
+
+def _cache_metrics() -> Iterable[MetricFamily]:
+    """Hits, misses e taxa de acerto por namespace, ocupação e coalescência (para /metrics)."""
+    namespaces = dict(cache._ns)
+    families = [
+        MetricFamily(f"dashboard_cache_{counter}_total", "counter", f"Cache de respostas: {counter} por namespace.",
+                     [({"namespace": ns}, float(stats[counter])) for ns, stats in namespaces.items()])
+        for counter in ("hits", "stale_hits", "misses", "evictions", "expirations", "invalidations")
+    ]
+    ratios = []
+    for ns, stats in namespaces.items():
+        served = stats["hits"] + stats["stale_hits"]
+        if served + stats["misses"]:
+            ratios.append(({"namespace": ns}, served / (served + stats["misses"])))
+    families += [
+        MetricFamily("dashboard_cache_hit_ratio", "gauge",
+                     "Fração das leituras servidas pelo cache (inclusive vencidas) por namespace.", ratios),
+        MetricFamily("dashboard_cache_entries", "gauge", "Entradas no cache local por namespace.",
+                     [({"namespace": ns}, float(stats["entries"])) for ns, stats in namespaces.items()]),
+        MetricFamily("dashboard_cache_bytes", "gauge", "Bytes estimados no cache local por namespace.",
+                     [({"namespace": ns}, float(stats["bytes"])) for ns, stats in namespaces.items()]),
+        MetricFamily("dashboard_cache_deduplicated_total", "counter",
+                     "Misses concorrentes atendidos por um carregamento já em voo (single-flight).",
+                     [({}, float(cache.single_flight.deduplicated))]),
+        MetricFamily("dashboard_cache_shared_errors_total", "counter", "Falhas do backend de cache compartilhado.",
+                     [({}, float(cache.shared_errors))]),
+    ]
+    return families
 
 
-# Instância global simples para uso nos roteadores
-cache = SimpleCache()
\ No newline at end of file
+registry.register_collector(_cache_metrics)
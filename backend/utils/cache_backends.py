@@ -0,0 +1,388 @@
+"""
+Backends compartilhados do cache de respostas.
+O `SimpleCache` mantém sempre um cache em memória por processo; quando CACHE_BACKEND
+aponta para um backend compartilhado, os valores também são gravados nele e os misses
+de uma chave são coordenados entre processos (workers do uvicorn / réplicas) por um
+lock com expiração, de modo que apenas um deles consulta o GLPI.
+- memory: apenas memória local (padrão, comportamento anterior);
+- sqlite: arquivo SQLite local, compartilhado pelos workers de um mesmo host;
+- redis: servidor compatível com o protocolo Redis (RESP), compartilhado entre hosts.
+"""
+from abc import ABC, abstractmethod
+import asyncio
+from contextlib import asynccontextmanager
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional
+from urllib.parse import unquote, urlparse
+import uuid
+
+logger = logging.getLogger(__name__)
+
+CACHE_BACKEND = os.environ.get("CACHE_BACKEND", "memory").strip().lower()
+CACHE_SQLITE_PATH = os.environ.get(
+    "CACHE_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "glpi-dashboard-cache.sqlite3")
+)
+CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL", "redis://127.0.0.1:6379/0")
+CACHE_REDIS_PREFIX = os.environ.get("CACHE_REDIS_PREFIX", "glpi-dashboard:")
+CACHE_REDIS_TIMEOUT_SEC = float(os.environ.get("CACHE_REDIS_TIMEOUT_SEC", "1"))
+# Validade do lock entre processos (maior que o cálculo mais lento de um endpoint)
+CACHE_LOCK_TTL_SEC = float(os.environ.get("CACHE_LOCK_TTL_SEC", "30"))
+# Após falha de conexão, tempo sem novas tentativas (evita pagar o timeout a cada chamada)
+CACHE_REDIS_RETRY_SEC = float(os.environ.get("CACHE_REDIS_RETRY_SEC", "5"))
+# Intervalo de verificação enquanto outro processo detém o lock
+CACHE_LOCK_POLL_SEC = 0.05
+# Remove o lock apenas se ainda pertencer ao dono informado (comparação e remoção atômicas)
+REDIS_UNLOCK_SCRIPT = (
+    "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) else return 0 end"
+)
+
+
+class SharedCacheError(Exception):
+    """Falha do backend compartilhado (o cache segue funcionando só em memória)."""
+
+
+class SharedRecord(NamedTuple):
+    """Entrada gravada no backend compartilhado, com o instante original do cálculo."""
+
+    value: Any
+    ts: float
+    ttl: float
+    stale_ttl: float
+
+    def is_fresh(self, now: float) -> bool:
+        return now - self.ts < self.ttl
+
+    def is_usable(self, now: float) -> bool:
+        return now - self.ts < self.ttl + self.stale_ttl
+
+    def dumps(self) -> str:
+        return json.dumps(
+            {"value": self.value, "ts": self.ts, "ttl": self.ttl, "stale_ttl": self.stale_ttl},
+            separators=(",", ":"),
+        )
+
+    @classmethod
+    def loads(cls, raw: str | bytes) -> "SharedRecord":
+        try:
+            data = json.loads(raw)
+            return cls(data["value"], data["ts"], data["ttl"], data["stale_ttl"])
+        except (ValueError, KeyError, TypeError) as e:
+            raise SharedCacheError(f"registro inválido: {e}") from e
+
+
+class SharedBackend(ABC):
+    """
+    Interface dos backends compartilhados. Implementações definem as operações
+    primitivas (get/set/delete/try_lock/unlock e, se preciso, sweep/close) e levantam
+    SharedCacheError.
+    """
+
+    name = "shared"
+
+    def __init__(self, lock_ttl: float = CACHE_LOCK_TTL_SEC):
+        self.lock_ttl = lock_ttl
+        self.lock_waits = 0
+        self.lock_timeouts = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[SharedRecord]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, record: SharedRecord) -> None:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    async def try_lock(self, key: str, owner: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    async def unlock(self, key: str, owner: str) -> None:
+        ...
+
+    async def sweep(self) -> int:
+        return 0
+
+    async def close(self) -> None:
+        return None
+
+    @asynccontextmanager
+    async def lock(self, key: str) -> AsyncIterator[bool]:
+        """
+        Lock entre processos para o cálculo de uma chave. Aguarda enquanto outro processo
+        o detém; se a espera passar da validade do lock, segue sem ele (produz `False`).
+        """
+        owner = uuid.uuid4().hex
+        deadline = time.monotonic() + self.lock_ttl
+        try:
+            acquired = await self.try_lock(key, owner, self.lock_ttl)
+            if not acquired:
+                self.lock_waits += 1
+            while not acquired and time.monotonic() < deadline:
+                await asyncio.sleep(CACHE_LOCK_POLL_SEC)
+                acquired = await self.try_lock(key, owner, self.lock_ttl)
+            if not acquired:
+                self.lock_timeouts += 1
+                logger.warning("cache_lock_timeout backend=%s key=%s", self.name, key)
+        except SharedCacheError as e:
+            # Backend indisponível: calcula localmente, sem coordenação entre processos
+            acquired = False
+            logger.warning("cache_lock_unavailable backend=%s key=%s error=%s", self.name, key, e)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                try:
+                    await self.unlock(key, owner)
+                except SharedCacheError as e:
+                    logger.warning("cache_unlock_failed backend=%s key=%s error=%s", self.name, key, e)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": self.name, "lock_waits": self.lock_waits, "lock_timeouts": self.lock_timeouts}
+
+
+class SQLiteBackend(SharedBackend):
+    """
+    Backend em arquivo SQLite (modo WAL), compartilhado pelos processos de um host.
+    As chamadas ao sqlite3 são síncronas e rodam em thread para não bloquear o event loop.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str = CACHE_SQLITE_PATH, lock_ttl: float = CACHE_LOCK_TTL_SEC):
+        super().__init__(lock_ttl)
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._conn_lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                "key TEXT PRIMARY KEY, owner TEXT NOT NULL, expires REAL NOT NULL)"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _run(self, sql: str, params: tuple, fetch: bool) -> Any:
+        with self._conn_lock:
+            try:
+                cur = self._connect().execute(sql, params)
+                return cur.fetchall() if fetch else cur.rowcount
+            except sqlite3.Error as e:
+                raise SharedCacheError(f"sqlite: {e}") from e
+
+    async def _query(self, sql: str, params: tuple = ()) -> List[tuple]:
+        return await asyncio.to_thread(self._run, sql, params, True)
+
+    async def _write(self, sql: str, params: tuple = ()) -> int:
+        """Executa um comando de escrita e retorna o número de linhas afetadas."""
+        return await asyncio.to_thread(self._run, sql, params, False)
+
+    async def get(self, key: str) -> Optional[SharedRecord]:
+        rows = await self._query(
+            "SELECT value FROM cache WHERE key = ? AND expires > ?", (key, time.time())
+        )
+        if not rows:
+            return None
+        return SharedRecord.loads(rows[0][0])
+
+    async def set(self, key: str, record: SharedRecord) -> None:
+        await self._write(
+            "INSERT OR REPLACE INTO cache (key, value, expires) VALUES (?, ?, ?)",
+            (key, record.dumps(), record.ts + record.ttl + record.stale_ttl),
+        )
+
+    async def delete(self, key: str) -> None:
+        await self._write("DELETE FROM cache WHERE key = ?", (key,))
+
+    async def try_lock(self, key: str, owner: str, ttl: float) -> bool:
+        now = time.time()
+        # Toma o lock se livre ou vencido (processo que morreu segurando o lock)
+        changed = await self._write(
+            "INSERT INTO locks (key, owner, expires) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires = excluded.expires "
+            "WHERE locks.expires < ?",
+            (key, owner, now + ttl, now),
+        )
+        return changed == 1
+
+    async def unlock(self, key: str, owner: str) -> None:
+        await self._write("DELETE FROM locks WHERE key = ? AND owner = ?", (key, owner))
+
+    async def sweep(self) -> int:
+        now = time.time()
+        await self._write("DELETE FROM locks WHERE expires < ?", (now,))
+        return await self._write("DELETE FROM cache WHERE expires < ?", (now,))
+
+    async def close(self) -> None:
+        with self._conn_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+class RedisBackend(SharedBackend):
+    """
+    Backend para servidores que falam o protocolo Redis (RESP2). Cliente mínimo sobre
+    asyncio (GET/SET PX NX/DEL/EVAL/AUTH/SELECT), com uma conexão por processo e comandos
+    serializados; em erro a conexão é descartada e refeita na próxima chamada.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str = CACHE_REDIS_URL,
+        prefix: str = CACHE_REDIS_PREFIX,
+        timeout: float = CACHE_REDIS_TIMEOUT_SEC,
+        lock_ttl: float = CACHE_LOCK_TTL_SEC,
+        retry_after: float = CACHE_REDIS_RETRY_SEC,
+    ):
+        super().__init__(lock_ttl)
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "127.0.0.1"
+        self.port = parsed.port or 6379
+        self.password = unquote(parsed.password) if parsed.password else None
+        self.username = unquote(parsed.username) if parsed.username else None
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+        self._down_until = 0.0
+
+    @staticmethod
+    def _encode(*args: Any) -> bytes:
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        return b"".join(parts)
+
+    async def _read_reply(self) -> Any:
+        assert self._reader is not None
+        line = await self._reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionResetError("conexão encerrada pelo servidor")
+        kind, body = line[:1], line[1:-2]
+        if kind == b"+":
+            return body.decode()
+        if kind == b"-":
+            raise SharedCacheError(f"redis: {body.decode()}")
+        if kind == b":":
+            return int(body)
+        if kind == b"$":
+            size = int(body)
+            if size < 0:
+                return None
+            data = await self._reader.readexactly(size + 2)
+            return data[:-2]
+        if kind == b"*":
+            size = int(body)
+            return None if size < 0 else [await self._read_reply() for _ in range(size)]
+        raise SharedCacheError(f"redis: resposta inválida {line[:20]!r}")
+
+    async def _send(self, *args: Any) -> Any:
+        assert self._writer is not None
+        self._writer.write(self._encode(*args))
+        await self._writer.drain()
+        return await self._read_reply()
+
+    async def _ensure_connection(self) -> None:
+        if self._writer is not None:
+            return
+        self._reader, self._writer = await asyncio.open_connection(self.host, self.port)
+        if self.password:
+            if self.username:
+                await self._send("AUTH", self.username, self.password)
+            else:
+                await self._send("AUTH", self.password)
+        if self.db:
+            await self._send("SELECT", self.db)
+
+    async def _drop_connection(self) -> None:
+        writer, self._reader, self._writer = self._writer, None, None
+        if writer is not None:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except OSError:
+                pass
+
+    async def command(self, *args: Any) -> Any:
+        if time.monotonic() < self._down_until:
+            raise SharedCacheError("redis: indisponível (aguardando nova tentativa)")
+        async with self._lock:
+            try:
+                async def run() -> Any:
+                    await self._ensure_connection()
+                    return await self._send(*args)
+
+                return await asyncio.wait_for(run(), timeout=self.timeout)
+            except SharedCacheError:
+                # Erro de comando (-ERR): a conexão continua utilizável
+                raise
+            except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError) as e:
+                await self._drop_connection()
+                self._down_until = time.monotonic() + self.retry_after
+                raise SharedCacheError(f"redis: {type(e).__name__}") from e
+            except BaseException:
+                # Cancelado (ou outro erro) entre o envio e a leitura: a resposta pendente
+                # ficaria na conexão e seria lida pelo próximo comando
+                await self._drop_connection()
+                raise
+
+    async def get(self, key: str) -> Optional[SharedRecord]:
+        raw = await self.command("GET", self.prefix + key)
+        return SharedRecord.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, record: SharedRecord) -> None:
+        ttl_ms = max(1, int((record.ts + record.ttl + record.stale_ttl - time.time()) * 1000))
+        await self.command("SET", self.prefix + key, record.dumps(), "PX", ttl_ms)
+
+    async def delete(self, key: str) -> None:
+        await self.command("DEL", self.prefix + key)
+
+    async def try_lock(self, key: str, owner: str, ttl: float) -> bool:
+        reply = await self.command("SET", f"{self.prefix}lock:{key}", owner, "NX", "PX", int(ttl * 1000))
+        return reply == "OK"
+
+    async def unlock(self, key: str, owner: str) -> None:
+        # Só remove o lock se ainda for nosso (ele pode ter vencido e sido tomado por outro)
+        await self.command("EVAL", REDIS_UNLOCK_SCRIPT, 1, f"{self.prefix}lock:{key}", owner)
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._drop_connection()
+
+
+def create_shared_backend(kind: str = CACHE_BACKEND) -> Optional[SharedBackend]:
+    """Instancia o backend configurado em CACHE_BACKEND (None para apenas memória)."""
+    if kind in ("", "memory"):
+        return None
+    if kind == "sqlite":
+        return SQLiteBackend()
+    if kind == "redis":
+        return RedisBackend()
+    logger.warning("cache_backend unknown=%s fallback=memory", kind)
+    return None
@@ -1,19 +1,166 @@
+"""
+Configuração central de logging.
+- Formato texto (padrão) ou JSON (LOG_FORMAT=json), com os pares chave=valor das
+  mensagens promovidos a campos e os dados da requisição em curso (request_id,
+  duration_ms, glpi_calls) anexados a cada linha.
+- Handlers não bloqueantes: o registro é formatado na hora e enfileirado; a escrita
+  em stderr acontece numa thread (QueueListener), fora do event loop.
+- Amostragem configurável de eventos frequentes (ex.: hits de cache) em INFO/DEBUG;
+  avisos e erros nunca são descartados.
+"""
+import atexit
+from datetime import datetime, timezone
+import json as jsonlib
 import logging
+import logging.handlers
+import os
+import queue
+import re
+from typing import Any, Dict, List, Optional, Tuple
 
+from backend.utils.tracing import request_log_fields
 
-def configure_logging(json: bool = False) -> None:
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "text").strip().lower()
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO").strip().upper()
+# Regras "trecho:taxa" separadas por vírgula: mensagens contendo o trecho são mantidas
+# na taxa indicada (0.1 = 1 a cada 10); vazio desabilita a amostragem
+LOG_SAMPLING_RAW = os.environ.get("LOG_SAMPLING", "cache_hit=true:0.1")
+
+TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
+_KV = re.compile(r"(\w+)=(\S+)")
+_FLOAT = re.compile(r"^-?\d+\.\d+$")
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def parse_sampling(raw: str) -> List[Tuple[str, int]]:
+    """Converte LOG_SAMPLING em [(trecho, manter 1 a cada N)]; regras inválidas são ignoradas."""
+    rules: List[Tuple[str, int]] = []
+    for item in (raw or "").split(","):
+        token, _, rate = item.strip().rpartition(":")
+        try:
+            value = float(rate)
+        except ValueError:
+            continue
+        if token and 0 < value < 1:
+            rules.append((token, max(1, round(1 / value))))
+    return rules
+
+
+def _coerce(value: str) -> Any:
+    if value in ("true", "false"):
+        return value == "true"
+    if value.lstrip("-").isdigit():
+        return int(value)
+    if _FLOAT.match(value):
+        return float(value)
+    return value
+
+
+class RequestContextFilter(logging.Filter):
+    """Anexa ao registro os campos da requisição em curso (executa na task que loga)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        for key, value in request_log_fields().items():
+            if not hasattr(record, key):
+                setattr(record, key, value)
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """Mantém 1 a cada N mensagens INFO/DEBUG que contêm o trecho de cada regra."""
+
+    def __init__(self, rules: List[Tuple[str, int]]):
+        super().__init__()
+        self.rules = rules
+        self._seen: Dict[str, int] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not self.rules or record.levelno > logging.INFO:
+            return True
+        message = record.getMessage()
+        for token, every in self.rules:
+            if token in message:
+                seen = self._seen.get(token, 0)
+                self._seen[token] = seen + 1
+                if seen % every:
+                    return False
+                record.sample_rate = round(1 / every, 6)
+                return True
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    """Formato texto do projeto, com o request_id (e o trace de requisições lentas) ao final."""
+
+    def formatMessage(self, record: logging.LogRecord) -> str:
+        line = super().formatMessage(record)
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            line += f" request_id={request_id}"
+        trace = getattr(record, "trace", None)
+        if trace is not None:
+            line += " trace=" + jsonlib.dumps(trace, ensure_ascii=False)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro: campos fixos, pares chave=valor da mensagem e da requisição."""
+
+    BASE_FIELDS = ("request_id", "duration_ms", "glpi_calls", "sample_rate", "trace")
+
+    def format(self, record: logging.LogRecord) -> str:
+        message = record.getMessage()
+        payload: Dict[str, Any] = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": message,
+        }
+        for key, value in _KV.findall(message):
+            payload.setdefault(key, _coerce(value))
+        for key in self.BASE_FIELDS:
+            value = getattr(record, key, None)
+            if value is not None:
+                payload.setdefault(key, value)
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        return jsonlib.dumps(payload, ensure_ascii=False, default=str)
+
+
+def configure_logging(json: Optional[bool] = None) -> None:
     """
-    Configura logging global simples para o backend.
-    - Formato linha simples com timestamp, nível e módulo.
-    - Evita múltiplos handlers duplicados.
-    - JSON opcional não implementado para manter simplicidade.
+    Configura o logging global do backend (uma única vez; chamadas seguintes não
+    duplicam handlers). `json` sobrepõe LOG_FORMAT. O handler da raiz apenas formata e
+    enfileira; um QueueListener escreve em stderr numa thread própria.
     """
-    if logging.getLogger().handlers:
+    global _listener
+    root = logging.getLogger()
+    if root.handlers:
         # Já configurado; evita duplicação
         return
-    fmt = "%(asctime)s %(levelname)s [%(name)s] %(message)s"
-    logging.basicConfig(level=logging.INFO, format=fmt)
+    use_json = LOG_FORMAT == "json" if json is None else json
+    # O registro é formatado já no QueueHandler (na task que loga, com a contextvar da
+    # requisição); a thread do listener só escreve a linha pronta
+    queue_handler = logging.handlers.QueueHandler(queue.SimpleQueue())
+    queue_handler.setFormatter(JsonFormatter() if use_json else TextFormatter(TEXT_FORMAT))
+    queue_handler.addFilter(SamplingFilter(parse_sampling(LOG_SAMPLING_RAW)))
+    queue_handler.addFilter(RequestContextFilter())
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(message)s"))
+    _listener = logging.handlers.QueueListener(queue_handler.queue, stream_handler)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    root.addHandler(queue_handler)
+    root.setLevel(getattr(logging, LOG_LEVEL, logging.INFO))
+
+
+def shutdown_logging() -> None:
+    """Esvazia a fila e encerra a thread de escrita (shutdown)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
 
 
 def format_range(inicio: str | None, fim: str | None) -> str:
-    return f"{inicio or ''}..{fim or ''}"
\ No newline at end of file
+    return f"{inicio or ''}..{fim or ''}"
@@ -0,0 +1,226 @@
+"""
+Métricas do processo no formato de texto do Prometheus (sem dependências externas).
+- Histogramas e contadores atualizados no caminho das requisições (rotas da API e
+  chamadas ao GLPI);
+- Coletores chamados a cada leitura de /metrics, que convertem as estatísticas já
+  mantidas pelos módulos (cache, pool de conexões, circuit breaker, thread pool) em
+  séries do Prometheus.
+"""
+import asyncio
+from contextvars import ContextVar
+import math
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+Labels = Dict[str, str]
+
+# Caminho da requisição da API em curso; as chamadas ao GLPI feitas por ela (inclusive em
+# tasks filhas) são atribuídas a esse caminho. Tarefas que sobrevivem à requisição voltam
+# a "background" e cálculos compartilhados do single-flight usam "shared" (`detach_route`)
+BACKGROUND_ROUTE = "background"
+SHARED_ROUTE = "shared"
+_current_route: ContextVar[str] = ContextVar("metrics_route", default=BACKGROUND_ROUTE)
+API_PATH_PREFIX = "/api/v1/"
+
+
+class MetricFamily(NamedTuple):
+    """Série produzida por um coletor: nome, tipo (gauge/counter), ajuda e amostras."""
+
+    name: str
+    kind: str
+    help: str
+    samples: List[Tuple[Labels, float]]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels: Labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items()) + "}"
+
+
+def _number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    """Contador monotônico com rótulos."""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for key, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(dict(zip(self.labelnames, key)))} {_number(value)}")
+        return lines
+
+
+class Histogram:
+    """Histograma cumulativo com rótulos (buckets `le`, `_sum` e `_count` por série)."""
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # rótulos -> [contagem por bucket..., soma, total]
+        self._series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels.get(name, "")) for name in self.labelnames)
+        series = self._series.get(key)
+        if series is None:
+            series = self._series[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += value
+        series[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, series in sorted(self._series.items()):
+            labels = dict(zip(self.labelnames, key))
+            for bound, count in zip(self.buckets, series):
+                lines.append(f"{self.name}_bucket{_labels({**labels, 'le': _number(bound)})} {_number(count)}")
+            lines.append(f"{self.name}_bucket{_labels({**labels, 'le': '+Inf'})} {_number(series[-1])}")
+            lines.append(f"{self.name}_sum{_labels(labels)} {_number(series[-2])}")
+            lines.append(f"{self.name}_count{_labels(labels)} {_number(series[-1])}")
+        return lines
+
+
+class Registry:
+    """Métricas registradas e coletores avaliados a cada exposição."""
+
+    def __init__(self) -> None:
+        self._metrics: List[Any] = []
+        self._collectors: List[Callable[[], Iterable[MetricFamily]]] = []
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        metric = Counter(name, help, labelnames)
+        self._metrics.append(metric)
+        return metric
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS
+    ) -> Histogram:
+        metric = Histogram(name, help, labelnames, buckets)
+        self._metrics.append(metric)
+        return metric
+
+    def register_collector(self, collector: Callable[[], Iterable[MetricFamily]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for family in collector():
+                lines.append(f"# HELP {family.name} {family.help}")
+                lines.append(f"# TYPE {family.name} {family.kind}")
+                for labels, value in family.samples:
+                    lines.append(f"{family.name}{_labels(labels)} {_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# Registro global do processo (exposto em /metrics)
+registry = Registry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "dashboard_http_request_duration_seconds",
+    "Latência das requisições à API por rota, método e status.",
+    ["route", "method", "status"],
+)
+
+
+def current_route() -> str:
+    """Caminho da requisição da API que originou o trabalho atual ("background" fora dela)."""
+    return _current_route.get()
+
+
+def detach_route(route: str = BACKGROUND_ROUTE) -> None:
+    """Desvincula a task atual do caminho da requisição que a criou."""
+    _current_route.set(route)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP até o fim da resposta. A rota é o
+    template do FastAPI (ex.: /api/v1/ranking-tecnicos), não o caminho com parâmetros;
+    caminhos sem rota (arquivos estáticos, 404) ficam agrupados em "unmatched".
+    Também marca o contexto com o caminho da requisição (ver `current_route`).
+    """
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        started = time.perf_counter()
+        status = ["500"]
+        path = scope.get("path", "")
+        token = _current_route.set(path) if path.startswith(API_PATH_PREFIX) else None
+
+        async def send_with_status(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = str(message["status"])
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            if token is not None:
+                _current_route.reset(token)
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.observe(
+                time.perf_counter() - started,
+                route=getattr(route, "path", None) or "unmatched",
+                method=scope.get("method", ""),
+                status=status[0],
+            )
+
+
+def _thread_pool_metrics() -> Iterable[MetricFamily]:
+    """Saturação do executor padrão do event loop (asyncio.to_thread: SQLite do espelho, arquivos)."""
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return []
+    executor: Optional[Any] = getattr(loop, "_default_executor", None)
+    if executor is None:
+        return []
+    queue = getattr(executor, "_work_queue", None)
+    return [
+        MetricFamily("dashboard_threadpool_max_workers", "gauge", "Threads máximas do executor padrão.",
+                     [({}, float(getattr(executor, "_max_workers", 0)))]),
+        MetricFamily("dashboard_threadpool_workers", "gauge", "Threads criadas no executor padrão.",
+                     [({}, float(len(getattr(executor, "_threads", ()))))]),
+        MetricFamily("dashboard_threadpool_queue_depth", "gauge", "Tarefas aguardando thread no executor padrão.",
+                     [({}, float(queue.qsize() if queue is not None else 0))]),
+    ]
+
+
+registry.register_collector(_thread_pool_metrics)
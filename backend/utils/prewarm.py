@@ -0,0 +1,167 @@
+"""
+Pré-aquecimento do cache de respostas.
+Um agendador em segundo plano recalcula as visões padrão do dashboard (e intervalos
+populares) antes que expirem, para que as requisições dos painéis sejam sempre hits.
+"""
+import asyncio
+from datetime import date, datetime, timedelta, timezone
+import logging
+import os
+import time
+from typing import Any, Awaitable, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import backend.glpi_client as glpi_client
+from backend.utils.cache import SimpleCache, cache
+
+logger = logging.getLogger(__name__)
+
+PREWARM_ENABLED = os.environ.get("PREWARM_ENABLED", "1").lower() in ("1", "true", "yes")
+# Intervalo entre ciclos do agendador
+PREWARM_INTERVAL_SEC = float(os.environ.get("PREWARM_INTERVAL_SEC", "15"))
+# Recalcula quando faltar menos que isso para o fim do TTL (limitado a metade do TTL)
+PREWARM_LEAD_SEC = float(os.environ.get("PREWARM_LEAD_SEC", "30"))
+# Recalculos simultâneos por ciclo (evita rajadas contra o GLPI)
+PREWARM_CONCURRENCY = int(os.environ.get("PREWARM_CONCURRENCY", "2"))
+# Intervalos pré-aquecidos: default (sem filtro), last30 (padrão do frontend), today, week, month
+PREWARM_RANGES = os.environ.get("PREWARM_RANGES", "default,last30,today,week,month")
+
+
+class WarmJob(NamedTuple):
+    """Uma visão a manter quente: chave de cache, loader e TTLs usados pelo endpoint."""
+
+    key: str
+    loader: Callable[[], Awaitable[Any]]
+    ttl: int
+    stale_ttl: int
+
+
+def popular_ranges(
+    names: str = PREWARM_RANGES, today: Optional[date] = None
+) -> List[Tuple[Optional[str], Optional[str]]]:
+    """
+    Converte nomes de intervalos em pares (inicio, fim) no formato YYYY-MM-DD.
+    As datas usam UTC, como o frontend (toISOString) ao montar o intervalo padrão.
+    """
+    today = today or datetime.now(timezone.utc).date()
+    ranges: List[Tuple[Optional[str], Optional[str]]] = []
+    for name in (n.strip().lower() for n in names.split(",")):
+        if name == "default":
+            rng: Tuple[Optional[str], Optional[str]] = (None, None)
+        elif name == "last30":
+            rng = ((today - timedelta(days=30)).isoformat(), today.isoformat())
+        elif name == "today":
+            rng = (today.isoformat(), today.isoformat())
+        elif name == "week":
+            rng = ((today - timedelta(days=today.weekday())).isoformat(), today.isoformat())
+        elif name == "month":
+            rng = (today.replace(day=1).isoformat(), today.isoformat())
+        else:
+            if name:
+                logger.warning("prewarm unknown_range=%s", name)
+            continue
+        if rng not in ranges:
+            ranges.append(rng)
+    return ranges
+
+
+class PrewarmScheduler:
+    """
+    Executa ciclos periódicos: para cada WarmJob, se a entrada estiver ausente ou perto
+    de vencer, recalcula via `cache.coalesce` (compartilhando o cálculo com requisições
+    concorrentes da mesma chave). Falhas são registradas e não interrompem o ciclo.
+    """
+
+    def __init__(
+        self,
+        cache: SimpleCache,
+        interval: float = PREWARM_INTERVAL_SEC,
+        lead: float = PREWARM_LEAD_SEC,
+        concurrency: int = PREWARM_CONCURRENCY,
+    ):
+        self.cache = cache
+        self.interval = interval
+        self.lead = lead
+        self.concurrency = concurrency
+        self._jobs_factory: Optional[Callable[[], List[WarmJob]]] = None
+        self._task: Optional[asyncio.Task] = None
+        self.cycles = 0
+        self.refreshed = 0
+        self.failures = 0
+        self.last_cycle_ts: float = 0.0
+        self.last_cycle_ms: float = 0.0
+
+    def configure(self, jobs_factory: Callable[[], List[WarmJob]]) -> None:
+        """Define a fábrica de jobs (reavaliada a cada ciclo, pois os intervalos mudam com a data)."""
+        self._jobs_factory = jobs_factory
+
+    def _due(self, job: WarmJob) -> bool:
+        if self.cache.single_flight.in_flight(job.key):
+            return False
+        remaining = self.cache.fresh_for(job.key)
+        return remaining is None or remaining < min(self.lead, job.ttl / 2)
+
+    async def _refresh(self, job: WarmJob) -> bool:
+        try:
+            await self.cache.coalesce(job.key, job.loader, ttl=job.ttl, stale_ttl=job.stale_ttl)
+            return True
+        except Exception as e:
+            logger.warning("prewarm_failed key=%s error=%s", job.key, type(e).__name__)
+            return False
+
+    async def run_once(self) -> int:
+        """Executa um ciclo e retorna quantas visões foram recalculadas."""
+        started = time.perf_counter()
+        jobs = [job for job in (self._jobs_factory() if self._jobs_factory else []) if self._due(job)]
+        results = await glpi_client.gather_limited(self.concurrency, (self._refresh(job) for job in jobs))
+        refreshed = sum(1 for ok in results if ok)
+        self.cycles += 1
+        self.refreshed += refreshed
+        self.failures += len(results) - refreshed
+        self.last_cycle_ts = time.time()
+        self.last_cycle_ms = (time.perf_counter() - started) * 1000
+        if jobs:
+            logger.info(
+                "prewarm_cycle due=%s refreshed=%s duration_ms=%.0f",
+                len(jobs), refreshed, self.last_cycle_ms,
+            )
+        return refreshed
+
+    def start(self) -> None:
+        if self._task is not None and not self._task.done():
+            return
+
+        async def run() -> None:
+            while True:
+                try:
+                    await self.run_once()
+                except Exception:
+                    logger.exception("prewarm_cycle_error")
+                await asyncio.sleep(self.interval)
+
+        self._task = asyncio.ensure_future(run())
+        logger.info("prewarm_started interval=%s lead=%s", self.interval, self.lead)
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": self._task is not None and not self._task.done(),
+            "interval_sec": self.interval,
+            "lead_sec": self.lead,
+            "cycles": self.cycles,
+            "refreshed": self.refreshed,
+            "failures": self.failures,
+            "last_cycle_ts": self.last_cycle_ts,
+            "last_cycle_ms": round(self.last_cycle_ms, 1),
+        }
+
+
+# Instância global (configurada e iniciada em backend/main.py)
+scheduler = PrewarmScheduler(cache)
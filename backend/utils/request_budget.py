@@ -0,0 +1,41 @@
+"""
+Orçamento de tempo por requisição do dashboard.
+Cada requisição à API recebe um prazo (GLPI_REQUEST_BUDGET_SEC) que vale para todas as
+chamadas ao GLPI que ela dispara, inclusive novas tentativas: os timeouts são
+encurtados para caber no que resta e, esgotado o prazo, a chamada falha como timeout
+(504) em vez de segurar o painel. Valores vencidos do cache continuam sendo servidos.
+"""
+import os
+from typing import Any, Awaitable, Callable, Dict
+
+from backend.utils.resilience import deadline_budget
+
+# Prazo (segundos) de cada requisição à API; 0 desabilita
+REQUEST_BUDGET_SEC = float(os.environ.get("GLPI_REQUEST_BUDGET_SEC", "25"))
+BUDGET_PATH_PREFIX = "/api/v1/"
+# Endpoints internos que não consultam o GLPI
+UNBUDGETED_PATH_PREFIXES = ("/api/v1/monitoramento",)
+
+Scope = Dict[str, Any]
+ASGIApp = Callable[[Scope, Callable[[], Awaitable[Any]], Callable[[Any], Awaitable[None]]], Awaitable[None]]
+
+
+class RequestBudgetMiddleware:
+    """Middleware ASGI que aplica `deadline_budget` às requisições da API."""
+
+    def __init__(self, app: ASGIApp, budget_sec: float = REQUEST_BUDGET_SEC):
+        self.app = app
+        self.budget_sec = budget_sec
+
+    async def __call__(self, scope: Scope, receive, send) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or self.budget_sec <= 0
+            or not path.startswith(BUDGET_PATH_PREFIX)
+            or path.startswith(UNBUDGETED_PATH_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+        with deadline_budget(self.budget_sec):
+            await self.app(scope, receive, send)
@@ -0,0 +1,286 @@
+"""
+Proteções do cliente GLPI contra sobrecarga e indisponibilidade.
+- AdaptiveLimiter: limite de requisições em voo ajustado à latência observada (AIMD):
+  cresce ~1 vaga por janela de respostas rápidas e é multiplicado por um fator < 1
+  quando a latência passa do alvo ou há timeout/5xx, para não empilhar carga num
+  GLPI que já está lento.
+- CircuitBreaker: abre após uma taxa de falhas na janela recente e passa a rejeitar
+  chamadas na hora (sem esperar timeouts); depois de um intervalo, deixa passar uma
+  única chamada de teste (half-open) que decide se fecha ou reabre.
+- deadline_budget: prazo por requisição do dashboard, propagado por contextvar a todas
+  as chamadas ao GLPI que ela dispara (timeouts são encurtados para caber no prazo).
+"""
+import asyncio
+from collections import deque
+from contextlib import contextmanager, suppress
+from contextvars import ContextVar
+import logging
+import time
+from typing import Any, Deque, Dict, Iterator, Optional, Union
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(httpx.TransportError):
+    """Chamada rejeitada sem ir ao GLPI porque o circuit breaker está aberto."""
+
+
+class AdaptiveLimiter:
+    """
+    Semáforo com limite variável entre `minimum` e `maximum` (AIMD). A vaga é liberada
+    por `release()`; o resultado de cada chamada é informado por `observe()`.
+    """
+
+    def __init__(
+        self,
+        maximum: int,
+        minimum: int = 1,
+        target_latency: float = 1.5,
+        backoff: float = 0.7,
+        adaptive: bool = True,
+    ):
+        self.maximum = max(1, maximum)
+        self.minimum = max(1, min(minimum, self.maximum))
+        self.target_latency = target_latency
+        self.backoff = backoff
+        self.adaptive = adaptive
+        self.limit = float(self.maximum)
+        self.in_flight = 0
+        self.increases = 0
+        self.decreases = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._last_decrease = 0.0
+
+    @property
+    def waiting(self) -> int:
+        return sum(1 for fut in self._waiters if not fut.done())
+
+    async def acquire(self) -> None:
+        if self.in_flight < int(self.limit) and not self._waiters:
+            self.in_flight += 1
+            return
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # A vaga já tinha sido entregue: devolve para o próximo da fila
+                self.release()
+            else:
+                with suppress(ValueError):
+                    self._waiters.remove(fut)
+            raise
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self.in_flight < int(self.limit):
+            fut = self._waiters.popleft()
+            if fut.done():
+                continue
+            self.in_flight += 1
+            fut.set_result(None)
+
+    def observe(self, latency: float, ok: bool) -> None:
+        """Ajusta o limite: aumento aditivo em respostas rápidas, redução multiplicativa
+        (no máximo uma por janela de `target_latency`) em respostas lentas ou falhas."""
+        if not self.adaptive:
+            return
+        if ok and latency <= self.target_latency:
+            if self.limit < self.maximum:
+                before = int(self.limit)
+                self.limit = min(float(self.maximum), self.limit + 1.0 / self.limit)
+                if int(self.limit) > before:
+                    self.increases += 1
+                    self._wake()
+            return
+        now = time.monotonic()
+        if now - self._last_decrease < self.target_latency:
+            return
+        self._last_decrease = now
+        reduced = max(float(self.minimum), self.limit * self.backoff)
+        if int(reduced) < int(self.limit):
+            self.decreases += 1
+            logger.warning(
+                "glpi_concurrency=decrease limit=%s->%s latency_ms=%.0f ok=%s",
+                int(self.limit), int(reduced), latency * 1000, str(ok).lower(),
+            )
+        self.limit = reduced
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limit": int(self.limit),
+            "min": self.minimum,
+            "max": self.maximum,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "increases": self.increases,
+            "decreases": self.decreases,
+        }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por taxa de falhas: closed -> open quando, com ao menos `min_calls`
+    na janela das últimas `window` chamadas, a fração de falhas atinge `failure_ratio`;
+    open -> half_open após `open_sec`; half_open -> closed/open pela chamada de teste.
+    Cada transição inicia uma nova geração: quem chama guarda `generation` ao ser
+    liberado por `allow()` e a informa em `record()`, que ignora resultados de chamadas
+    iniciadas em outra geração (ex.: uma chamada antiga terminando durante o half_open
+    não decide no lugar da chamada de teste).
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 10,
+        failure_ratio: float = 0.5,
+        open_sec: float = 15.0,
+        enabled: bool = True,
+    ):
+        self.window = window
+        self.min_calls = min_calls
+        self.failure_ratio = failure_ratio
+        self.open_sec = open_sec
+        self.enabled = enabled
+        self.state = "closed"
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.generation = 0
+        self.opened = 0
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        """Se a chamada pode seguir para o GLPI (em half_open, apenas uma por vez)."""
+        if not self.enabled:
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.open_sec:
+                self.rejected += 1
+                return False
+            self.state = "half_open"
+            self.generation += 1
+            self._probe_in_flight = False
+            logger.info("glpi_breaker=half_open")
+        if self.state == "half_open":
+            if self._probe_in_flight:
+                self.rejected += 1
+                return False
+            self._probe_in_flight = True
+        return True
+
+    def _open(self) -> None:
+        self.state = "open"
+        self.generation += 1
+        self._opened_at = time.monotonic()
+        self._probe_in_flight = False
+        self.opened += 1
+        logger.error("glpi_breaker=open open_sec=%s", self.open_sec)
+
+    def record(self, ok: Optional[bool], generation: Optional[int] = None) -> None:
+        """
+        Registra o resultado (None: chamada cancelada, sem veredito sobre o GLPI) da
+        chamada liberada na geração `generation` (None: sem checagem de geração).
+        """
+        if not self.enabled:
+            return
+        if generation is not None and generation != self.generation:
+            return
+        if self.state == "half_open":
+            if ok is None:
+                self._probe_in_flight = False
+            elif ok:
+                self.state = "closed"
+                self.generation += 1
+                self._outcomes.clear()
+                logger.info("glpi_breaker=closed")
+            else:
+                self._open()
+            return
+        if ok is None or self.state == "open":
+            return
+        self._outcomes.append(ok)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_ratio:
+            self._outcomes.clear()
+            self._open()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "enabled": self.enabled,
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._outcomes.count(False),
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class SharedDeadline:
+    """
+    Prazo ampliável de um cálculo compartilhado por várias requisições (single-flight):
+    vale o mais largo entre os prazos de quem aguarda; sem prazo se alguém não tiver.
+    """
+
+    def __init__(self, deadline: Optional[float]):
+        self.deadline = deadline
+
+    def widen(self, deadline: Optional[float]) -> None:
+        if self.deadline is not None:
+            self.deadline = None if deadline is None else max(self.deadline, deadline)
+
+
+# Prazo absoluto (time.monotonic) das chamadas ao GLPI do contexto atual. Tasks criadas
+# dentro do contexto (gather, páginas em paralelo) herdam o mesmo prazo.
+_deadline: ContextVar[Union[None, float, SharedDeadline]] = ContextVar("glpi_deadline", default=None)
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """O orçamento de tempo da requisição acabou antes (ou durante) a chamada ao GLPI."""
+
+
+@contextmanager
+def deadline_budget(seconds: Optional[float]) -> Iterator[None]:
+    """
+    Limita a `seconds` o tempo das chamadas ao GLPI feitas dentro do bloco (inclusive
+    novas tentativas e esperas de backoff). Nunca estende um prazo já em vigor;
+    `None` ou valor <= 0 não altera o prazo.
+    """
+    current = current_deadline()
+    if seconds is None or seconds <= 0:
+        yield
+        return
+    deadline = time.monotonic() + seconds
+    token = _deadline.set(deadline if current is None else min(current, deadline))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def current_deadline() -> Optional[float]:
+    """Prazo absoluto em vigor (time.monotonic), ou None sem prazo."""
+    deadline = _deadline.get()
+    return deadline.deadline if isinstance(deadline, SharedDeadline) else deadline
+
+
+def remaining_budget() -> Optional[float]:
+    """Segundos restantes do prazo em vigor (None: sem prazo)."""
+    deadline = current_deadline()
+    return None if deadline is None else deadline - time.monotonic()
+
+
+def use_shared_deadline(shared: SharedDeadline) -> None:
+    """Troca o prazo do contexto atual (a task do cálculo compartilhado) pelo prazo ampliável."""
+    _deadline.set(shared)
+
+
+def detach_budget() -> None:
+    """Remove o prazo herdado; para tarefas em segundo plano que sobrevivem à requisição."""
+    _deadline.set(None)
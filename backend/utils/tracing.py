@@ -0,0 +1,222 @@
+"""
+Rastreamento leve por requisição.
+O middleware cria um Trace para cada requisição HTTP (com request-id próprio ou vindo
+do header X-Request-ID) e o publica numa contextvar, herdada pelas tasks filhas
+(gather, páginas em paralelo) e pelas threads de asyncio.to_thread. Tarefas que
+sobrevivem à requisição saem do trace (`detach_trace`); o cálculo compartilhado do
+single-flight registra num trace próprio, somado ao de cada requisição que o aguardou. Os módulos de lógica marcam fases com `trace_phase("...")`; cada
+chamada ao GLPI é registrada na fase corrente com operação, duração e resultado.
+Na resposta vão os headers X-Request-ID e Server-Timing (tempo e chamadas por fase);
+requisições acima de TRACE_SLOW_MS têm o trace completo registrado em log (campo `trace`).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+import uuid
+
+logger = logging.getLogger(__name__)
+
+TRACE_ENABLED = os.environ.get("TRACE_ENABLED", "1").lower() in ("1", "true", "yes")
+# Requisições mais lentas que isso (ms) têm o trace completo registrado em log; 0 desabilita
+TRACE_SLOW_MS = float(os.environ.get("TRACE_SLOW_MS", "0"))
+# Chamadas individuais guardadas por trace (as demais entram só nos agregados da fase)
+TRACE_MAX_CALLS = int(os.environ.get("TRACE_MAX_CALLS", "200"))
+
+REQUEST_ID_HEADER = "x-request-id"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+# Fase das chamadas feitas fora de qualquer `trace_phase`
+DEFAULT_PHASE = "glpi"
+
+_trace: ContextVar[Optional["Trace"]] = ContextVar("trace", default=None)
+_phase: ContextVar[str] = ContextVar("trace_phase", default=DEFAULT_PHASE)
+
+
+class Trace:
+    """Fases e chamadas ao GLPI de uma requisição."""
+
+    def __init__(self, request_id: str, method: str, path: str):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.started = time.perf_counter()
+        # fase -> {"dur": s (tempo de parede), "calls": n, "glpi": s (soma das chamadas), "errors": n}
+        self.phases: Dict[str, Dict[str, float]] = {}
+        self.calls: List[Dict[str, Any]] = []
+        self.dropped_calls = 0
+
+    def _phase_stats(self, phase: str) -> Dict[str, float]:
+        stats = self.phases.get(phase)
+        if stats is None:
+            stats = self.phases[phase] = {"dur": 0.0, "calls": 0, "glpi": 0.0, "errors": 0}
+        return stats
+
+    def add_phase_time(self, phase: str, duration: float) -> None:
+        self._phase_stats(phase)["dur"] += duration
+
+    def add_call(self, phase: str, operation: str, started: float, duration: float, outcome: str) -> None:
+        stats = self._phase_stats(phase)
+        stats["calls"] += 1
+        stats["glpi"] += duration
+        if outcome != "ok":
+            stats["errors"] += 1
+        if len(self.calls) >= TRACE_MAX_CALLS:
+            self.dropped_calls += 1
+            return
+        self.calls.append({
+            "phase": phase,
+            "operation": operation,
+            "start_ms": round((started - self.started) * 1000, 1),
+            "dur_ms": round(duration * 1000, 1),
+            "outcome": outcome,
+        })
+
+    def merge(self, other: "Trace") -> None:
+        """Soma fases e chamadas de outro trace (ex.: o do cálculo compartilhado que esta requisição aguardou)."""
+        for phase, stats in other.phases.items():
+            mine = self._phase_stats(phase)
+            for field, value in stats.items():
+                mine[field] += value
+        offset_ms = (other.started - self.started) * 1000
+        for call in other.calls:
+            if len(self.calls) >= TRACE_MAX_CALLS:
+                self.dropped_calls += 1
+                continue
+            self.calls.append({**call, "start_ms": round(call["start_ms"] + offset_ms, 1)})
+        self.dropped_calls += other.dropped_calls
+
+    def server_timing(self) -> str:
+        """Header Server-Timing: uma entrada por fase (tempo de parede, ou soma das chamadas) e o total."""
+        entries = []
+        for phase, stats in self.phases.items():
+            dur = stats["dur"] or stats["glpi"]
+            desc = f"{int(stats['calls'])} chamada(s) GLPI" if stats["calls"] else ""
+            if stats["errors"]:
+                desc += f", {int(stats['errors'])} falha(s)"
+            entries.append(f'{phase};dur={dur * 1000:.1f}' + (f';desc="{desc}"' if desc else ""))
+        entries.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(entries)
+
+    def to_dict(self, status: int) -> Dict[str, Any]:
+        return {
+            "request_id": self.request_id,
+            "method": self.method,
+            "path": self.path,
+            "status": status,
+            "total_ms": round((time.perf_counter() - self.started) * 1000, 1),
+            "phases": {
+                phase: {
+                    "dur_ms": round(stats["dur"] * 1000, 1),
+                    "calls": int(stats["calls"]),
+                    "glpi_ms": round(stats["glpi"] * 1000, 1),
+                    "errors": int(stats["errors"]),
+                }
+                for phase, stats in self.phases.items()
+            },
+            "calls": self.calls,
+            "dropped_calls": self.dropped_calls,
+        }
+
+
+def current_request_id() -> Optional[str]:
+    trace = _trace.get()
+    return trace.request_id if trace is not None else None
+
+
+def detach_trace() -> None:
+    """Sai do trace herdado; para tarefas em segundo plano que sobrevivem à requisição."""
+    _trace.set(None)
+    _phase.set(DEFAULT_PHASE)
+
+
+def detached_trace(path: str) -> Trace:
+    """Trace próprio de um trabalho compartilhado por várias requisições (ver `merge_into_current`)."""
+    return Trace(uuid.uuid4().hex[:16], "", path)
+
+
+def use_trace(trace: Trace) -> None:
+    """Troca o trace herdado pelo `trace` na task atual."""
+    _trace.set(trace)
+    _phase.set(DEFAULT_PHASE)
+
+
+def merge_into_current(trace: Trace) -> None:
+    """Soma `trace` ao trace da requisição corrente (sem trace, nada a fazer)."""
+    current = _trace.get()
+    if current is not None and current is not trace:
+        current.merge(trace)
+
+
+@contextmanager
+def trace_phase(name: str) -> Iterator[None]:
+    """Marca uma fase da requisição: o tempo do bloco e as chamadas ao GLPI feitas nele."""
+    trace = _trace.get()
+    if trace is None:
+        yield
+        return
+    token = _phase.set(name)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add_phase_time(name, time.perf_counter() - started)
+        _phase.reset(token)
+
+
+def record_call(operation: str, started: float, duration: float, outcome: str) -> None:
+    """Registra uma chamada ao GLPI no trace corrente (sem trace, nada a fazer)."""
+    trace = _trace.get()
+    if trace is not None:
+        trace.add_call(_phase.get(), operation, started, duration, outcome)
+
+
+class TracingMiddleware:
+    """Middleware ASGI que abre o Trace da requisição e devolve X-Request-ID e Server-Timing."""
+
+    def __init__(self, app: Any):
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive, send) -> None:
+        if scope["type"] != "http" or not TRACE_ENABLED:
+            await self.app(scope, receive, send)
+            return
+        incoming = dict(scope.get("headers") or []).get(REQUEST_ID_HEADER.encode(), b"").decode("latin-1")
+        request_id = incoming if _VALID_REQUEST_ID.match(incoming) else uuid.uuid4().hex[:16]
+        trace = Trace(request_id, scope.get("method", ""), scope.get("path", ""))
+        status = [500]
+
+        async def send_with_trace(message: Dict[str, Any]) -> None:
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+                headers = list(message.get("headers") or [])
+                headers.append((REQUEST_ID_HEADER.encode(), request_id.encode()))
+                headers.append((b"server-timing", trace.server_timing().encode("latin-1", "replace")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = _trace.set(trace)
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            _trace.reset(token)
+            if TRACE_SLOW_MS > 0 and (time.perf_counter() - trace.started) * 1000 >= TRACE_SLOW_MS:
+                data = trace.to_dict(status[0])
+                logger.warning(
+                    "slow_trace path=%s status=%s total_ms=%s", trace.path, status[0], data["total_ms"],
+                    extra={"trace": data},
+                )
+
+
+def request_log_fields() -> Dict[str, Any]:
+    """Campos da requisição corrente para os logs: request_id, duração até agora e chamadas ao GLPI."""
+    trace = _trace.get()
+    if trace is None:
+        return {}
+    return {
+        "request_id": trace.request_id,
+        "duration_ms": round((time.perf_counter() - trace.started) * 1000, 1),
+        "glpi_calls": int(sum(stats["calls"] for stats in trace.phases.values())),
+    }